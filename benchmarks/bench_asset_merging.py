@@ -0,0 +1,43 @@
+"""
+Times merging duplicate assets into their original asset, where each duplicate adds one new tag, known IP and
+operating system. Each merge checks the duplicate's values against sets kept on the original asset's record, so the
+time per merge should stay the same as the original asset's lists grow.
+
+    pipenv run python benchmarks/bench_asset_merging.py [duplicates ...]
+"""
+import sys
+
+import bench_data # sets up the path and settings of the benchmarks
+from csv_parser import AssetRecord, CSVParser
+
+
+def create_parser(duplicates: int) -> CSVParser:
+    parser = CSVParser()
+    original = AssetRecord(0, 0, 0, None, False, 1, parser.create_asset())
+    parser.assets[original.id] = original
+    for i in range(1, duplicates + 1):
+        asset = AssetRecord(i, 0, i, original.id, False, i + 1, parser.create_asset())
+        asset.data['tags'].append(f'tag_{i}')
+        asset.data['knownIps'].append(f'10.{i // 62500}.{i // 250 % 250}.{i % 250}')
+        asset.data['operating_system'].append(f'os {i}')
+        parser.assets[asset.id] = asset
+    return parser
+
+
+def merge_all(parser: CSVParser) -> None:
+    for asset in parser.assets.values():
+        if asset.original_asset_id != None:
+            parser.merge_duplicate_asset(asset)
+
+
+def main(duplicate_counts: list[int]) -> None:
+    print(f'{"duplicates":>10} {"seconds":>8} {"us/merge":>9}')
+    for duplicates in duplicate_counts:
+        # every run needs an original asset that nothing has been merged into yet
+        parsers = [create_parser(duplicates) for _ in range(5)]
+        seconds = bench_data.best_time(lambda: merge_all(parsers.pop()), repeat=5)
+        print(f'{duplicates:>10} {seconds:>8.3f} {seconds / duplicates * 1e6:>9.2f}')
+
+
+if __name__ == '__main__':
+    main([int(duplicates) for duplicates in sys.argv[1:]] or [2000, 4000, 8000, 16000])
@@ -0,0 +1,124 @@
+"""
+Shared setup for the benchmarks. Creates synthetic Prism XLSX exports and parses them the same way main.py does.
+
+The benchmarks are run from the repo root, e.g. `pipenv run python benchmarks/bench_xlsx_reader.py`. Synthetic exports
+are saved to the temp folder and reused by later runs.
+"""
+import datetime
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import settings
+# only the benchmark results and the summary of invalid data are printed
+settings.save_logs_to_file = False
+settings.console_log_level = logging.WARNING
+
+import openpyxl
+
+import main
+from csv_parser import CSVParser
+
+
+DOC_VERSION = "2.6.0"
+
+METADATA_ROWS = [
+    ("Phase Name:", "Phase"),
+    ("Project Name:", "Project"),
+    ("Project Number:", "PN-1"),
+    ("Company:", "Acme Corp"),
+    ("Project Status:", "Active"),
+    ("Start Date:", datetime.datetime(2023, 1, 5)),
+    ("End Date:", "02/10/2023"),
+    ("Lead Tester:", "Tester"),
+    ("Phase Status:", "Done"),
+    ("Scope:", "Internal"),
+    ("", "")
+]
+HEADERS = ["#", "Company Name", "Project Name", "Phase Name", "Status", "Exploitable", "Severity Rating", "Affected Instances", "Affected Instances Count", "Vulnerability", "Confirmed At", "Summary", "Technical Details", "Recommendation", "Assigned User", "Last Comment", "Favourite Comments", "Issue Age", "Tags", "Remediated At", "CVEs", "CVSS Vector", "CVSS SCORE", "First Seen"]
+
+
+def create_prism_export(file_path: str, rows: int, phases: int = 2, hosts: int|None = None, seed: int = 1) -> None:
+    """
+    Creates a Prism XLSX export with random vulnerabilities, including some invalid values in the validated columns.
+
+    :param file_path: file path to save the export to
+    :type file_path: str
+    :param rows: number of vulnerability rows
+    :type rows: int
+    :param phases: number of phases, each parsed as a report, defaults to 2
+    :type phases: int, optional
+    :param hosts: number of distinct affected hosts, defaults to None for a third of the number of rows
+    :type hosts: int | None, optional
+    :param seed: seed of the random values, defaults to 1
+    :type seed: int, optional
+    """
+    rng = random.Random(seed)
+    host_count = hosts if hosts != None else max(5, rows // 3)
+    host_names = [f'10.{i // 62500}.{i // 250 % 250}.{i % 250}' for i in range(host_count)] + ["web.example.com", "db01"]
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for row in METADATA_ROWS:
+        sheet.append(list(row))
+    sheet.append(HEADERS)
+    for i in range(rows):
+        instance_count = rng.randint(1, 4)
+        sheet.append([
+            i + 1, "Acme Corp", "Project", f'Phase {i % phases}',
+            rng.choice(["Open", "Closed", "In Process", "Bogus"]),
+            rng.choice(["Yes", "No"]),
+            rng.choice(["Critical", "High", "Medium", "Low", "Informational", "Nope"]),
+            ", ".join(rng.choice(host_names) for _ in range(instance_count)), instance_count,
+            f'Vulnerability {rng.randint(0, rows // 4)}',
+            rng.choice([f'03/{rng.randint(1, 28):02d}/2023', "03/04/2023", ""]),
+            "<p>Summary of the vulnerability.</p>" * 3, "<p>Technical details.</p>", "<p>Recommendation.</p>",
+            "", "Last comment", "", rng.randint(1, 400),
+            rng.choice(["Tag A, tag-b", "web", "", "x y,z"]),
+            rng.choice(["", "2023-05-06", "06/01/2023 12:00:00 PM"]),
+            rng.choice(["", "CVE-2021-1234", "CVE-2020-1111, CVE-2019-2222", "bad"]),
+            rng.choice(["CVSS:3.1/AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:H/A:L", "AV:N/AC:H/PR:N/UI:N/S:U/C:H/I:H/A:H", "junk"]),
+            rng.choice([5.4, "abc", "7.1"]),
+            rng.choice([f'2023-01-{rng.randint(1, 28):02d}', "01/02/2023"])
+        ])
+    workbook.save(file_path)
+
+
+def get_prism_export(rows: int, phases: int = 2, hosts: int|None = None) -> str:
+    """
+    Returns the file path to a synthetic Prism export, creating it in the temp folder if it does not exist yet.
+    """
+    file_path = os.path.join(tempfile.gettempdir(), f'prism_export_{rows}_{phases}_{hosts}.xlsx')
+    if not os.path.isfile(file_path):
+        print(f'Creating synthetic export \'{file_path}\'...')
+        create_prism_export(file_path, rows, phases=phases, hosts=hosts)
+    return file_path
+
+
+def parse_export(file_path: str) -> CSVParser:
+    """
+    Parses a Prism export into a new parser, the same way `main.process_file()` does without the parse cache.
+    """
+    parser = CSVParser()
+    parser.doc_version = DOC_VERSION
+    parser.quiet = True
+    if not main.parse_file(file_path, parser):
+        raise RuntimeError(f'Could not parse \'{file_path}\'')
+    return parser
+
+
+def best_time(function, repeat: int = 5) -> float:
+    """
+    Returns the fastest of several runs of a function, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
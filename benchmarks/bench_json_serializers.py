@@ -0,0 +1,58 @@
+"""
+Compares the JSON serializers on realistic PTRACs: the throughput of encoding the flaws and assets of a report, and the
+time to save every PTRAC of a synthetic export with each serializer.
+
+    pipenv run python benchmarks/bench_json_serializers.py [rows] [phases]
+"""
+import shutil
+import sys
+import tempfile
+
+import bench_data
+import settings
+import utils.json_handler as json_handler
+
+
+def get_serializers() -> list:
+    serializers = [json_handler.JSONSerializer(), json_handler.CanonicalJSONSerializer()]
+    if json_handler.orjson != None:
+        serializers.append(json_handler.OrjsonSerializer())
+    else:
+        print("orjson is not installed, only benchmarking the standard library")
+    return serializers
+
+
+def main(rows: int, phases: int) -> None:
+    parser = bench_data.parse_export(bench_data.get_prism_export(rows, phases=phases))
+
+    report = next(iter(parser.reports.values()))
+    parser.merge_duplicate_assets()
+    report_assets = parser.get_report_assets(report)
+    values = [parser.get_ptrac_finding(finding_id, report_assets) for finding_id in report.findings]
+    values += list(report_assets.values())
+
+    print(f'\nEncoding {len(values)} flaws and assets of one report')
+    print(f'{"serializer":<10} {"values/s":>10} {"vs json":>8}')
+    json_seconds = None
+    for serializer in get_serializers():
+        seconds = bench_data.best_time(lambda: [serializer.dumps(value) for value in values])
+        json_seconds = json_seconds or seconds
+        print(f'{serializer.name:<10} {len(values) / seconds:>10.0f} {json_seconds / seconds:>7.2f}x')
+
+    print(f'\nSaving {len(parser.reports)} PTRACs of {rows} rows')
+    print(f'{"serializer":<10} {"seconds":>8}')
+    for serializer in get_serializers():
+        if serializer.sort_keys:
+            continue # only used in deterministic mode
+        settings.json_serializer = serializer.name
+        json_handler._serializer = None
+        folder_path = tempfile.mkdtemp()
+        try:
+            seconds = bench_data.best_time(lambda: parser.save_data_as_ptrac(folder_path=folder_path))
+        finally:
+            shutil.rmtree(folder_path)
+        print(f'{serializer.name:<10} {seconds:>8.2f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000, int(sys.argv[2]) if len(sys.argv) > 2 else 40)
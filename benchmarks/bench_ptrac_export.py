@@ -0,0 +1,51 @@
+"""
+Measures saving the PTRACs of synthetic Prism exports: the time to build and write the PTRACs, the throughput of the
+written JSON, and the peak memory allocated while saving, measured separately with tracemalloc since it slows down
+allocations.
+
+The exports cover a typical file, a file where a few hosts are shared by every finding, so each asset is merged many
+times, and a file with thousands of distinct hosts.
+
+    pipenv run python benchmarks/bench_ptrac_export.py
+"""
+import os
+import shutil
+import tempfile
+import tracemalloc
+
+import bench_data
+
+
+# (description, rows, phases, hosts)
+EXPORTS = [
+    ("typical", 1500, 2, None),
+    ("20 shared hosts", 6000, 2, 20),
+    ("8000 hosts", 12000, 2, 8000)
+]
+
+
+def save(parser, folder_path: str) -> None:
+    shutil.rmtree(folder_path, ignore_errors=True)
+    parser.save_data_as_ptrac(folder_path=folder_path)
+
+
+def main() -> None:
+    print(f'{"export":<16} {"rows":>6} {"findings":>9} {"seconds":>8} {"findings/s":>11} {"MB/s":>7} {"peak MB":>8}')
+    for description, rows, phases, hosts in EXPORTS:
+        parser = bench_data.parse_export(bench_data.get_prism_export(rows, phases=phases, hosts=hosts))
+        folder_path = tempfile.mkdtemp()
+        try:
+            seconds = bench_data.best_time(lambda: save(parser, folder_path), repeat=3)
+            size = sum(os.path.getsize(os.path.join(folder_path, file_name)) for file_name in os.listdir(folder_path))
+
+            tracemalloc.start()
+            save(parser, folder_path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        finally:
+            shutil.rmtree(folder_path)
+        print(f'{description:<16} {rows:>6} {len(parser.findings):>9} {seconds:>8.2f} {len(parser.findings) / seconds:>11.0f} {size / seconds / 1e6:>7.1f} {peak / 1e6:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+Compares creating parsed objects from the template factories against `deepcopy()` of the templates.
+
+    pipenv run python benchmarks/bench_template_factories.py
+"""
+import timeit
+from copy import deepcopy
+
+import bench_data # sets up the path and settings of the benchmarks
+import utils.general_utils as utils
+from csv_parser import CSVParser
+
+
+TEMPLATES = ["client_template", "report_template", "finding_template", "asset_template", "affected_asset_fields"]
+
+
+def main(number: int = 100000) -> None:
+    parser = CSVParser()
+    print(f'{"template":<24} {"deepcopy":>10} {"factory":>10} {"speedup":>8}')
+    for template_name in TEMPLATES:
+        template = getattr(parser, template_name)
+        factory = utils.create_template_factory(template)
+        assert factory() == deepcopy(template)
+
+        deepcopy_ns = min(timeit.repeat(lambda: deepcopy(template), number=number, repeat=5)) / number * 1e9
+        factory_ns = min(timeit.repeat(factory, number=number, repeat=5)) / number * 1e9
+        print(f'{template_name:<24} {deepcopy_ns:>8.0f}ns {factory_ns:>8.0f}ns {deepcopy_ns / factory_ns:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Times the validation and key helpers in utils.general_utils that run for every tag, CVE, CWE, IP and finding title,
+and reports the hit rates of the memoized helpers while parsing a synthetic Prism export and saving its PTRACs. Prism
+exports have no CWE column, so `parse_cwe` is not called.
+
+Each helper is compared to compiling its pattern on every call, which the helpers did before the patterns were compiled
+at module level, and the memoized helpers are also compared to calling them without their cache.
+
+    pipenv run python benchmarks/bench_validators.py [rows]
+"""
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+
+import bench_data
+import utils.general_utils as utils
+
+
+MEMOIZED_HELPERS = [utils.format_key, utils.generate_flaw_id, utils.parse_cve, utils.parse_cwe]
+
+
+def format_key_per_call_compile(string: str) -> str:
+    new_str = string.strip().lower()
+    return re.sub(r'[\W]', '', re.sub(r'[ -]', '_', new_str))
+
+def per_call_compile(pattern: re.Pattern):
+    return lambda value: re.compile(pattern.pattern).match(value) is not None
+
+
+# (name, helper, helper compiling its pattern on every call or None, argument)
+CASES = [
+    ("format_key", utils.format_key, format_key_per_call_compile, "Internal Network - PCI"),
+    ("generate_flaw_id", utils.generate_flaw_id, None, "SSL Certificate Cannot Be Trusted"),
+    ("is_valid_ipv4_address", utils.is_valid_ipv4_address, per_call_compile(utils.IPV4_PATTERN), "192.168.10.254"),
+    ("is_valid_ipv6_address", utils.is_valid_ipv6_address, per_call_compile(utils.IPV6_PATTERN), "fe80:0:0:0:200:f8ff:fe21:67cf"),
+    ("is_valid_cve", utils.is_valid_cve, per_call_compile(utils.CVE_PATTERN), "CVE-2023-12345"),
+    ("is_valid_cwe", utils.is_valid_cwe, per_call_compile(utils.CWE_PATTERN), "CWE-79"),
+    ("is_valid_cvss3_1_vector", utils.is_valid_cvss3_1_vector, per_call_compile(utils.CVSS3_1_VECTOR_PATTERN), "AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:H/A:L"),
+    ("parse_cve", utils.parse_cve, None, "CVE-2023-12345"),
+    ("parse_cwe", utils.parse_cwe, None, "CWE-79")
+]
+
+
+def time_call(function, argument, number: int) -> float:
+    return min(timeit.repeat(lambda: function(argument), number=number, repeat=5)) / number * 1e9
+
+
+def main(rows: int, number: int = 200000) -> None:
+    print(f'{"helper":<24} {"compile per call":>17} {"no cache":>9} {"helper":>8}')
+    for name, helper, per_call, argument in CASES:
+        per_call_ns = f'{time_call(per_call, argument, number):.0f}ns' if per_call != None else "-"
+        uncached = getattr(helper, "__wrapped__", None)
+        uncached_ns = f'{time_call(uncached, argument, number):.0f}ns' if uncached != None else "-"
+        print(f'{name:<24} {per_call_ns:>17} {uncached_ns:>9} {time_call(helper, argument, number):>6.0f}ns')
+
+    file_path = bench_data.get_prism_export(rows)
+    for helper in MEMOIZED_HELPERS:
+        helper.cache_clear()
+    parser = bench_data.parse_export(file_path)
+    folder_path = tempfile.mkdtemp()
+    try:
+        parser.save_data_as_ptrac(folder_path=folder_path)
+    finally:
+        shutil.rmtree(folder_path)
+    print(f'\nCache hit rates parsing and saving {rows} rows')
+    print(f'{"helper":<24} {"hits":>8} {"misses":>8} {"hit rate":>9}')
+    for helper in MEMOIZED_HELPERS:
+        info = helper.cache_info()
+        calls = info.hits + info.misses
+        hit_rate = f'{info.hits / calls:.1%}' if calls > 0 else "-"
+        print(f'{helper.__name__:<24} {info.hits:>8} {info.misses:>8} {hit_rate:>9}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 6000)
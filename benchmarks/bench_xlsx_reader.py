@@ -0,0 +1,44 @@
+"""
+Compares reading the rows of synthetic Prism exports with the native XLSXSheetReader against openpyxl's read only
+`iter_rows(values_only=True)`, which `load_data_file()` falls back to.
+
+    pipenv run python benchmarks/bench_xlsx_reader.py [rows ...]
+"""
+import sys
+
+import openpyxl
+
+import bench_data
+from utils.xlsx_handler import XLSXSheetReader
+
+
+def read_openpyxl(file_path: str) -> list:
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        return list(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def read_native(file_path: str) -> list:
+    workbook = XLSXSheetReader(file_path)
+    try:
+        return list(workbook.iter_rows())
+    finally:
+        workbook.close()
+
+
+def main(row_counts: list[int]) -> None:
+    print(f'{"rows":>8} {"openpyxl rows/s":>16} {"native rows/s":>14} {"speedup":>8}')
+    for rows in row_counts:
+        file_path = bench_data.get_prism_export(rows)
+        assert read_native(file_path) == read_openpyxl(file_path), "readers returned different rows"
+
+        repeat = 5 if rows <= 5000 else 3
+        openpyxl_seconds = bench_data.best_time(lambda: read_openpyxl(file_path), repeat=repeat)
+        native_seconds = bench_data.best_time(lambda: read_native(file_path), repeat=repeat)
+        print(f'{rows:>8} {rows / openpyxl_seconds:>16.0f} {rows / native_seconds:>14.0f} {openpyxl_seconds / native_seconds:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main([int(rows) for rows in sys.argv[1:]] or [1500, 30000])
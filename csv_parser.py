@@ -1,19 +1,98 @@
 import json
+import logging
 import time
 import csv
-from uuid import uuid4
+from uuid import UUID, uuid4, uuid5
 from copy import copy, deepcopy
+import itertools
+import multiprocessing
 import os
 import re
+from typing import Any, Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
 
 import utils.log_handler as logger
 log = logger.log
+from utils.log_handler import IterationMetrics
 import api
+import settings
 
 from utils.auth_handler import Auth
+from utils.cache_handler import ValidationCache
+from utils.diagnostics_handler import Diagnostics
+from utils.ptrac_handler import PTRACWriter, PTRAC_EXTENSION, COMPRESSED_PTRAC_EXTENSION
+from utils.export_name_handler import ExportNameReserver
+from utils.json_handler import get_serializer
 import utils.general_utils as utils
 
 
+# records of the objects created while parsing. `data` holds the PlexTrac object, the other attributes are bookkeeping
+# used while parsing and are not part of the object added to a PTRAC or sent to PlexTrac
+class ClientRecord():
+    __slots__ = ('id', 'data', 'reports', 'assets')
+
+    def __init__(self, id: int, data: dict):
+        self.id = id
+        self.data = data
+        self.reports = []
+        self.assets = []
+
+
+class ReportRecord():
+    __slots__ = ('id', 'client_id', 'data', 'findings')
+
+    def __init__(self, id: int, client_id: int, data: dict):
+        self.id = id
+        self.client_id = client_id
+        self.data = data
+        self.findings = []
+
+
+class FindingRecord():
+    __slots__ = ('id', 'client_id', 'report_id', 'affected_asset_id', 'dup_num', 'data', 'assets')
+
+    def __init__(self, id: int, client_id: int, report_id: int, dup_num: int, data: dict):
+        self.id = id
+        self.client_id = client_id
+        self.report_id = report_id
+        self.affected_asset_id = None
+        self.dup_num = dup_num
+        self.data = data
+        self.assets = []
+
+
+class AssetRecord():
+    __slots__ = ('id', 'client_id', 'finding_id', 'original_asset_id', 'is_multi', 'dup_num', 'data', 'asset_id', 'list_values')
+
+    def __init__(self, id: int, client_id: int, finding_id: int, original_asset_id: int, is_multi: bool, dup_num: int, data: dict):
+        self.id = id
+        self.client_id = client_id
+        self.finding_id = finding_id
+        self.original_asset_id = original_asset_id
+        self.is_multi = is_multi
+        self.dup_num = dup_num
+        self.data = data
+        self.asset_id = None # id of the asset in PlexTrac, set when imported through the API
+        # list field -> set of the values in the list, created when the first duplicate is merged into the asset
+        self.list_values = None
+
+
+# list fields of an asset that values from its duplicates are merged into
+ASSET_LIST_FIELDS = ('operating_system', 'knownIps', 'tags')
+
+
+# namespace of the asset ids in exported PTRACs when they are derived from the asset's content in deterministic mode
+ASSET_EXPORT_ID_NAMESPACE = UUID("b10606a1-ebcc-4bb7-8e48-d9529bd527ae")
+
+# parser and ptrac jobs being exported by `CSVParser.save_data_as_ptrac()`. set before the worker pool is created, so
+# forked workers inherit the parsed data instead of having it pickled and sent to them for every report
+_ptrac_export_parser = None
+_ptrac_export_jobs = None
+
+def _write_ptrac_job(job_index: int) -> tuple:
+    return _ptrac_export_parser.write_ptrac(*_ptrac_export_jobs[job_index])
+
+
 class CSVParser():
 
     # should have static header mapping build in when importing data for a static source
@@ -794,13 +873,10 @@ class CSVParser():
 
     # you can add data here that should be added to all clients
     client_template_mock = { # need all arrays build out to prevent KEY ERR when adding data
-        "sid": None,
         "name": f'Custom CSV Import Blank',
         "tags": ["custom_csv_import"],
         "custom_field": [],
-        "description": "Client for custom csv import script findings. This Client was created because there was no client_name key mapped in the data to be imported.",
-        "assets": [],
-        "reports": []
+        "description": "Client for custom csv import script findings. This Client was created because there was no client_name key mapped in the data to be imported."
     }
     #--- END CLIENT---
 
@@ -809,8 +885,6 @@ class CSVParser():
 
     # you can add data here that should be added to all reports
     report_template_mock = { # need all arrays build out to prevent KEY ERR when adding data
-        'sid': None,
-        'client_sid': None,
         "name": f'Custom CSV Import Report Blank',
         "status": "Published",
         "tags": ["custom_csv_import"],
@@ -819,8 +893,7 @@ class CSVParser():
         "end_date": None,
         "exec_summary": {
             "custom_fields": []
-        },
-        "findings": []
+        }
     }
     #--- END REPORT---
 
@@ -829,10 +902,6 @@ class CSVParser():
 
     # you can add data here that should be added to all findings
     finding_template_mock = { # need all arrays build out to prevent KEY ERR when adding data
-        'sid': None,
-        'client_sid': None,
-        'report_sid': None,
-        'affected_asset_sid': None,
         'title': None,
         'severity': "Informational",
         'status': "Open",
@@ -872,8 +941,7 @@ class CSVParser():
             "CWE": []
         },
         'tags': ["custom_csv_import"],
-        'affected_assets': {},
-        'assets': []
+        'affected_assets': {}
     }
     #--- END FINDING---
 
@@ -882,11 +950,6 @@ class CSVParser():
 
      # you can add data here that should be added to all assets
     asset_template_mock = { # need all arrays build out to prevent KEY ERR when adding data
-        'sid': None,
-        'client_sid': None,
-        'finding_sid': None,
-        'original_asset_sid': None,
-        'is_multi': False,
         'asset': None,
         'assetCriticality': None,
         'hostname': "",
@@ -913,31 +976,78 @@ class CSVParser():
         
         """
         self.csv_headers_mapping: dict = deepcopy(self.csv_headers_mapping_template)
-        self.csv_data: list = None
+        # precomputed from csv_headers_mapping in `compile_mapping_plan()` once the column indexes are loaded
+        self.mapping_plan: dict = None
+        self.key_to_header: dict = None
+        self.key_to_index: dict = None
+        self.validation_caches: dict[str, ValidationCache] = {} # header -> cache of validated values for the column
+        # stats of the validation caches when the parsed data was loaded from the parse cache instead of parsed
+        self.loaded_validation_cache_stats: dict|None = None
+        self.date_converters: dict[str, utils.DateConverter] = {} # header -> date converter for the column
+        self.csv_data: Iterable[list] = None # rows can be streamed from the data file, only iterated over once
         self.parser_progress: int = None
+        self.csv_row_count: int = None # number of rows in csv_data if known, used for progress metrics
+        # row number in the data file of the first row in csv_data, so issues are reported with the rows users see when
+        # opening the file. defaults to the row after the header row of a CSV
+        self.csv_first_row_number: int = 2
+        # in quiet mode the per row info logs are logged at debug, and replaced by periodic progress metrics
+        self.quiet: bool = False
+        self.log_row_info = log.info
+        # issues with values in the data, logged as a summary once parsing is done
+        self.diagnostics = Diagnostics(max_samples=settings.diagnostics_max_samples)
 
         self.severities = ["Critical", "High", "Medium", "Low", "Informational"]
-
-        self.parser_time_seconds: float = time.time()
-        self.parser_time_milliseconds: int = int(self.parser_time_seconds*1000)
-        self.parser_date: str = time.strftime("%m/%d/%Y", time.localtime(self.parser_time_seconds))
-        self.parser_time: str = time.strftime("%Y_%m_%d_%H_%M_%S", time.localtime(self.parser_time_seconds))
+        self.severity_set = frozenset(self.severities)
+
+        # validation_type in the data_mapping -> function to validate values. add to with `register_validation_type()`
+        self.validators = {
+            "DATE_ZULU": self.validate_date_zulu,
+            "DATE_EPOCH": self.validate_date_epoch,
+            "SEVERITY": self.validate_severity,
+            "STATUS": self.validate_status,
+            "ASSET_TYPE": self.validate_asset_type,
+            "PCI_STATUS": self.validate_pci_status,
+            "CVSS_VECTOR": self.validate_cvss_vector,
+            "POS_INT_AS_STR": self.validate_pos_int_as_str,
+            "FLOAT": self.validate_float,
+            "BOOL": self.validate_bool,
+            "INT": self.validate_int,
+            "STR": self.validate_str
+        }
 
         self.doc_version = None
+        # in deterministic mode the same data always creates the same PTRACs. ids are derived from the data instead of
+        # being random, the parser time should be pinned with `set_parser_time()` and PTRACs are written as canonical JSON
+        self.deterministic: bool = False
 
         self.client_template = deepcopy(self.client_template_mock)
         self.report_template = deepcopy(self.report_template_mock)
         self.finding_template = deepcopy(self.finding_template_mock)
         self.asset_template = deepcopy(self.asset_template_mock)
         self.affected_asset_fields = deepcopy(self.affected_asset_fields_mock)
-        self.clients = {}
-        self.reports = {}
-        self.findings = {}
-        self.assets = {}
-        self.affected_assets = {}
-
-        self.client_template['name'] = f'client_name_{self.parser_date}'
-        self.report_template['name'] = f'report_name_{self.parser_date}'
+        # records of parsed objects, keyed by record id
+        self.clients: dict[int, ClientRecord] = {}
+        self.reports: dict[int, ReportRecord] = {}
+        self.findings: dict[int, FindingRecord] = {}
+        self.assets: dict[int, AssetRecord] = {}
+        self.affected_assets: dict[int, dict] = {}
+        self.record_ids = itertools.count(1)
+        self.asset_export_ids = {} # asset record id -> id of the asset in exported PTRACs
+        self.used_asset_export_ids = set()
+
+        # indexes updated as objects are created during parsing, so existing objects can be found without scanning them all
+        self.client_name_index = {} # client name -> id of first client with that name
+        self.client_match_index = {} # client name value from csv -> id of first client whose name contains the value
+        self.report_match_index = {} # (client id, report name value) -> id of first report whose name contains the value
+        self.finding_title_counts = {} # (report id, finding title) -> number of findings with that title
+        self.asset_name_index = {} # (client id, asset name) -> [id of first asset with that name, number of assets with that name]
+        # id of a list added to while parsing the current row -> (list, set of the values in the list). objects are only
+        # added to in the row that creates them, so the sets are cleared for every row
+        self.row_list_values = {}
+        # duplicate assets are merged into their original assets once, before the first ptrac is created
+        self.duplicate_assets_merged = False
+
+        self.set_parser_time(time.time())
 
 
     #----------getters and setter----------
@@ -957,6 +1067,8 @@ class CSVParser():
         return self.csv_headers_mapping.get(header, {}).get("mapping_key")
     
     def get_index_from_key(self, mapping_key):
+        if self.key_to_index != None:
+            return self.key_to_index.get(mapping_key)
         for value in self.csv_headers_mapping.values():
             if mapping_key == value['mapping_key']:
                 return value['col_index']
@@ -964,21 +1076,144 @@ class CSVParser():
 
     # only returns the first instance of the key. will not get expected return if a generic key is used i.e. finding_custom_field
     def get_header_from_key(self, mapping_key):
+        if self.key_to_header != None:
+            return self.key_to_header.get(mapping_key)
         for value in self.csv_headers_mapping.values():
             if mapping_key == value['mapping_key']:
                 return value['header']
         return None
+
+    def get_config_fingerprint(self) -> str:
+        """
+        Returns a value representing everything that determines how data is parsed, other than the data itself.
+        Used as part of the key when caching parsed data.
+
+        The default client and report names contain the parser date, so they are left out and data parsed on an earlier
+        day can still be used. In deterministic mode the parser time is pinned to the data file and is included instead.
+        """
+        client_template = self.client_template
+        if client_template.get('name') == f'client_name_{self.parser_date}':
+            client_template = {**client_template, 'name': None}
+        report_template = self.report_template
+        if report_template.get('name') == f'report_name_{self.parser_date}':
+            report_template = {**report_template, 'name': None}
+
+        config = {
+            'csv_headers_mapping_template': self.csv_headers_mapping_template,
+            'data_mapping': self.data_mapping,
+            'client_template': client_template,
+            'report_template': report_template,
+            'finding_template': self.finding_template,
+            'asset_template': self.asset_template,
+            'affected_asset_fields': self.affected_asset_fields,
+            'severities': self.severities,
+            'doc_version': self.doc_version,
+            'parser_time_seconds': self.parser_time_seconds if self.deterministic else None
+        }
+        return json.dumps(config, sort_keys=True, default=str)
+
+    def get_parsed_data(self) -> dict:
+        """
+        Returns the data created while parsing, with the issues found in the data and the validation cache stats so the
+        parser results can be displayed again. Should be called after `parse_data()` and before any data is imported or
+        saved, since those steps update the original assets with data from their duplicates.
+        """
+        return {
+            'clients': self.clients,
+            'reports': self.reports,
+            'findings': self.findings,
+            'assets': self.assets,
+            'affected_assets': self.affected_assets,
+            'issues': self.diagnostics.issues,
+            'validation_cache_stats': self.get_validation_cache_stats()
+        }
+
+    def load_parsed_data(self, parsed_data: dict) -> None:
+        """
+        Loads data from `get_parsed_data()` that was created while parsing a file. Replaces calling `parse_data()`.
+        """
+        self.clients = parsed_data['clients']
+        self.reports = parsed_data['reports']
+        self.findings = parsed_data['findings']
+        self.assets = parsed_data['assets']
+        self.affected_assets = parsed_data['affected_assets']
+        self.duplicate_assets_merged = False
+        self.diagnostics.issues = parsed_data['issues']
+        self.loaded_validation_cache_stats = parsed_data['validation_cache_stats']
+
+    def set_parser_time(self, parser_time_seconds: float) -> None:
+        """
+        Sets the time used for the dates added to findings and the names of default clients, reports and PTRACs. Defaults
+        to the time the parser was created. Must be called before parsing.
+
+        :param parser_time_seconds: time in seconds since the epoch
+        :type parser_time_seconds: float
+        """
+        self.parser_time_seconds: float = parser_time_seconds
+        self.parser_time_milliseconds: int = int(self.parser_time_seconds*1000)
+        self.parser_date: str = time.strftime("%m/%d/%Y", time.localtime(self.parser_time_seconds))
+        self.parser_time: str = time.strftime("%Y_%m_%d_%H_%M_%S", time.localtime(self.parser_time_seconds))
+
+        self.client_template['name'] = f'client_name_{self.parser_date}'
+        self.report_template['name'] = f'report_name_{self.parser_date}'
+
+        self.compile_object_factories()
+
+    def get_asset_export_id(self, asset_record_id: int) -> str:
+        """
+        Returns the id used for an asset in exported PTRACs. The same asset keeps the same id across all exported reports.
+
+        In deterministic mode the id is derived from the client and asset names, so the same asset gets the same id every
+        time the data is parsed. Otherwise the id is random.
+        """
+        export_id = self.asset_export_ids.get(asset_record_id)
+        if export_id == None:
+            if self.deterministic:
+                asset = self.assets[asset_record_id]
+                id_source = json.dumps([self.clients[asset.client_id].data['name'], asset.data['asset']], default=str)
+                export_id = str(uuid5(ASSET_EXPORT_ID_NAMESPACE, id_source))
+                # assets are unique by client and name, except for clients with the same name
+                while export_id in self.used_asset_export_ids:
+                    id_source += "+"
+                    export_id = str(uuid5(ASSET_EXPORT_ID_NAMESPACE, id_source))
+            else:
+                export_id = str(uuid4())
+            self.asset_export_ids[asset_record_id] = export_id
+            self.used_asset_export_ids.add(export_id)
+        return export_id
     #----------End getters and setter----------
 
 
     #----------logging functions----------
     def display_parser_results(self):
         log.success(f'CSV parsing completed!')
+        self.diagnostics.display_summary()
+        self.display_validation_cache_results()
         log.info(f'Detailed logs can be found in \'{log.LOGS_FILE_PATH}\'')
 
+    def display_validation_cache_results(self):
+        stats = self.get_validation_cache_stats()
+        hits = sum(cache_stats['hits'] for cache_stats in stats.values())
+        misses = sum(cache_stats['misses'] for cache_stats in stats.values())
+        if hits + misses == 0:
+            return
+        log.info(f'Validation cache: {hits} hits, {misses} misses ({hits / (hits + misses):.1%} hit rate)')
+        for header, cache_stats in stats.items():
+            log.debug(f'Validation cache for \'{header}\': {cache_stats["hits"]} hits, {cache_stats["misses"]} misses, {cache_stats["values"]} cached values ({cache_stats["hits"] / max(cache_stats["hits"] + cache_stats["misses"], 1):.1%} hit rate)')
+
+    def get_validation_cache_stats(self) -> dict:
+        """
+        Returns the hits, misses and number of cached values of the validation cache of each column, keyed by header. If
+        the parsed data was loaded from the parse cache, returns the stats from when the file was parsed.
+        """
+        if self.loaded_validation_cache_stats != None:
+            return self.loaded_validation_cache_stats
+        return {header: {'hits': cache.hits, 'misses': cache.misses, 'values': len(cache.values)} for header, cache in self.validation_caches.items()}
+
     def save_data_to_csv(self, file_path: str) -> None:
         """
         Useful for testing to read the CSV data the CSVParser object is currently holding onto.
+        If the rows are being streamed from the data file, this will consume them and must be called before parsing.
 
         Note: Microsoft Excel has a limit of 32,767 characters for a single cell. This will make the CSV
               file look wrong if there is a cell that is longer than this. Python is still able to handle
@@ -1006,12 +1241,12 @@ class CSVParser():
         Cannot be done during parsing since we still have to look for duplicates there
         """
         for f in self.findings.values():
-            if f['dup_num'] > 1:
-                f['title'] = f'{f["title"]} ({f["dup_num"]})'
-            f.pop("dup_num")
+            if f.dup_num > 1:
+                f.data['title'] = f'{f.data["title"]} ({f.dup_num})'
+            f.dup_num = 1
 
 
-    def add_asset_to_finding(self, finding, asset, finding_sid, asset_sid):
+    def add_asset_to_finding(self, finding, asset, finding_id, asset_record_id):
         """
         Adds the asset data as an affected asset on a finding.
         Must be called after the finding and asset are created
@@ -1019,19 +1254,23 @@ class CSVParser():
         asset_id = asset['id']
 
         affected_asset = asset
-        affected_asset_fields = deepcopy(self.affected_asset_fields)
-
-        # single asset with possible affected asset fields
-        if self.assets[asset_sid]['is_multi'] == False:
-            affected_asset_fields = self.affected_assets[self.findings[finding_sid]['affected_asset_sid']]
-        
-        affected_asset.update(affected_asset_fields)
+        affected_asset.update(self.get_affected_asset_fields(finding_id, asset_record_id))
         finding['affected_assets'][asset_id] = affected_asset
 
         return finding
     
 
-    def update_asset_list_fields(self, og_asset, dup_asset, update_ports: bool = True) -> None:
+    def get_affected_asset_fields(self, finding_id, asset_record_id) -> dict:
+        """
+        Returns the affected asset fields of an asset on a finding. Only single assets have affected asset fields from
+        the csv, multi assets get the default fields.
+        """
+        if self.assets[asset_record_id].is_multi == False:
+            return self.affected_assets[self.findings[finding_id].affected_asset_id]
+        return self.create_affected_asset_fields()
+
+
+    def update_asset_list_fields(self, og_asset, dup_asset, update_ports: bool = True, list_values: dict|None = None) -> None:
         """
         Adds extra values from the OS, known IPs, tags, and ports fields from a duplicate asset to the original.
         Updates original asset and does not return anything.
@@ -1044,155 +1283,193 @@ class CSVParser():
         :type dup_asset: dict of asset - stored in self.assets
         :param update_ports: Should new port numbers be added to original asset, defaults to True
         :type update_ports: bool, optional
+        :param list_values: list field -> set of the values in the original asset's list, updated with the merged values.
+        Pass the same sets every time an asset is merged into, so merging takes time proportional to the duplicate's values
+        instead of the original's. If None the sets are created from the original asset's lists, defaults to None
+        :type list_values: dict | None, optional
         """
-        utils.merge_sanitized_str_lists(og_asset['operating_system'], dup_asset['operating_system'])
-        utils.merge_sanitized_str_lists(og_asset['knownIps'], dup_asset['knownIps'])
-        utils.merge_sanitized_str_lists(og_asset['tags'], dup_asset['tags'])
+        for field in ASSET_LIST_FIELDS:
+            utils.merge_sanitized_str_lists(og_asset[field], dup_asset[field], list_values[field] if list_values != None else None)
         if update_ports:
             for port_id, port_data in dup_asset['ports'].items():
                 if port_id not in og_asset['ports']:
                     og_asset['ports'][port_id] = port_data
 
+    def merge_duplicate_asset(self, asset: AssetRecord) -> AssetRecord:
+        """
+        Adds the extra list field values and ports of a duplicate asset to its original asset, keeping sets of the original
+        asset's list values on its record so merging every duplicate of an asset is linear overall.
+
+        :param asset: duplicate asset, with an original_asset_id
+        :type asset: AssetRecord
+        :return: the original asset
+        :rtype: AssetRecord
+        """
+        og_asset = self.assets[asset.original_asset_id]
+        if og_asset.list_values == None:
+            og_asset.list_values = {field: set(og_asset.data[field]) for field in ASSET_LIST_FIELDS}
+        self.update_asset_list_fields(og_asset.data, asset.data, list_values=og_asset.list_values)
+        return og_asset
+
+    def merge_duplicate_assets(self) -> None:
+        """
+        Merges every duplicate asset into its original asset, so the original has the values of every instance of the
+        asset in the file. Only runs once, later calls do nothing.
+        """
+        if self.duplicate_assets_merged:
+            return
+        for asset in self.assets.values():
+            if asset.original_asset_id != None:
+                self.merge_duplicate_asset(asset)
+        self.duplicate_assets_merged = True
+
+    def get_list_values(self, values: list) -> set:
+        """
+        Returns the set of values in a list being added to while parsing the current row, so values can be checked against
+        the set instead of scanning the list. The set should be updated with any values added to the list.
+        """
+        entry = self.row_list_values.get(id(values))
+        if entry == None:
+            entry = (values, set(values)) # keeps a reference to the list, so its id can't be reused by another list
+            self.row_list_values[id(values)] = entry
+        return entry[1]
+
     #----------End post parsing handling functions----------
 
 
     #----------Object Handling----------
     def handle_client(self, row):
         """
-        Returns a client sid and name based on the csv columns specified that relate to client data.
+        Returns a client id and name based on the csv columns specified that relate to client data.
 
         Looks through list of clients already created during this running instance of the script
         Determines if a client exists that the current entry should be added to
 
-        Returns the client sid and name of existing client or
+        Returns the client id and name of existing client or
         Creates new client and adds all csv column data that relates to the client
         """
-        matching_clients = []
+        matching_client_id = None
 
-        # filter for matching clients
+        # look up matching client
         header = self.get_header_from_key("client_name")
-        if header == None:
-            matching_clients = list(filter(lambda x: (self.client_template['name'] == str(x['name'])), self.clients.values()))
-        else:
+        value = ""
+        if header != None:
             index = self.get_index_from_header(header)
             value = row[index] # TODO there could be an index problem if client_name is NOT used as a mapping_key in self.csv_headers_mapping_template - currently handled elsewhere
 
-            if value == "":
-                matching_clients = list(filter(lambda x: (self.client_template['name'] == str(x['name'])), self.clients.values()))
-            else:
-                matching_clients = list(filter(lambda x: (str(value) in str(x['name'])), self.clients.values()))
+        if value == "":
+            matching_client_id = self.client_name_index.get(self.client_template['name'])
+        else:
+            value = str(value)
+            matching_client_id = self.client_match_index.get(value)
+            if matching_client_id == None:
+                # fallback to searching for a client name containing the value. once found, the first match can't change since clients are only added
+                for client in self.clients.values():
+                    if value in str(client.data['name']):
+                        matching_client_id = client.id
+                        self.client_match_index[value] = matching_client_id
+                        break
 
         # return matched client
-        if len(matching_clients) > 0:
-            client = matching_clients[0]
-            log.info(f'Found existing client {client["name"]}')
-            return client['sid'], client['name']
+        if matching_client_id != None:
+            client = self.clients[matching_client_id]
+            self.log_row_info(f'Found existing client {client.data["name"]}')
+            return client.id, client.data['name']
 
         # return new client
-        log.info(f'No client found. Creating new client...')
-        new_sid = uuid4()
-        client = deepcopy(self.client_template)
-        client['sid'] = new_sid
+        self.log_row_info(f'No client found. Creating new client...')
+        client = ClientRecord(next(self.record_ids), self.create_client())
 
-        self.add_data_to_object(client, "CLIENT", row)
+        self.add_data_to_object(client.data, "CLIENT", row)
 
-        self.clients[new_sid] = client
+        self.clients[client.id] = client
+        self.client_name_index.setdefault(str(client.data['name']), client.id)
+        if value != "" and value in str(client.data['name']):
+            self.client_match_index[value] = client.id
 
-        return new_sid, client['name']
+        return client.id, client.data['name']
 
 
-    def handle_report(self, row, client_sid):
+    def handle_report(self, row, client_id):
         """
-        Returns a report sid and name based the csv columns specified that relate to report data.
+        Returns a report id and name based the csv columns specified that relate to report data.
 
         Looks through list of reports already created during this running instance of the script for the given client
         Determines if a report exists that the current entry should be added to
 
-        Returns the report sid and name of existing report or
+        Returns the report id and name of existing report or
         Creates new report and adds all csv column data that relates to the report
         """
-        matching_reports = []
-
-        # filter for matching reports
+        # look up matching report
         header = self.get_header_from_key("report_name")
-        if header == None:
-            matching_reports = self.reports.values()
-            matching_reports = filter(lambda x: (x['client_sid'] == client_sid), matching_reports)
-            matching_reports = list(filter(lambda x: (self.report_template['name'] in str(x['name'])), matching_reports))
-        else:
+        value = ""
+        if header != None:
             index = self.get_index_from_header(header)
             value = row[index] # TODO there could be an index problem if report_name is NOT used as a mapping_key in self.csv_headers_mapping_template - currently handled elsewhere
 
-            if value == "":
-                matching_reports = self.reports.values()
-                matching_reports = filter(lambda x: (x['client_sid'] == client_sid), matching_reports)
-                matching_reports = list(filter(lambda x: (self.report_template['name'] in str(x['name'])), matching_reports))
-            else:
-                matching_reports = self.reports.values()
-                matching_reports = filter(lambda x: (x['client_sid'] == client_sid), matching_reports)
-                matching_reports = list(filter(lambda x: (str(value) in str(x['name'])), matching_reports))
+        search_value = self.report_template['name'] if value == "" else str(value)
+        matching_report_id = self.report_match_index.get((client_id, search_value))
+        if matching_report_id == None:
+            # fallback to searching the client's reports for a report name containing the value. once found, the first match can't change since reports are only added
+            for report_id in self.clients[client_id].reports:
+                if search_value in str(self.reports[report_id].data['name']):
+                    matching_report_id = report_id
+                    self.report_match_index[(client_id, search_value)] = matching_report_id
+                    break
 
         # return matched report
-        if len(matching_reports) > 0:
-            report = matching_reports[0]
-            log.info(f'Found existing report {report["name"]}')
-            return report['sid'], report['name']
+        if matching_report_id != None:
+            report = self.reports[matching_report_id]
+            self.log_row_info(f'Found existing report {report.data["name"]}')
+            return report.id, report.data['name']
 
         # return new report
-        log.info(f'No report found. Creating new report...')
-        new_sid = uuid4()
-        report = deepcopy(self.report_template)
-        report['sid'] = new_sid
-        report['client_sid'] = client_sid
+        self.log_row_info(f'No report found. Creating new report...')
+        report = ReportRecord(next(self.record_ids), client_id, self.create_report())
 
-        self.add_data_to_object(report, "REPORT", row)
+        self.add_data_to_object(report.data, "REPORT", row)
 
-        self.reports[new_sid] = report
-        self.clients[client_sid]['reports'].append(new_sid)
+        self.reports[report.id] = report
+        self.clients[client_id].reports.append(report.id)
+        if search_value in str(report.data['name']):
+            self.report_match_index[(client_id, search_value)] = report.id
 
-        return new_sid, report['name']
+        return report.id, report.data['name']
 
 
-    def handle_finding(self, row, client_sid, report_sid):
+    def handle_finding(self, row, client_id, report_id):
         """
-        Returns a finding sid and name based the csv columns specified that relate to finding data.
+        Returns a finding id and name based the csv columns specified that relate to finding data.
 
         Looks through list of findings already created during this running instance of the script for the given client and report
         Determines if a finding has a duplicate and needs a different finding title
 
         Creates new finding and adds all csv column data that relates to the finding
 
-        Returns the finding sid and name of the new finding
+        Returns the finding id and name of the new finding
         """
-        matching_findings = list(self.findings.values())
-        matching_findings = filter(lambda x: (x['client_sid'] == client_sid), matching_findings)
-        matching_findings = filter(lambda x: (x['report_sid'] == report_sid), matching_findings)
-
-        # filter for matching findings by title
+        # count findings in the report with a matching title. reports only belong to one client
         header = self.get_header_from_key('finding_title')
 
         index = self.get_index_from_header(header)
         value = row[index] # TODO there is checking in the parse_data func to prevent index errors here
 
-        matching_findings = list(filter(lambda x: (value == x['title']), matching_findings))
+        matching_findings_count = self.finding_title_counts.get((report_id, value), 0)
 
         # return finding
-        new_sid = uuid4()
-        finding = deepcopy(self.finding_template)
-        finding['sid'] = new_sid
-        finding['client_sid'] = client_sid
-        finding['report_sid'] = report_sid
-        finding['dup_num'] = len(matching_findings) + 1
+        finding = FindingRecord(next(self.record_ids), client_id, report_id, matching_findings_count + 1, self.create_finding())
 
-        self.add_data_to_object(finding, "FINDING", row)
+        self.add_data_to_object(finding.data, "FINDING", row)
 
-        self.findings[new_sid] = finding
-        self.reports[report_sid]['findings'].append(new_sid)
+        self.findings[finding.id] = finding
+        self.reports[report_id].findings.append(finding.id)
+        title_key = (report_id, finding.data['title'])
+        self.finding_title_counts[title_key] = self.finding_title_counts.get(title_key, 0) + 1
 
-        return new_sid, finding['title']
+        return finding.id, finding.data['title']
 
 
-    def handle_multi_asset(self, row, client_sid, finding_sid):
+    def handle_multi_asset(self, row, client_id, finding_id):
         """
         Creates an asset for each asset name listed in the asset_multi_name column.
 
@@ -1213,42 +1490,33 @@ class CSVParser():
         for asset_name in value.split(","):
             asset_name = asset_name.strip()
 
-            matching_assets = list(self.assets.values())
-            matching_assets = filter(lambda x: (x['client_sid'] == client_sid), matching_assets)
-            matching_assets = list(filter(lambda x: (asset_name == x['asset']), matching_assets))
+            matching_assets = self.asset_name_index.get((client_id, asset_name))
 
             # create asset
-            new_sid = uuid4()
-            asset = deepcopy(self.asset_template)
-            asset['sid'] = new_sid
-            asset['client_sid'] = client_sid
-            asset['finding_sid'] = finding_sid
-            asset['dup_num'] = len(matching_assets) + 1
-            if len(matching_assets) > 0:
-                asset['original_asset_sid'] = matching_assets[0]['sid']
+            asset = AssetRecord(next(self.record_ids), client_id, finding_id, None, True, 1, self.create_asset())
+            if matching_assets != None:
+                asset.dup_num = matching_assets[1] + 1
+                asset.original_asset_id = matching_assets[0]
 
-            self.set_value(asset, ['asset'], asset_name)
-            asset['is_multi'] = True
+            self.set_value(asset.data, ['asset'], asset_name)
 
-            self.assets[new_sid] = asset
-            self.clients[client_sid]['assets'].append(new_sid)
-            self.findings[finding_sid]['assets'].append(new_sid)
+            self.assets[asset.id] = asset
+            self.add_asset_to_name_index(asset)
+            self.clients[client_id].assets.append(asset.id)
+            self.findings[finding_id].assets.append(asset.id)
 
 
-    def handle_asset(self, row, client_sid, finding_sid):
+    def handle_asset(self, row, client_id, finding_id):
         """
-        Returns an asset sid and name based the csv columns specified that relate to asset data.
+        Returns an asset id and name based the csv columns specified that relate to asset data.
 
         Looks through list of assets already created during this running instance of the script for the given client
         Determines if an asset has a duplicate, but will create a new asset with the same name
 
         Creates new asset and adds all csv column data that relates to the asset
 
-        Returns the asset sid and name of the new asset
+        Returns the asset id and name of the new asset
         """
-        matching_assets = list(self.assets.values())
-        matching_assets = filter(lambda x: (x['client_sid'] == client_sid), matching_assets)
-
         header = self.get_header_from_key('asset_name')
         if header == None:
             return None, None
@@ -1261,39 +1529,48 @@ class CSVParser():
         if value == "":
             return None, None
 
-        matching_assets = list(filter(lambda x: (value == x['asset']), matching_assets))
+        matching_assets = self.asset_name_index.get((client_id, value))
 
         # return asset
-        new_sid = uuid4()
-        asset = deepcopy(self.asset_template)
-        asset['sid'] = new_sid
-        asset['client_sid'] = client_sid
-        asset['finding_sid'] = finding_sid
-        asset['dup_num'] = len(matching_assets) + 1
-        if len(matching_assets) > 0:
-            asset['original_asset_sid'] = matching_assets[0]['sid']
+        asset = AssetRecord(next(self.record_ids), client_id, finding_id, None, False, 1, self.create_asset())
+        if matching_assets != None:
+            asset.dup_num = matching_assets[1] + 1
+            asset.original_asset_id = matching_assets[0]
 
-        self.add_data_to_object(asset, "ASSET", row)
+        self.add_data_to_object(asset.data, "ASSET", row)
 
         # adds unaffected port data to asset
-        asset_ports = asset['ports']
+        asset_ports = asset.data['ports']
         self.handle_port_data(row, asset_ports, "ASSET_PORT")
 
-        self.assets[new_sid] = asset
-        self.clients[client_sid]['assets'].append(new_sid)
-        self.findings[finding_sid]['assets'].append(new_sid)
+        self.assets[asset.id] = asset
+        self.add_asset_to_name_index(asset)
+        self.clients[client_id].assets.append(asset.id)
+        self.findings[finding_id].assets.append(asset.id)
+
+        return asset.id, asset.data['asset']
 
-        return new_sid, asset['asset']
+
+    def add_asset_to_name_index(self, asset: AssetRecord) -> None:
+        """
+        Adds a newly created asset to the index of assets by client and name, used to find duplicate assets
+        """
+        name_key = (asset.client_id, asset.data['asset'])
+        matching_assets = self.asset_name_index.get(name_key)
+        if matching_assets == None:
+            self.asset_name_index[name_key] = [asset.id, 1]
+        else:
+            matching_assets[1] += 1
 
     
-    def handle_affected_asset(self, row, finding_sid):
+    def handle_affected_asset(self, row, finding_id):
         """
         Handles affected asset data that relates to an asset that should be added on a finding
 
         Creates new affected_asset and adds all csv column data that relates to the affected_asset
         """
-        new_sid = uuid4()
-        affected_asset = deepcopy(self.affected_asset_fields)
+        affected_asset_id = next(self.record_ids)
+        affected_asset = self.create_affected_asset_fields()
 
         self.add_data_to_object(affected_asset, "AFFECTED_ASSET", row)
 
@@ -1301,8 +1578,8 @@ class CSVParser():
         affected_asset_ports = affected_asset['ports']
         self.handle_port_data(row, affected_asset_ports, "AFFECTED_ASSET_PORT")
 
-        self.affected_assets[new_sid] = affected_asset
-        self.findings[finding_sid]['affected_asset_sid'] = new_sid
+        self.affected_assets[affected_asset_id] = affected_asset
+        self.findings[finding_id].affected_asset_id = affected_asset_id
 
 
     def handle_port_data(self, row, ports, type):
@@ -1320,7 +1597,57 @@ class CSVParser():
     #----------End Object Handling----------
 
 
-    #----------functions to add specific types of data to certain locations----------
+    def report_issue(self, header, issue_type, value, message):
+        """
+        Records an issue with a value in the row currently being parsed. Only logged in full at DEBUG, the issues are
+        summarized by `display_parser_results()`
+        """
+        self.diagnostics.add_issue(header, issue_type, value, self.get_row_number(), message)
+
+    def get_row_number(self) -> int|None:
+        """
+        Returns the row number in the data file of the row currently being parsed, or None if not parsing.
+        """
+        if self.parser_progress == None:
+            return None
+        return self.csv_first_row_number + self.parser_progress
+
+    #----------validation functions----------
+    # values accepted by the validation types with a fixed set of valid values
+    STATUSES = frozenset(["Open", "In Process", "Closed"])
+    ASSET_TYPES = frozenset(["Workstation", "Server", "Network Device", "Application", "General"])
+    PCI_STATUSES = {
+        "Pass": "pass", "pass": "pass", "Yes": "pass", "yes": "pass", "y": "pass",
+        "Fail": "fail", "fail": "fail", "No": "fail", "no": "fail", "n": "fail"
+    }
+
+    def register_validation_type(self, validation_type: str, validator: Callable[[str, Any], Any]) -> None:
+        """
+        Adds or replaces the function used to validate values for a `validation_type` in the data_mapping.
+
+        The validator is called with the CSV header and the value, and should return the validated value. Invalid values
+        should return an empty string or None. Must be called before the mapping plan is compiled to affect parsing.
+
+        :param validation_type: value of `validation_type` in the data_mapping
+        :type validation_type: str
+        :param validator: function taking (header, value) and returning the validated value
+        :type validator: Callable[[str, Any], Any]
+        """
+        self.validators[validation_type] = validator
+
+    def get_validator(self, mapping) -> Callable[[str, Any], Any]|None:
+        """
+        Returns the function used to validate values for a data_mapping entry, or None if values are not validated
+        """
+        validation_type = mapping['validation_type']
+        if validation_type == None:
+            return None
+        validator = self.validators.get(validation_type)
+        if validator == None:
+            log.warning(f'No validation for validation type <{validation_type}>, was it typed incorrectly? Values will be ignored...')
+            return self.validate_unknown_type
+        return validator
+
     def validate_value(self, header, mapping, value):
         """
         Invalid values will return an empty string or None
@@ -1329,106 +1656,114 @@ class CSVParser():
         """
         if mapping['validation_type'] == None:
             return value
+        return self.validators.get(mapping['validation_type'], self.validate_unknown_type)(header, value)
 
-        if mapping['validation_type'] == "DATE_ZULU":
-            value = str(value)
-            try:
-                raw_date = utils.try_parsing_date(value)
-            except ValueError:
-                log.exception(f"Non-valid date format for '{header}': '{value}'. Ignoring...")
-                return ""
-            except Exception:
-                log.exception(f"Could not parse date value for '{header}': '{value}'. Ignoring...")
-                return ""
-            return time.strftime("%Y-%m-%dT08:00:00.000000Z", raw_date)
-
-        if mapping['validation_type'] == "DATE_EPOCH":
-            value = str(value)
-            try:
-                raw_date = utils.try_parsing_date(value)
-            except ValueError:
-                log.exception(f"Non-valid date format for '{header}': '{value}'. Ignoring...")
-                return ""
-            except Exception:
-                log.exception(f"Could not parse date value for '{header}': '{value}'. Ignoring...")
-                return ""
-            return int(time.mktime(raw_date)*1000)
-
-        if mapping['validation_type'] == "SEVERITY":
-            # ["Critical", "High", "Medium", "Low", "Informational"]
-            if value not in self.severities:
-                log.warning(f'Header "{header}" value "{value}" is not a valid severity. Must be in the list ["Critical", "High", "Medium", "Low", "Informational"] Skipping...')
-                return None
-            return value
+    def validate_unknown_type(self, header, value):
+        return None
 
-        if mapping['validation_type'] == "STATUS":
-            statuses = ["Open", "In Process", "Closed"]
-            if value not in statuses:
-                log.warning(f'Header "{header}" value "{value}" is not a valid status. Must be in the list ["Open", "In Process", "Closed"] Skipping...')
-                return None
-            return value
+    def get_date_converter(self, header) -> utils.DateConverter:
+        """
+        Returns the date converter for a column, which remembers the date format used in the column
+        """
+        date_converter = self.date_converters.get(header)
+        if date_converter == None:
+            date_converter = utils.DateConverter()
+            self.date_converters[header] = date_converter
+        return date_converter
 
-        if mapping['validation_type'] == "ASSET_TYPE":
-            types = ["Workstation", "Server", "Network Device", "Application", "General"]
-            if value not in types:
-                log.warning(f'Header "{header}" value "{value}" is not a valid asset type. Must be in the list ["Workstation", "Server", "Network Device", "Application", "General"] Skipping...')
-                return None
-            return value
+    def validate_date_zulu(self, header, value):
+        try:
+            raw_date = self.get_date_converter(header).to_struct_time(value)
+        except ValueError:
+            self.report_issue(header, "invalid date format", value, f"Non-valid date format for '{header}': '{value}'. Ignoring...")
+            return ""
+        except Exception as e:
+            self.report_issue(header, "invalid date", value, f"Could not parse date value for '{header}': '{value}'. Ignoring...\n{e}")
+            return ""
+        return time.strftime("%Y-%m-%dT08:00:00.000000Z", raw_date)
 
-        if mapping['validation_type'] == "PCI_STATUS":
-            pass_types = ["Pass", "pass", "Yes", "yes", "y"]
-            fail_types = ["Fail", "fail", "No", "no", "n"]
-            if value in pass_types:
-                value = "pass"
-            elif value in fail_types:
-                value = "fail"
-            else:
-                log.warning(f'Header "{header}" value "{value}" is not a valid asset type. Must be in the list ["Pass", "pass", "Yes", "yes", "y"] or ["Fail", "fail", "No", "no", "n"] Skipping...')
-                return None
-            return value
+    def validate_date_epoch(self, header, value):
+        try:
+            raw_date = self.get_date_converter(header).to_struct_time(value)
+        except ValueError:
+            self.report_issue(header, "invalid date format", value, f"Non-valid date format for '{header}': '{value}'. Ignoring...")
+            return ""
+        except Exception as e:
+            self.report_issue(header, "invalid date", value, f"Could not parse date value for '{header}': '{value}'. Ignoring...\n{e}")
+            return ""
+        return int(time.mktime(raw_date)*1000)
+
+    def validate_severity(self, header, value):
+        # ["Critical", "High", "Medium", "Low", "Informational"]
+        if value not in self.severity_set:
+            self.report_issue(header, "invalid severity", value, f'Header "{header}" value "{value}" is not a valid severity. Must be in the list ["Critical", "High", "Medium", "Low", "Informational"] Skipping...')
+            return None
+        return value
+
+    def validate_status(self, header, value):
+        if value not in self.STATUSES:
+            self.report_issue(header, "invalid status", value, f'Header "{header}" value "{value}" is not a valid status. Must be in the list ["Open", "In Process", "Closed"] Skipping...')
+            return None
+        return value
+
+    def validate_asset_type(self, header, value):
+        if value not in self.ASSET_TYPES:
+            self.report_issue(header, "invalid asset type", value, f'Header "{header}" value "{value}" is not a valid asset type. Must be in the list ["Workstation", "Server", "Network Device", "Application", "General"] Skipping...')
+            return None
+        return value
+
+    def validate_pci_status(self, header, value):
+        pci_status = self.PCI_STATUSES.get(value)
+        if pci_status == None:
+            self.report_issue(header, "invalid PCI status", value, f'Header "{header}" value "{value}" is not a valid asset type. Must be in the list ["Pass", "pass", "Yes", "yes", "y"] or ["Fail", "fail", "No", "no", "n"] Skipping...')
+            return None
+        return pci_status
+
+    def validate_cvss_vector(self, header, value):
+        if value.startswith('CVSS:3.1/'):
+            value = value[9:]
+        if not utils.is_valid_cvss3_1_vector(value):
+            self.report_issue(header, "invalid CVSS vector", value, f'Header "{header}" value "{value}" is not a valid CVSSSv3.1 vector. Must be of the pattern \'AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:H/A:L\' or \'CVSS:3.1/AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:H/A:L\' Skipping...')
+            return None
+        return value
+
+    def validate_pos_int_as_str(self, header, value):
+        if not utils.is_str_positive_integer(value):
+            self.report_issue(header, "invalid positive integer", value, f'Header "{header}" value "{value}" is not a valid number. Must be a positive integer. Skipping...')
+            return None
+        return value
+
+    def validate_float(self, header, value):
+        try:
+            return float(value)
+        except ValueError:
+            self.report_issue(header, "invalid number", value, f'Header "{header}" value "{value}" is not a valid number. Skipping...')
+            return None
 
-        if mapping['validation_type'] == "CVSS_VECTOR":
-            if value.startswith('CVSS:3.1/'):
-                value = value[9:]
-            if not utils.is_valid_cvss3_1_vector(value):
-                log.warning(f'Header "{header}" value "{value}" is not a valid CVSSSv3.1 vector. Must be of the pattern \'AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:H/A:L\' or \'CVSS:3.1/AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:H/A:L\' Skipping...')
-                return None
-            return value
+    def validate_bool(self, header, value):
+        try:
+            return bool(value)
+        except ValueError:
+            self.report_issue(header, "invalid boolean", value, f'Header "{header}" value "{value}" cannot be converted to a boolean. Skipping...')
+            return None
 
-        if mapping['validation_type'] == "POS_INT_AS_STR":
-            if not utils.is_str_positive_integer(value):
-                log.warning(f'Header "{header}" value "{value}" is not a valid number. Must be a positive integer. Skipping...')
-                return None
-            return value
+    def validate_int(self, header, value):
+        try:
+            return int(value)
+        except ValueError:
+            self.report_issue(header, "invalid integer", value, f'Header "{header}" value "{value}" cannot be converted to an integer. Skipping...')
+            return None
+
+    def validate_str(self, header, value):
+        try:
+            return str(value)
+        except ValueError:
+            self.report_issue(header, "invalid string", value, f'Header "{header}" value "{value}" cannot be converted to a string. Skipping...')
+            return None
+    #----------end validation functions----------
 
-        if mapping['validation_type'] == "FLOAT":
-            try:
-                return float(value)
-            except ValueError:
-                log.exception(f'Header "{header}" value "{value}" is not a valid number. Skipping...')
-                return None
-
-        if mapping['validation_type'] == "BOOL":
-            try:
-                return bool(value)
-            except ValueError:
-                log.exception(f'Header "{header}" value "{value}" cannot be converted to a boolean. Skipping...')
-                return None
-
-        if mapping['validation_type'] == "INT":
-            try:
-                return int(value)
-            except ValueError:
-                log.exception(f'Header "{header}" value "{value}" cannot be converted to an integer. Skipping...')
-                return None
-        
-        if mapping['validation_type'] == "STR":
-            try:
-                return str(value)
-            except ValueError:
-                log.exception(f'Header "{header}" value "{value}" cannot be converted to a string. Skipping...')
-                return None
 
+    #----------functions to add specific types of data to certain locations----------
     # base function that takes path and sets value
     def set_value(self, obj, path, value):
         if len(path) == 1:
@@ -1475,14 +1810,13 @@ class CSVParser():
     # tag
     def add_tag(self, header, obj, mapping, value):
         if "," in value:
-            log.exception(f'Single tag value of \'{value}\' contains a \',\'. Will be processed into the tag \'{utils.format_key(value)}\'.Is this value multiple tags? Update the mapping file \'{header}\' column key from \'{str(mapping["object_type"]).lower()}_tag\' to \'{str(mapping["object_type"]).lower()}_multi_tag\'')
-        utils.add_tag(obj['tags'], value)
+            self.report_issue(header, "tag contains ','", value, f'Single tag value of \'{value}\' contains a \',\'. Will be processed into the tag \'{utils.format_key(value)}\'.Is this value multiple tags? Update the mapping file \'{header}\' column key from \'{str(mapping["object_type"]).lower()}_tag\' to \'{str(mapping["object_type"]).lower()}_multi_tag\'')
+        utils.add_tag(obj['tags'], value, self.get_list_values(obj['tags']))
 
     # multiple tags
     def add_multi_tag(self, header, obj, mapping, value):
         tags = value.split(",")
-        for tag in tags:
-            utils.add_tag(obj['tags'], tag)
+        utils.add_tags(obj['tags'], tags, self.get_list_values(obj['tags']))
 
     # report narrative
     def add_label_text(self, header, obj, mapping, value):
@@ -1498,15 +1832,15 @@ class CSVParser():
         cves = value.split(",")
         for cve in cves:
             cve_clean = cve.strip()
-            if not utils.is_valid_cve(cve_clean):
-                log.warning(f'Header "{header}" value "{cve_clean}" is not a list of valid CVE IDs. Expects "CVE-2022-12345" or "CVE-2022-12345, CVE-2022-67890" Skipping...')
+            parsed_cve = utils.parse_cve(cve_clean)
+            if parsed_cve == None:
+                self.report_issue(header, "invalid CVE", cve_clean, f'Header "{header}" value "{cve_clean}" is not a list of valid CVE IDs. Expects "CVE-2022-12345" or "CVE-2022-12345, CVE-2022-67890" Skipping...')
                 return
             
-            values = cve_clean.split("-")
             data= {
                 "name": cve_clean,
-                "year": int(values[1]),
-                "id": int(values[2]),
+                "year": parsed_cve[0],
+                "id": parsed_cve[1],
                 "link": f'https://www.cve.org/CVERecord?id={cve_clean}'
             }
             self.set_value(obj, mapping['path'], data)
@@ -1517,16 +1851,15 @@ class CSVParser():
         cwes = value.split(",")
         for cwe in cwes:
             cwe_clean = cwe.strip()
-            if not (utils.is_valid_cwe(cwe_clean) or utils.is_valid_cwe(cwe_clean, has_prefix=False)):
-                log.warning(f'Header "{header}" value "{cwe_clean}" is not a list of valid CWE numbers. Expects "1234" or "CWE-1234" Skipping...')
+            parsed_cwe = utils.parse_cwe(cwe_clean)
+            if parsed_cwe == None:
+                self.report_issue(header, "invalid CWE", cwe_clean, f'Header "{header}" value "{cwe_clean}" is not a list of valid CWE numbers. Expects "1234" or "CWE-1234" Skipping...')
                 return
 
-            if cwe_clean.startswith("CWE"):
-                cwe_clean = cwe_clean[4:]
-
+            cwe_clean = parsed_cwe[0]
             data = {
                 "name": f'CWE-{cwe_clean}',
-                "id": int(cwe_clean),
+                "id": parsed_cwe[1],
                 "link": f'https://cwe.mitre.org/data/definitions/{cwe_clean}.html'
             }
             self.set_value(obj, mapping['path'], data)
@@ -1534,21 +1867,24 @@ class CSVParser():
 
     # list (asset known ips, operating systems)
     def add_list(self, header, obj, mapping, value):
-        log.debug(f'Updating \'{header}\' with values [{value}]')
+        log.debug(lambda: f'Updating \'{header}\' with values [{value}]')
         values = value.split(",")
+        existing_values = self.get_list_values(obj[mapping['path'][0]])
         for value in values:
             new_value = value.strip()
-            log.debug(f'Adding \'{new_value}\' to \'{mapping["path"][0]}\' list with existing values {obj[mapping["path"][0]]}')
-            if value not in obj[mapping['path'][0]]:
+            log.debug(lambda: f'Adding \'{new_value}\' to \'{mapping["path"][0]}\' list with existing values {obj[mapping["path"][0]]}')
+            if new_value not in existing_values:
                 if mapping['path'][0] == "knownIps": # add to list of known IPs, must be a valid IPv4 or IPv6
                     if utils.is_valid_ipv4_address(new_value) or utils.is_valid_ipv6_address(new_value):
+                        existing_values.add(new_value)
                         obj[mapping['path'][0]].append(new_value)
                     else:
-                        log.warning(f'IP \'{new_value}\' is not a valid IPv4 or IPv6 address. Skipping...')
+                        self.report_issue(header, "invalid IP", new_value, f'IP \'{new_value}\' is not a valid IPv4 or IPv6 address. Skipping...')
                 else: # add to any list with no validation
+                    existing_values.add(new_value)
                     obj[mapping['path'][0]].append(new_value)
 
-        log.debug(f'Updated list {obj[mapping["path"][0]]}')
+        log.debug(lambda: f'Updated list {obj[mapping["path"][0]]}')
 
     # asset port obj - csv data should be formatted "port|service|protocol|version"
     def add_port(self, header, obj, mapping, value):
@@ -1556,13 +1892,13 @@ class CSVParser():
         for port in ports:
             data = port.strip().split("|")
             if len(data) != 4:
-                log.warning(f'Port data {port} not formatted correctly. Expected "port|service|protocol|version". Ignoring...')
+                self.report_issue(header, "invalid port data", port, f'Port data {port} not formatted correctly. Expected "port|service|protocol|version". Ignoring...')
                 continue
             if data[0] == "":
-                log.warning(f'Missing port number. Expected "port|service|protocol|version". Ignoring...')
+                self.report_issue(header, "missing port number", port, f'Missing port number. Expected "port|service|protocol|version". Ignoring...')
                 continue
             if not utils.is_str_positive_integer(data[0].strip()):
-                log.warning(f'Port number "{data[0].strip()}" from "{port}" is not a valid number. Must be a positive integer. Skipping...')
+                self.report_issue(header, "invalid port number", port, f'Port number "{data[0].strip()}" from "{port}" is not a valid number. Must be a positive integer. Skipping...')
                 continue
             
             port = {
@@ -1575,20 +1911,55 @@ class CSVParser():
     #----------end functions----------
 
 
-    def add_data_to_object(self, obj, obj_type, row):
+    def compile_object_factories(self):
         """
-        Controller to add different types of data to different locations on an object.
+        Creates the functions used to create new clients, reports, findings, assets and affected assets from their templates.
+        Must be called again if a template changes, since the factories do not reflect changes made after they are created.
+        """
+        self.create_client = utils.create_template_factory(self.client_template)
+        self.create_report = utils.create_template_factory(self.report_template)
+        self.create_finding = utils.create_template_factory(self.finding_template)
+        self.create_asset = utils.create_template_factory(self.asset_template)
+        self.create_affected_asset_fields = utils.create_template_factory(self.affected_asset_fields)
 
-        Objects can be clients, reports, findings, assets, affected assets, or vulnerabilities
 
-        Adds all data from csv row that corresponds to the object type
+    def compile_mapping_plan(self):
         """
+        Precomputes everything `add_data_to_object()` needs from the csv_headers_mapping and data_mapping, so it does not
+        have to be looked up again for every row. Must be called again if the csv_headers_mapping changes.
+
+        Creates a plan for each object type, a list of (col_index, header, data_mapping, validator, handler) for each
+        column with data for that object type, in the order of the csv_headers_mapping. Also creates maps of mapping key
+        to the first header and column index using that key. Each column's validator is wrapped in a ValidationCache, so
+        repeated values are only validated once.
+        """
+        handlers = {
+            "DETAIL": self.add_detail,
+            "CUSTOM_FIELD": self.add_label_value,
+            "KEY_CUSTOM_FIELD": self.add_key_label_value,
+            "TAG": self.add_tag,
+            "MULTI_TAG": self.add_multi_tag,
+            "NARRATIVE": self.add_label_text,
+            "CVE": self.add_cve,
+            "CWE": self.add_cwe,
+            "LIST": self.add_list,
+            "PORTS": self.add_port
+        }
+
+        mapping_plan = {}
+        key_to_header = {}
+        key_to_index = {}
+        self.validation_caches = {}
         for value in self.csv_headers_mapping.values():
+            header = value['header']
+            data_mapping_key = value['mapping_key']
+            if data_mapping_key not in key_to_header:
+                key_to_header[data_mapping_key] = header
+                key_to_index[data_mapping_key] = value['col_index']
+
             index = value['col_index']
             if index == None: # if CSV being processed doesn't have this column from the mapping, the index never got set
                 continue
-            header = value['header']
-            data_mapping_key = self.get_mapping_key_from_header(header)
             if data_mapping_key == None:
                 log.debug(f'CSV header "{header}" not mapped with a location key. Skipping {header}...')
                 continue
@@ -1598,36 +1969,38 @@ class CSVParser():
                 log.warning(f'No Plextrac mapping for <{data_mapping_key}>, was it typed incorrectly? Ignoring...')
                 continue
 
-            # only loop through the field for hte correct obj type
-            if data_mapping['object_type'] != obj_type:
+            handler = handlers.get(data_mapping['data_type'])
+            if handler == None: # data types that are not added to an object by column i.e. IGNORE, MULTI_ASSET
                 continue
 
-            data_type = data_mapping['data_type']
-            value = self.validate_value(header, data_mapping, row[index])
+            validator = self.get_validator(data_mapping)
+            if validator != None and settings.validation_cache_max_size > 0:
+                self.validation_caches[header] = ValidationCache(validator, settings.validation_cache_max_size)
+                validator = self.validation_caches[header].validate
+
+            mapping_plan.setdefault(data_mapping['object_type'], []).append((index, header, data_mapping, validator, handler))
+
+        self.mapping_plan = mapping_plan
+        self.key_to_header = key_to_header
+        self.key_to_index = key_to_index
+
+
+    def add_data_to_object(self, obj, obj_type, row):
+        """
+        Controller to add different types of data to different locations on an object.
+
+        Objects can be clients, reports, findings, assets, affected assets, or vulnerabilities
+
+        Adds all data from csv row that corresponds to the object type, following the plan from `compile_mapping_plan()`
+        """
+        for index, header, data_mapping, validator, handler in self.mapping_plan.get(obj_type, ()):
+            value = row[index]
+            if validator != None:
+                value = validator(header, value)
 
             # determine whether to add blank values
             if data_mapping['input_blanks'] or (value != "" and value != None): 
-
-                if data_type == "DETAIL":
-                    self.add_detail(header, obj, data_mapping, value)
-                elif data_type == "CUSTOM_FIELD":
-                    self.add_label_value(header, obj, data_mapping, value)
-                elif data_type == "KEY_CUSTOM_FIELD":
-                    self.add_key_label_value(header, obj, data_mapping, value)
-                elif data_type == "TAG":
-                    self.add_tag(header, obj, data_mapping, value)
-                elif data_type == "MULTI_TAG":
-                    self.add_multi_tag(header, obj, data_mapping, value)
-                elif data_type == "NARRATIVE":
-                    self.add_label_text(header, obj, data_mapping, value)
-                elif data_type == "CVE":
-                    self.add_cve(header, obj, data_mapping, value)
-                elif data_type == "CWE":
-                    self.add_cwe(header, obj, data_mapping, value)
-                elif data_type == "LIST":
-                    self.add_list(header, obj, data_mapping, value)
-                elif data_type == "PORTS":
-                    self.add_port(header, obj, data_mapping, value)
+                handler(header, obj, data_mapping, value)
 
 
     def parser_row(self, row):
@@ -1639,35 +2012,39 @@ class CSVParser():
         Creates finding
         Creates asset
         """
+        self.row_list_values.clear()
+
         # query csv row for client specific info and create or choose client
-        client_sid, client_name = self.handle_client(row)
-        if client_sid == None:
+        client_id, client_name = self.handle_client(row)
+        if client_id == None:
             return
 
         # query csv row for report specific data and create or choose report
-        report_sid, report_name = self.handle_report(row, client_sid)   
-        if report_sid == None:
+        report_id, report_name = self.handle_report(row, client_id)   
+        if report_id == None:
             return     
         
         # query csv row for finding specific data and create finding
-        finding_sid, finding_name = self.handle_finding(row, client_sid, report_sid)
-        if finding_sid == None:
+        finding_id, finding_name = self.handle_finding(row, client_id, report_id)
+        if finding_id == None:
             return
 
-        self.handle_multi_asset(row, client_sid, finding_sid)
-        log.debug(f'After MULTI asset call, asset list:')
-        for asset in self.assets.values():
-            log.debug(f'SID: {asset["sid"]} - Name: {asset["asset"]} - Dup num: {asset["dup_num"]} - OG SID: {asset["original_asset_sid"]}')
+        self.handle_multi_asset(row, client_id, finding_id)
+        if log.is_enabled_for(logging.DEBUG):
+            log.debug(f'After MULTI asset call, asset list:')
+            for asset in self.assets.values():
+                log.debug(f'ID: {asset.id} - Name: {asset.data["asset"]} - Dup num: {asset.dup_num} - OG ID: {asset.original_asset_id}')
 
         # query csv row for asset specific data and create or choose asset
-        asset_sid, asset_name = self.handle_asset(row, client_sid, finding_sid)
-        log.debug(f'After SINGLE asset call, asset list:')
-        for asset in self.assets.values():
-            log.debug(f'SID: {asset["sid"]} - Name: {asset["asset"]} - Dup num: {asset["dup_num"]} - OG SID: {asset["original_asset_sid"]}')
+        asset_id, asset_name = self.handle_asset(row, client_id, finding_id)
+        if log.is_enabled_for(logging.DEBUG):
+            log.debug(f'After SINGLE asset call, asset list:')
+            for asset in self.assets.values():
+                log.debug(f'ID: {asset.id} - Name: {asset.data["asset"]} - Dup num: {asset.dup_num} - OG ID: {asset.original_asset_id}')
 
         # if there was a header mapped to a single asset, handle the potential affected asset data for the single asset
-        if finding_sid != None and asset_sid != None:
-            self.handle_affected_asset(row, finding_sid)
+        if finding_id != None and asset_id != None:
+            self.handle_affected_asset(row, finding_id)
 
 
     def parse_data(self) -> bool:
@@ -1679,6 +2056,11 @@ class CSVParser():
         - Verify row contains finding
         - Call to process finding
         """
+        if self.mapping_plan == None:
+            self.compile_mapping_plan()
+        # templates can be updated after the parser is created i.e. setting the report template id
+        self.compile_object_factories()
+
         # get index of 'name' obj in self.data_mapping - this will be the index to point us to the finding name column in the csv
         try:
             csv_finding_title_index = self.get_index_from_key("finding_title")
@@ -1689,22 +2071,28 @@ class CSVParser():
             return False
 
         log.info(f'---Beginning CSV parsing---')
+        self.log_row_info = log.debug if self.quiet else log.info
+        metrics = None
+        if self.quiet:
+            metrics = IterationMetrics(self.csv_row_count if self.csv_row_count != None else 0, log_interval_seconds=settings.parser_progress_log_interval_seconds)
         self.parser_progress = 0
         for row in self.csv_data:
-            log.info(f'=======Parsing Finding {self.parser_progress+1}=======')
+            self.log_row_info(f'=======Parsing Finding {self.parser_progress+1}=======')
 
             # checking if current row contains a finding since the csv could have rows that extend beyond finding data
             if row[csv_finding_title_index] == "":
-                log.warning(f'Row {self.parser_progress+2} in the CSV did not have a value for the finding_title. Skipping...')
-                self.parser_progress += 1
-                continue
-            
-            vuln_name = row[csv_finding_title_index]
-            log.info(f'---{vuln_name}---')
-            self.parser_row(row)
+                self.report_issue(self.get_header_from_key('finding_title'), "missing finding title", "", f'Row {self.get_row_number()} in the data file did not have a value for the finding_title. Skipping...')
+            else:
+                vuln_name = row[csv_finding_title_index]
+                self.log_row_info(f'---{vuln_name}---')
+                self.parser_row(row)
+                self.log_row_info(f'=======End {vuln_name}=======')
 
             self.parser_progress += 1
-            log.info(f'=======End {vuln_name}=======')
+            if metrics != None:
+                progress = metrics.update_iter_metrics()
+                if progress != None:
+                    log.info(progress)
 
             # if self.parser_progess >= 150:
             #     break
@@ -1723,10 +2111,7 @@ class CSVParser():
         log.info(f'---Importing data---')
         # clients
         for client in self.clients.values():
-            payload = deepcopy(client)
-            payload.pop("assets")
-            payload.pop("reports")
-            payload.pop("sid")
+            payload = deepcopy(client.data)
             log.info(f'Creating client <{payload["name"]}>')
             
             response = api.clients.create_client(auth.base_url, auth.get_auth_headers(), payload)
@@ -1737,50 +2122,36 @@ class CSVParser():
             client_id = response.json.get("client_id")
 
             # client assets
-            for asset_sid in client['assets']:
-                asset = self.assets[asset_sid]
-                if asset['original_asset_sid'] != None:
-                    log.info(f'Found existing asset <{asset["asset"]}>')
+            for asset_record_id in client.assets:
+                asset = self.assets[asset_record_id]
+                if asset.original_asset_id != None:
+                    log.info(f'Found existing asset <{asset.data["asset"]}>')
                     # purposely not making a copy we need to update original asset list fields with new entries
-                    og_asset = self.assets[asset['original_asset_sid']]
                     # update og asset - OS, known IPs, tags, and ports
-                    self.update_asset_list_fields(og_asset, asset)
+                    og_asset = self.merge_duplicate_asset(asset)
                     # update asset that was previously created - same as creation process
-                    payload = deepcopy(og_asset)
-                    payload.pop("sid")
-                    payload.pop("client_sid")
-                    payload.pop("finding_sid")
-                    payload.pop("dup_num")
-                    payload.pop("is_multi")
+                    payload = deepcopy(og_asset.data)
                     log.info(f'Updating client asset <{payload["asset"]}>')
-                    response = api.assets.update_asset(auth.base_url, auth.get_auth_headers(), client_id, og_asset['asset_id'], payload)
+                    response = api.assets.update_asset(auth.base_url, auth.get_auth_headers(), client_id, og_asset.asset_id, payload)
                     if response.json.get("message") != "success":
                         log.warning(f'Could not update asset in PT with additional data. Skipping')
                     # update this duplicate asset to point to the same asset_id that as assigned by PT when the og asset was created
-                    asset['asset_id'] = og_asset.get('asset_id', None)
+                    asset.asset_id = og_asset.asset_id
                     continue
 
-                payload = deepcopy(asset)
-                payload.pop("sid")
-                payload.pop("client_sid")
-                payload.pop("finding_sid")
-                payload.pop("dup_num")
-                payload.pop("is_multi")
+                payload = deepcopy(asset.data)
                 log.info(f'Creating asset <{payload["asset"]}>')
                 response = api.assets.create_asset(auth.base_url, auth.get_auth_headers(), client_id, payload)
                 if response.json.get("message") != "success":
-                    asset['asset_id'] = None
+                    asset.asset_id = None
                     log.warning(f'Could not create asset. Skipping...')
                     continue
                 log.success(f'Successfully created asset!')
-                asset['asset_id'] = response.json.get("id")
+                asset.asset_id = response.json.get("id")
 
             # reports
-            for report_sid in client['reports']:
-                payload = deepcopy(self.reports[report_sid])
-                payload.pop("findings")
-                payload.pop("sid")
-                payload.pop("client_sid")
+            for report_record_id in client.reports:
+                payload = deepcopy(self.reports[report_record_id].data)
                 log.info(f'Creating report <{payload["name"]}>')
                 response = api.reports.create_report(auth.base_url, auth.get_auth_headers(), client_id, payload)
                 if response.json.get("message") != "success":
@@ -1790,14 +2161,9 @@ class CSVParser():
                 report_id = response.json.get("report_id")
 
                 # findings
-                for finding_sid in self.reports[report_sid]['findings']:
-                    finding = self.findings[finding_sid]
-                    payload = deepcopy(finding)
-                    payload.pop("assets")
-                    payload.pop("sid")
-                    payload.pop("client_sid")
-                    payload.pop("report_sid")
-                    payload.pop("affected_asset_sid")
+                for finding_record_id in self.reports[report_record_id].findings:
+                    finding = self.findings[finding_record_id]
+                    payload = deepcopy(finding.data)
                     log.info(f'Creating finding <{payload["title"]}>')
                     response = api.findings.create_finding(auth.base_url, auth.get_auth_headers(), client_id, report_id, payload)
                     if response.json.get("message") != "success":
@@ -1807,8 +2173,8 @@ class CSVParser():
                     finding_id = response.json.get("flaw_id")
 
                     # update finding with asset info
-                    if len(finding['assets']) > 0:
-                        log.info(f'Updating finding <{finding["title"]}> with asset information')
+                    if len(finding.assets) > 0:
+                        log.info(f'Updating finding <{finding.data["title"]}> with asset information')
 
                         response = api.findings.get_finding(auth.base_url, auth.get_auth_headers(), client_id, report_id, finding_id)
                         pt_finding = response.json
@@ -1818,21 +2184,21 @@ class CSVParser():
                         # - instead ideally make sure findings are created with valid data
 
                         num_assets_to_update = 0
-                        for asset_sid in finding['assets']:
-                            pt_asset_id = self.assets[asset_sid].get('asset_id', None)
+                        for asset_record_id in finding.assets:
+                            pt_asset_id = self.assets[asset_record_id].asset_id
                             if pt_asset_id == None:
-                                log.warning(f'Asset \'{self.assets[asset_sid]["asset"]}\' was not created successfully. Cannot add to finding. Skipping...')
+                                log.warning(f'Asset \'{self.assets[asset_record_id].data["asset"]}\' was not created successfully. Cannot add to finding. Skipping...')
                             else:
                                 response = api.assets.get_asset(auth.base_url, auth.get_auth_headers(), client_id, pt_asset_id)
                                 pt_asset  = response.json
-                                pt_finding = self.add_asset_to_finding(pt_finding, pt_asset, finding_sid, asset_sid)
+                                pt_finding = self.add_asset_to_finding(pt_finding, pt_asset, finding_record_id, asset_record_id)
                                 num_assets_to_update += 1
 
                         if num_assets_to_update < 1:
                             continue
                     
-                        if num_assets_to_update != len(finding['assets']):
-                            log.warning(f'Some assets cannot be adding. Adding {num_assets_to_update}/{len(finding["assets"])}')
+                        if num_assets_to_update != len(finding.assets):
+                            log.warning(f'Some assets cannot be adding. Adding {num_assets_to_update}/{len(finding.assets)}')
 
                         response = api.findings.update_finding(auth.base_url, auth.get_auth_headers(), client_id, report_id, finding_id, pt_finding)
                         if response.json.get("message") != "success":
@@ -1840,26 +2206,40 @@ class CSVParser():
                             continue
                         log.success(f'Successfully added asset(s) info to finding!')
 
-    def save_data_as_ptrac(self, folder_path="exported-ptracs", file_name=None):
+    def save_data_as_ptrac(self, folder_path="exported-ptracs", file_name=None, workers: int = 1, compress: bool = False, keep_uncompressed: bool = False, export_names: ExportNameReserver|None = None):
         """
         Creates and adds all relevant data to generate a ptrac file for each report found while parsing
+
+        Each ptrac is streamed to its file with a `PTRACWriter`, one finding at a time. The report's assets are resolved
+        before any findings are written, since the affected assets on each finding need the asset data merged from every
+        finding in the report.
+
+        Duplicate assets are merged into their original assets once, with `merge_duplicate_assets()`, before the first
+        ptrac is created. This is the only change made to the parsed records. Each asset then has the same values in every
+        ptrac, no matter the order the reports are saved in or how many times they are saved. The ptrac objects are
+        shallow projections of the parsed records with the ptrac fields added. Only values that are modified while
+        creating the ptrac are copied.
+
+        The assets of every report are resolved before any ptrac is written. The ptracs are then independent of each other
+        and can be written by a pool of worker processes.
+
+        :param folder_path: folder to save the ptracs to, defaults to "exported-ptracs"
+        :type folder_path: str, optional
+        :param file_name: file name, without extension, to save the ptrac as. When there are multiple reports the client
+        and report names are added to it. If None the file name is created from the client and report names and the
+        parser time, defaults to None
+        :type file_name: str | None, optional
+        :param workers: number of worker processes to write ptracs with, defaults to 1
+        :type workers: int, optional
+        :param compress: save the ptracs compressed with gzip, as .ptrac.gz files, defaults to False
+        :type compress: bool, optional
+        :param keep_uncompressed: when compressing, also save an uncompressed copy of each ptrac, defaults to False
+        :type keep_uncompressed: bool, optional
+        :param export_names: reserves a unique name for each ptrac, so existing files in the folder are never replaced. If
+        None the ptracs are only given unique names among themselves, replacing existing files, defaults to None
+        :type export_names: ExportNameReserver | None, optional
         """
-        ptrac_template = {
-            "report_info": {
-                "doc_type": "report"
-            },
-            "flaws_array": [],
-            "summary": {
-                "ReportAssets": {}
-            },
-            "evidence": [],
-            "client_info": {
-                "doc_type": "client",
-                "poc": "",
-                "poc_email": "",
-                "tenant_id": 0
-            }
-        }
+        global _ptrac_export_parser, _ptrac_export_jobs
 
         try:
             os.mkdir(folder_path)
@@ -1868,175 +2248,215 @@ class CSVParser():
 
         # creates and export a ptrac for each report parsed
         log.info(f'---Creating ptrac---')
-        # clients
-        for client in self.clients.values():
-            client_info = deepcopy(client)
-            client_info.pop("assets")
-            client_info.pop("reports")
-            client_info.pop("sid")
-            client_info['doc_type'] = "client"
-            client_info['tenant_id'] = 0
+        report_count = sum(len(client.reports) for client in self.clients.values())
+        jobs = [] # (file_paths, client_info, report_info, report, report_assets)
+        used_file_names = set()
+        extensions = []
+        if compress:
+            extensions.append(COMPRESSED_PTRAC_EXTENSION)
+        if not compress or keep_uncompressed:
+            extensions.append(PTRAC_EXTENSION)
+        try:
+            self.merge_duplicate_assets()
 
-            # reports
-            for report_sid in client['reports']:
-                report_assets = {} # this list is created here, but needs to be populated when looping through the affected assets
-
-                report = deepcopy(self.reports[report_sid])
-                report_info = deepcopy(report)
-                report_info.pop("findings")
-                report_info.pop("sid")
-                report_info.pop("client_sid")
-                report_info['doc_type'] = "report"
-                report_info['includeEvidence'] = False
-                report_info['reportType'] = "default"
-
-                ptrac = deepcopy(ptrac_template)
-                ptrac['client_info'] = client_info
-                ptrac['report_info'] = report_info
+            # clients
+            for client in self.clients.values():
+                client_info = {**client.data, 'doc_type': "client", 'tenant_id': 0}
 
-                # findings
-                for finding_sid in report['findings']:
-                    finding = deepcopy(self.findings[finding_sid])
-                    finding_info = deepcopy(finding)
-                    finding_info.pop("assets")
-                    finding_info.pop("sid")
-                    finding_info.pop("client_sid")
-                    finding_info.pop("report_sid")
-                    finding_info.pop("affected_asset_sid")
-
-                    # when importing data from a ptrac a finding does not go through the normal finding validation checks that are run when a finding is created
-                    # metadata
-                    finding_info['flaw_id'] = utils.generate_flaw_id(finding_info['title'])
-                    finding_info['doc_type'] = "flaw"
-                    finding_info['source'] = "plextrac"
-                    finding_info['visibility'] = "published"
-                    finding_info['doc_version'] = self.doc_version
-                    # dates
-                    if finding_info.get("createdAt") == None:
-                        finding_info['createdAt'] = self.parser_time_milliseconds
-                    if finding_info['status'] == "Closed":
-                        if finding_info.get("closedAt") == None:
-                            finding_info['closedAt'] = self.parser_time_milliseconds
+                # reports
+                for report_record_id in client.reports:
+                    report = self.reports[report_record_id]
+                    report_info = {**report.data, 'doc_type': "report", 'includeEvidence': False, 'reportType': "default"}
+
+                    report_assets = self.get_report_assets(report)
+
+                    # each report needs its own file, even when a file name is given
+                    client_report_name = f'{utils.sanitize_file_name(client.data["name"])}_{utils.sanitize_file_name(report.data["name"])}'
+                    if file_name == None:
+                        report_file_name = f'{client_report_name}_{self.parser_time}'
+                    elif report_count > 1:
+                        report_file_name = f'{file_name}_{client_report_name}'
                     else:
-                        finding_info['closedAt'] = None
-                    finding_info['last_update'] = self.parser_time_milliseconds
-                    # sev
-                    finding_info['sev'] = self.severities.index(finding_info['severity'])
-                    # assignedTo
-                    if finding_info.get("assignedTo") == None:
-                        finding_info['assignedTo'] = None
-                    # data
-                    finding_info['data'] = [
-                        finding_info['flaw_id'],
-                        finding_info['severity'],
-                        finding_info['title'],
-                        finding_info['status'],
-                        finding_info['last_update'],
-                        finding_info['assignedTo'],
-                        finding_info['createdAt'],
-                        finding_info['closedAt'],
-                        None,
-                        None,
-                        finding_info['visibility']
-                    ]
-
-                    # affected assets
-                    for asset_sid in finding['assets']:
-                        # get a copy of the asset, checking duplicates and getting the original asset
-                        asset = deepcopy(self.assets[asset_sid])
-                        asset_sid_str = f'{asset["sid"]}'
-                        if asset['original_asset_sid'] != None:
-                            og_asset = self.assets[asset['original_asset_sid']]
-                            self.update_asset_list_fields(og_asset, asset)
-                            asset = deepcopy(og_asset)
-                            asset_sid_str = f'{asset["sid"]}'
-
-
-                            # update ReportAssets og asset reference in ptrac
-
-
-                            # update og asset for the future when added to ptrac as affected asset core
-                            # update instances of og asset already saved in ptrac
-
-
-
-                            # log.info(f'Found existing asset <{asset["asset"]}>')
-                            # # purposely not making a copy we need to update original asset list fields with new entries
-                            # og_asset = self.assets[asset['original_asset_sid']]
-                            # # update og asset - OS, known IPs, tags, and ports
-                            # utils.merge_sanitized_str_lists(og_asset['operating_system'], asset['operating_system'])
-                            # utils.merge_sanitized_str_lists(og_asset['knownIps'], asset['knownIps'])
-                            # utils.merge_sanitized_str_lists(og_asset['tags'], asset['tags'])
-                            # for port_id, port_data in asset['ports'].items():
-                            #     if port_id not in og_asset['ports']:
-                            #         og_asset['ports'][port_id] = port_data
-                            # # update asset that was previously created
-                            # payload = deepcopy(og_asset)
-                            # payload.pop("sid")
-                            # payload.pop("client_sid")
-                            # payload.pop("finding_sid")
-                            # payload.pop("dup_num")
-                            # payload.pop("is_multi")
-                            # log.info(f'Updating client asset <{payload["asset"]}>')
-                            # response = api._v1.assets.update_asset(auth.base_url, auth.get_auth_headers(), client_id, og_asset['asset_id'], payload)
-                            # if response.json.get("message") != "success":
-                            #     log.warning(f'Could not update asset in PT with additional data. Skipping')
-                            # # update this duplicate asset to point to the same asset_id that as assigned by PT when the og asset was created
-                            # asset['asset_id'] = og_asset.get('asset_id', None)
-                            # continue
-
-                        # create a copy for the ReportAssets that will be modified to match ptrac specifications
-                        client_asset_info = deepcopy(asset)
-                        client_asset_info.pop("sid")
-                        client_asset_info.pop("client_sid")
-                        client_asset_info.pop("finding_sid")
-                        client_asset_info.pop("original_asset_sid")
-                        client_asset_info.pop("dup_num")
-                        client_asset_info.pop("is_multi")
-                        # when the script creates assets through the api asset's ID is saved to the asset_id property on an asset in parsed asset list. used for later deduplication
-                        # removing `asset_id` here instead of reworking the api creation section
-                        # the second parameter of None prevents the .pop from throwing an error if the asset_id was never added due to failed creation attempt
-                        client_asset_info.pop("asset_id", None)
-                        client_asset_info['id'] = asset_sid_str
-                        client_asset_info['parent_asset'] = None
-
-                        if asset_sid_str not in list(report_assets.keys()):
-                            # add client asset to ReportAssets
-                            report_assets[asset_sid_str] = client_asset_info
-                        else:
-                            # update ReportAssets reference with possible additional data
-                            existing_report_asset = report_assets[asset_sid_str]
-                            self.update_asset_list_fields(existing_report_asset, client_asset_info)
-                            # updates affected asset instances that were already saved to the ptrac with possible additional data
-                            existing_ptrac_findings = ptrac['flaws_array']
-                            findings_to_update = list(filter(lambda x: asset_sid_str in x['affected_assets'].keys(), existing_ptrac_findings))
-                            for f in findings_to_update:
-                                for asset_id, existing_affected_asset in f['affected_assets'].items():
-                                    if asset_id == asset_sid_str:
-                                        self.update_asset_list_fields(existing_affected_asset, client_asset_info, update_ports=False)
-                        
-                        # create a copy of the client asset and modify to create and add the affected asset following the ptrac schema
-                        affected_asset_info = deepcopy(client_asset_info)
-                        finding_info = self.add_asset_to_finding(finding_info, affected_asset_info, finding_sid, asset["sid"])
-
-                        # update the client asset with open ports
-                        # - the affected ported are stored on the affected asset on a finding record
-                        # - these should be backfilled to the client asset's open ports list
-                        asset_ports = report_assets.get(asset_sid_str, {}).get("ports")
-                        if asset_ports != None:
-                            for k, v in affected_asset_info['ports'].items():
-                                if k not in asset_ports.keys():
-                                    asset_ports[k] = v
-
-                    ptrac['flaws_array'].append(finding_info)
-
-                ptrac['summary']['ReportAssets'] = report_assets
+                        report_file_name = file_name
+                    if export_names != None:
+                        report_file_name = export_names.reserve(report_file_name, extensions)
+                    else:
+                        report_file_name = utils.increment_file_name(f'{report_file_name}{PTRAC_EXTENSION}', used_file_names)
+                        used_file_names.add(report_file_name)
+
+                    file_paths = [f'{folder_path}/{report_file_name}{extension}' for extension in extensions]
+
+                    jobs.append((file_paths, client_info, report_info, report, report_assets))
+
+            # save reports as ptracs
+            if workers > 1 and len(jobs) > 1 and "fork" not in multiprocessing.get_all_start_methods():
+                log.warning(f'Writing PTRACs with worker processes is not supported on this platform. Writing PTRACs one at a time')
+                workers = 1
+            start = time.perf_counter()
+            if workers > 1 and len(jobs) > 1:
+                log.info(f'Writing {len(jobs)} PTRACs with {min(workers, len(jobs))} worker processes')
+                _ptrac_export_parser = self
+                _ptrac_export_jobs = jobs
+                try:
+                    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=multiprocessing.get_context("fork")) as executor:
+                        results = list(executor.map(_write_ptrac_job, range(len(jobs))))
+                finally:
+                    _ptrac_export_parser = None
+                    _ptrac_export_jobs = None
+            else:
+                results = [self.write_ptrac(*job) for job in jobs]
+        except BaseException:
+            # remove the placeholders of reserved names that were not written, so a failed export leaves no empty ptracs
+            if export_names != None:
+                export_names.release([file_path for job in jobs for file_path in job[0]])
+            raise
+        total_time = time.perf_counter() - start
+
+        for (file_paths, client_info, report_info, report, report_assets), (write_time, unchanged_file_paths) in zip(jobs, results):
+            for file_path in unchanged_file_paths:
+                log.info(f'PTRAC \'{os.path.basename(file_path)}\' is unchanged. Kept the existing file')
+            file_names = "\', \'".join(os.path.basename(file_path) for file_path in file_paths if file_path not in unchanged_file_paths)
+            if file_names != "":
+                log.success(f'Saved new PTRAC \'{file_names}\' - {len(report.findings)} findings, {len(report_assets)} assets in {write_time:.2f}s')
+        if len(jobs) > 1:
+            log.info(f'Saved {len(jobs)} PTRACs in {total_time:.2f}s')
+
+    def write_ptrac(self, file_paths: list[str], client_info: dict, report_info: dict, report: ReportRecord, report_assets: dict) -> tuple:
+        """
+        Writes the ptrac of a report. Can be run in a worker process, since it does not modify any parsed data.
+
+        In deterministic mode the ptrac is written as canonical JSON, and existing files with the exact same content are
+        kept instead of being replaced.
+
+        :param file_paths: file paths to save the ptrac to, paths ending in .gz are compressed
+        :type file_paths: list[str]
+        :param client_info: client info of the ptrac
+        :type client_info: dict
+        :param report_info: report info of the ptrac
+        :type report_info: dict
+        :param report: report to create the ptrac for
+        :type report: ReportRecord
+        :param report_assets: ReportAssets of the report from `get_report_assets()`
+        :type report_assets: dict
+        :return: seconds taken to write the ptrac and the file paths of existing files that were unchanged
+        :rtype: tuple[float, list[str]]
+        """
+        start = time.perf_counter()
+        serializer = get_serializer(canonical=self.deterministic)
+        with PTRACWriter(file_paths, report_info, compression_level=settings.ptrac_compression_level, serializer=serializer, skip_unchanged=self.deterministic) as writer:
+            # findings
+            for finding_record_id in report.findings:
+                writer.write_flaw(self.get_ptrac_finding(finding_record_id, report_assets))
+            writer.finish(report_assets, client_info)
+        return time.perf_counter() - start, writer.unchanged_file_paths
+
+    def get_report_assets(self, report: ReportRecord) -> dict:
+        """
+        Returns the ReportAssets of a report's ptrac, keyed by asset export id.
 
-                
-                # save report as ptrac
-                if file_name == None:
-                    file_name = f'{utils.sanitize_file_name(client["name"])}_{utils.sanitize_file_name(report["name"])}_{self.parser_time}.ptrac'
-                file_path = f'{folder_path}/{file_name}.ptrac'
-                with open(f'{file_path}', 'w') as file:
-                    json.dump(ptrac, file)
-                    log.success(f'Saved new PTRAC \'{file_name}\'')
+        Duplicate assets are replaced by their original asset, and the ports found on each affected asset are backfilled
+        to the asset's open ports. Must be called after `merge_duplicate_assets()` and before creating the report's
+        findings with `get_ptrac_finding()`. Does not modify any parsed data.
+
+        Assets are looked up by export id, so the time taken is proportional to the number of times assets are referenced
+        by the report's findings, no matter how many assets the report has or how often they are shared between findings.
+
+        :param report: report to get the assets of
+        :type report: ReportRecord
+        :return: dict of asset export id to ptrac asset
+        :rtype: dict
+        """
+        report_assets = {}
+        for finding_record_id in report.findings:
+            finding = self.findings[finding_record_id]
+            for asset_record_id in finding.assets:
+                # get the asset, duplicates were already merged into the original asset
+                asset = self.assets[asset_record_id]
+                if asset.original_asset_id != None:
+                    asset = self.assets[asset.original_asset_id]
+                asset_sid_str = self.get_asset_export_id(asset.id)
+
+                report_asset = report_assets.get(asset_sid_str)
+                if report_asset == None:
+                    # create a ReportAssets entry that will be modified to match ptrac specifications
+                    # only the ports are updated with additional data, so they are the only values copied
+                    report_asset = {
+                        **asset.data,
+                        'ports': dict(asset.data['ports']),
+                        'id': asset_sid_str,
+                        'parent_asset': None
+                    }
+                    report_assets[asset_sid_str] = report_asset
+
+                # update the client asset with open ports
+                # - the affected ported are stored on the affected asset on a finding record
+                # - these should be backfilled to the client asset's open ports list
+                asset_ports = report_asset['ports']
+                for k, v in self.get_affected_asset_fields(finding_record_id, asset.id)['ports'].items():
+                    if k not in asset_ports.keys():
+                        asset_ports[k] = v
+
+        return report_assets
+
+    def get_ptrac_finding(self, finding_record_id: int, report_assets: dict) -> dict:
+        """
+        Returns a finding following the ptrac schema, with its affected assets.
+
+        :param finding_record_id: id of the finding record
+        :type finding_record_id: int
+        :param report_assets: ReportAssets of the finding's report from `get_report_assets()`
+        :type report_assets: dict
+        :return: ptrac finding
+        :rtype: dict
+        """
+        finding = self.findings[finding_record_id]
+        # affected assets are added to the finding, every other value is only replaced
+        finding_info = {**finding.data, 'affected_assets': dict(finding.data['affected_assets'])}
+
+        # when importing data from a ptrac a finding does not go through the normal finding validation checks that are run when a finding is created
+        # metadata
+        finding_info['flaw_id'] = utils.generate_flaw_id(finding_info['title'])
+        finding_info['doc_type'] = "flaw"
+        finding_info['source'] = "plextrac"
+        finding_info['visibility'] = "published"
+        finding_info['doc_version'] = self.doc_version
+        # dates
+        if finding_info.get("createdAt") == None:
+            finding_info['createdAt'] = self.parser_time_milliseconds
+        if finding_info['status'] == "Closed":
+            if finding_info.get("closedAt") == None:
+                finding_info['closedAt'] = self.parser_time_milliseconds
+        else:
+            finding_info['closedAt'] = None
+        finding_info['last_update'] = self.parser_time_milliseconds
+        # sev
+        finding_info['sev'] = self.severities.index(finding_info['severity'])
+        # assignedTo
+        if finding_info.get("assignedTo") == None:
+            finding_info['assignedTo'] = None
+        # data
+        finding_info['data'] = [
+            finding_info['flaw_id'],
+            finding_info['severity'],
+            finding_info['title'],
+            finding_info['status'],
+            finding_info['last_update'],
+            finding_info['assignedTo'],
+            finding_info['createdAt'],
+            finding_info['closedAt'],
+            None,
+            None,
+            finding_info['visibility']
+        ]
+
+        # affected assets
+        for asset_record_id in finding.assets:
+            asset = self.assets[asset_record_id]
+            if asset.original_asset_id != None:
+                asset = self.assets[asset.original_asset_id]
+            # the ReportAssets entry already has the asset data merged from every instance of the asset
+            # create a shallow copy of the client asset and modify to create and add the affected asset following the ptrac schema
+            affected_asset_info = copy(report_assets[self.get_asset_export_id(asset.id)])
+            finding_info = self.add_asset_to_finding(finding_info, affected_asset_info, finding_record_id, asset.id)
+
+        return finding_info
@@ -1,9 +1,11 @@
 from operator import itemgetter
-from typing import Union, List
+from typing import Union, List, Iterable, Iterator
+import itertools
 import yaml
 import json
 import os
-import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 import openpyxl
 
@@ -11,9 +13,12 @@ import utils.log_handler as logger
 log = logger.log
 import settings
 from utils.auth_handler import Auth
+from utils.cache_handler import ParseCache
+from utils.export_name_handler import ExportNameReserver
+from utils.xlsx_handler import XLSXSheetReader, get_xlsx_modified_time
 from csv_parser import CSVParser
 import utils.input_utils as input
-from utils.input_utils import LoadedCSVData, LoadedJSONData
+from utils.input_utils import LoadedCSVData, LoadedJSONData, LoadedXLSXData, CSVRowView
 import utils.general_utils as utils
 import api
 
@@ -24,35 +29,63 @@ import api
 predefined_csv_headers_mapping = True
 
 
-def handle_load_api_version(api_version:str, parser:CSVParser) -> None:
+class FileProcessingConfig():
     """
-    Handles prompting the user and setting the API version in the CSVParser. This is required for PTRAC generation.
+    Values determined once at the start of the script that are shared with every file processed. Must be picklable
+    since it is sent to each worker process when processing files in parallel.
+    """
+    def __init__(self, export_folder_path: str, doc_version: str, report_template_id: str|None = None, findings_template_id: str|None = None, use_cache: bool = True, quiet: bool = False, ptrac_workers: int = 1, compress_ptracs: bool = False, keep_uncompressed_ptracs: bool = False, deterministic: bool = False, export_names: ExportNameReserver|None = None):
+        self.export_folder_path = export_folder_path
+        self.doc_version = doc_version
+        self.report_template_id = report_template_id
+        self.findings_template_id = findings_template_id
+        self.use_cache = use_cache
+        self.quiet = quiet
+        self.ptrac_workers = ptrac_workers
+        self.compress_ptracs = compress_ptracs
+        self.keep_uncompressed_ptracs = keep_uncompressed_ptracs
+        self.deterministic = deterministic
+        # names of the files in the export folder, listed once. each worker process gets its own copy, reserving names is
+        # still safe since names are reserved by exclusively creating the files
+        self.export_names = export_names
+
+
+def handle_load_api_version(api_version:str) -> str:
+    """
+    Handles prompting the user for the API version that gets set in the CSVParser. This is required for PTRAC generation.
 
     :param api_version: version of Plextrac instance a generated PTRAC will be importing into
     :type api_version: str
-    :param parser: instance of CSVParser
-    :type parser: CSVParser
+    :return: validated API version
+    :rtype: str
     """
     if api_version == "":
         api_version = input.prompt_user(f'The Api Version of the PT instance you want to import a .ptrac to is required for successful generation.\nEnter the API Version of your instance. This can be found at the bottom right of the Account Admin page in PT')
     if len(api_version.split(".")) == 3:
-        parser.doc_version = api_version
-        return
+        return api_version
     else:
         if input.retry(f'The entered value {api_version} was not a valid version'):
-            return handle_load_api_version("", parser)
+            return handle_load_api_version("")
 
 
-def load_data_file(data_file_path:str = "") -> LoadedCSVData|None:
+def load_data_file(data_file_path:str = "") -> LoadedXLSXData|None:
     """
     Loads the file containing data to be imported in the script
 
     Loads and converts XLSX file into CSV like data. There is no formatting that needs to be preserved in the XLSX.
 
+    The workbook is opened in read only mode. Only the project/phase metadata rows, the vulnerability header row, and
+    the first vulnerability row are read up front into `csv`. The remaining vulnerability rows are streamed lazily from
+    the worksheet through `data` as they are consumed, so the whole sheet is never held in memory. The returned object
+    should be closed once the rows have been consumed.
+
+    If `use_native_xlsx_reader` is enabled in settings, rows are streamed directly from the worksheet XML by the
+    XLSXSheetReader. If the file cannot be read that way, openpyxl is used instead.
+
     :param data_file_path: filepath to file containing data to import, defaults to ""
     :type data_file_path: str, optional - will prompt user if filepath is not supplied
     :return: raw data loaded from file OR None value if the file could not be loaded
-    :rtype: LoadedCSVData | None
+    :rtype: LoadedXLSXData | None
     """
     if data_file_path == "":
         log.exception(f'No file path specified. Skipping...')
@@ -62,25 +95,44 @@ def load_data_file(data_file_path:str = "") -> LoadedCSVData|None:
         log.exception(f'Specified file \'{data_file_path}\' does not exist. Skipping...')
         return None
 
+    if settings.use_native_xlsx_reader:
+        workbook = None
+        try:
+            workbook = XLSXSheetReader(data_file_path)
+            rows = workbook.iter_rows()
+            # 12 metadata/header rows and the first vulnerability
+            data = [list(row) for row in itertools.islice(rows, 13)]
+
+            csv_headers = data[0] if len(data) > 0 else []
+
+            return LoadedXLSXData(file_path=data_file_path, csv=data, headers=csv_headers, data=rows, workbook=workbook, row_count=workbook.max_row)
+
+        except Exception as e:
+            if workbook != None:
+                workbook.close()
+            log.warning(f'Could not read file with native XLSX reader. Loading with openpyxl instead...\n{e}')
+
+    workbook = None
     try:
-        workbook = openpyxl.load_workbook(data_file_path, data_only=True)
+        workbook = openpyxl.load_workbook(data_file_path, read_only=True, data_only=True)
         sheet = workbook.active
 
-        data = []
-        for row in sheet.iter_rows(values_only=True):
-            data.append(list(row))
+        rows = sheet.iter_rows(values_only=True)
+        # 12 metadata/header rows and the first vulnerability
+        data = [list(row) for row in itertools.islice(rows, 13)]
 
-        csv_headers = data[0]
-        csv_data = data[1:]
+        csv_headers = data[0] if len(data) > 0 else []
 
-        return LoadedCSVData(file_path=data_file_path, csv=data, headers=csv_headers, data=csv_data)
+        return LoadedXLSXData(file_path=data_file_path, csv=data, headers=csv_headers, data=rows, workbook=workbook, row_count=sheet.max_row)
 
     except Exception as e:
+        if workbook != None:
+            workbook.close()
         log.exception(f'Error loading file. Skipping...\n{e}')
-        return None 
+        return None
 
 
-def verify_data_file(loaded_file_data:LoadedCSVData, csv_parser:CSVParser) -> bool:
+def verify_data_file(loaded_file_data:LoadedXLSXData, csv_parser:CSVParser) -> bool:
     """
     Checks that the loaded data file is valid for the script
     
@@ -91,7 +143,7 @@ def verify_data_file(loaded_file_data:LoadedCSVData, csv_parser:CSVParser) -> bo
     - file contains findings
 
     :param loaded_file_data: object of returned loaded data from `load_data_file()`
-    :type loaded_file_data: LoadedCSVData if CSV, LoadedJSONData if Json, custom object if another filetype
+    :type loaded_file_data: LoadedCSVData if CSV, LoadedJSONData if Json, LoadedXLSXData if XLSX, custom object if another filetype
     :param csv_parser: instance of CSVParser - used to validate against data mapping loaded in the `csv_headers_mapping_template` dict in the CSVParser
     :type csv_parser: CSVParser
     :return: whether the file is valid
@@ -102,35 +154,35 @@ def verify_data_file(loaded_file_data:LoadedCSVData, csv_parser:CSVParser) -> bo
         log.error(f'File does not have Project and Phase data. Is this a valid Prism Report XLSX export?')
         return False
     
-    if loaded_file_data.csv[11][0:24] != parser.get_csv_headers()[6:]:
+    if loaded_file_data.csv[11][0:24] != csv_parser.get_csv_headers()[6:]:
         log.error(f'File does not have correct Vulnerability headers. Is this a valid Prism Report XLSX export?')
         log.warning(f'Headers read from file\n{loaded_file_data.csv[11][0:24]}')
         log.warning(f'Expected headers\n{csv_parser.get_csv_headers()}')
         return False
 
-    # has findings
-    if len(loaded_file_data.data) < 13:
+    # has findings - first vulnerability row is read with the metadata rows
+    if len(loaded_file_data.csv) < 13:
         log.error(f'Did not find any findings in loaded Prism Report XLSX file')
         return False
     
     return True
     
     
-def load_parser_mappings_from_data_file(csv:List[list], parser:CSVParser) -> bool:
+def load_parser_mappings_from_data_file(headers:list, parser:CSVParser) -> bool:
     """
     There are 2 cases of loading mapping data in CSVParser based on `predefined_csv_headers_mapping`
     1) `csv_headers_mapping_template` dict in the CSVParser is empty
     2) `csv_headers_mapping_template` dict in the CSVParser is pre-populated and only needs to have indexes matched
 
     Function for case 2:
-    Data mapping will be parsed from a temp CSV file. This CSV file is generated in `create_temp_data_csv()` to emulate
+    Data mapping will be parsed from the header row of a temp CSV file. This CSV file is generated in `create_temp_data_csv()` to emulate
     the additional headers CSV file that could be used in the script
     
     For each mapping a pre-existing object in `csv_headers_mapping_template` will be updated. This method of not predefining
     the `col_index` allows the mapping to be defined in the script, but the order of columns on the CSV can still be variable.
 
-    :param csv: array with 2 arrays - 2 row generated temp CSV with headers on row 1 and mapping keys on row 2
-    :type csv: List[list] - [List[headers], List[mapping_keys]]
+    :param headers: header row of the generated temp CSV
+    :type headers: list
     :param parser: instance of CSVParser that data mapping will be loaded into
     :type parser: CSVParser
     :return: did the function update `predefined_csv_headers_mapping` objects - will still return True if some keys were invalid
@@ -138,8 +190,6 @@ def load_parser_mappings_from_data_file(csv:List[list], parser:CSVParser) -> boo
     """
     # CUSTOM updating CSVParser > csv_headers_mapping dict based on custom generated temp CSV file
     # setup JSON finding keys/headers into CSVParser > csv_headers_mapping dict
-    headers = csv[0]
-
     for index, header in enumerate(headers):
         mapping_key = parser.get_mapping_key_from_header(header)
         if mapping_key in parser.get_data_mapping_ids():
@@ -150,31 +200,33 @@ def load_parser_mappings_from_data_file(csv:List[list], parser:CSVParser) -> boo
             log.error(f'Invalid mapping key \'{mapping_key}\' for header \'{header}\'. Check csv_parser.py > csv_headers_mapping_template to correct or add. Marking as \'no_mapping\'')
             parser.csv_headers_mapping[header]["mapping_key"] = "no_mapping"
 
+    parser.compile_mapping_plan()
     log.success(f'Loaded column headings from temp CSV')
     return True
 
 
-def create_temp_data_csv(loaded_file_data:LoadedCSVData, parser:CSVParser) -> List[list]:
+def create_temp_data_csv(loaded_file_data:LoadedXLSXData, parser:CSVParser) -> Iterator[list|CSVRowView]:
     """
     To be able to handle non CSV data files, this function converts the inputted data file into
     a temp CSV that can be handled by CSVParser.
 
+    The temp CSV is generated lazily. The first row yielded is the header row, each following row is a CSVRowView
+    of the project/phase values shared by every row and the next vulnerability row streamed from the data file.
+
     TEMPLATE
     When using this script as a base template, can customize this function to create a CSV like
     list from the data file the script needs to parse.
 
     :param loaded_file_data: object of returned loaded data from `load_data_file()`
-    :type loaded_file_data: LoadedCSVData
+    :type loaded_file_data: LoadedXLSXData
     :param parser: instance of CSVParser that data will be loaded into
     :type parser: CSVParser
     :return: temp generated CSV
-    :rtype: List[list]
+    :rtype: Iterator[list | CSVRowView]
     """
-    temp_csv = []
-
     # determine temp CSV headers - client, report, finding, and asset headers
     headers = parser.get_csv_headers()
-    temp_csv.append(headers)
+    yield headers
 
     # non finding properties
     project_number = loaded_file_data.csv[2][1]
@@ -183,56 +235,43 @@ def create_temp_data_csv(loaded_file_data:LoadedCSVData, parser:CSVParser) -> Li
     end_date = loaded_file_data.csv[6][1]
     leader_tester = loaded_file_data.csv[7][1]
     phase_status = loaded_file_data.csv[8][1]
+    # shared by every row instead of being copied into each row
+    non_finding_values = (project_number, project_status, start_date, end_date, leader_tester, phase_status)
 
-    # get finding info
-    finding_only_data = loaded_file_data.csv[12:]
+    # get finding info - first finding was read with the metadata rows, the rest are streamed from the file
+    finding_only_data = itertools.chain(loaded_file_data.csv[12:], loaded_file_data.data)
     for finding in finding_only_data:
-        row = []
-
-        # add non finding properties info
-        row.append(project_number)
-        row.append(project_status)
-        row.append(start_date)
-        row.append(end_date)
-        row.append(leader_tester)
-        row.append(phase_status)
-        
-        # parse finding fields from data file
-        for value in finding:
-            row.append(value)
-
-        # add parsed list of fields to CSV
-        temp_csv.append(row)
-
-    # DEBUG - save generated CSV to file
+        # add non finding properties info in front of the finding fields from data file
+        yield CSVRowView(non_finding_values, finding)
+
+    # DEBUG - save generated CSV to file - the generator can only be consumed once, use `list()` before the parser consumes it
     # with open("temp_csv.csv",'w', newline="") as file:
     #     writer = csv.writer(file)
     #     writer.writerows(temp_csv)
-    
-    return temp_csv
 
 
-def load_data_into_parser(csv:List[list], parser:CSVParser) -> None:
+def load_data_into_parser(csv:Iterable[list], parser:CSVParser) -> None:
     """
     Loads CSV like data into the instance of the CSVParser that will parser and transform the data into a format that Plextrac can import.
 
-    CSV data file or temp generated CSV data file to import data from
+    CSV data file or temp generated CSV data file to import data from. Rows can be streamed, they are only iterated over once
+    while parsing. The header row should already be consumed by `load_parser_mappings_from_data_file()`
 
-    :param csv: CSV like data to import data from
-    :type csv: List[list]
+    :param csv: CSV like data rows, excluding the header row, to import data from
+    :type csv: Iterable[list]
     :param parser: instance of CSVParser to load data into
     :type parser: CSVParser
     """
-    parser.csv_data = csv[1:]
+    parser.csv_data = csv
     log.success(f'Loaded data into parser instance')
 
 
-def handle_add_report_template_name(report_template_name:str, parser:CSVParser) -> None:
+def handle_add_report_template_name(report_template_name:str) -> str|None:
     """
     Checks if the given the report_template_name value from the config.yaml file matches the name of an existing
-    Report Template in Plextrac. If the template exists in platform, adds this report template UUID to the template
-    for reports created with this script. The result being a Report Template is selected in the proper dropdown
-    in platform for all reports created.
+    Report Template in Plextrac. If the template exists in platform, returns this report template UUID to be added to
+    the template for reports created with this script. The result being a Report Template is selected in the proper
+    dropdown in platform for all reports created.
     """
     report_templates = []
 
@@ -246,22 +285,22 @@ def handle_add_report_template_name(report_template_name:str, parser:CSVParser)
     if len(report_templates) > 1:
         if not input.continue_anyways(f'report_template_name value \'{report_template_name}\' from config matches {len(report_templates)} Report Templates in platform. No Report Template will be added to reports.'):
             exit()
-        return
+        return None
 
     if len(report_templates) == 1:
-        parser.report_template['template'] = report_templates[0]['data']['doc_id']
-        return
+        return report_templates[0]['data']['doc_id']
     
     if not input.continue_anyways(f'report_template_name value \'{report_template_name}\' from config does not match any Report Templates in platform. No Report Template will be added to reports.'):
         exit()
+    return None
 
 
-def handle_add_findings_template_name(findings_template_name:str, parser:CSVParser) -> None:
+def handle_add_findings_template_name(findings_template_name:str) -> str|None:
     """
     Checks if the given the findings_template_name value from the config.yaml file matches the name of an existing
-    Finding Layouts in Plextrac. If the layout exists in platform, adds this findings template UUID to the template
-    for reports created with this script. The result being a Finding Layout is selected in the proper dropdown
-    in platform for all reports created.
+    Finding Layouts in Plextrac. If the layout exists in platform, returns this findings template UUID to be added to
+    the template for reports created with this script. The result being a Finding Layout is selected in the proper
+    dropdown in platform for all reports created.
     """
     findings_templates = []
 
@@ -275,20 +314,168 @@ def handle_add_findings_template_name(findings_template_name:str, parser:CSVPars
     if len(findings_templates) > 1:
         if not input.continue_anyways(f'findings_template_name value \'{findings_template_name}\' from config matches {len(findings_templates)} Finding Layouts in platform. No Findings Layout will be added to reports.'):
             exit()
-        return
+        return None
 
     if len(findings_templates) == 1:
-        parser.report_template['fields_template'] = findings_templates[0]['data']['doc_id']
-        return
+        return findings_templates[0]['data']['doc_id']
     
     if not input.continue_anyways(f'findings_template_name value \'{findings_template_name}\' from config does not match any Finding Layouts in platform. No Finding Layout will be added to reports.'):
         exit()
+    return None
+
+
+def parse_file(file_path:str, parser:CSVParser) -> bool:
+    """
+    Loads, verifies, and parses a single Prism XLSX file into the given CSVParser.
+
+    :param file_path: file path to the Prism XLSX file to parse
+    :type file_path: str
+    :param parser: instance of CSVParser to parse the data into
+    :type parser: CSVParser
+    :return: whether the file was successfully parsed
+    :rtype: bool
+    """
+    # switch 2: no header file - mapping already in parser, just need to find columns
+    loaded_file = None
+    if predefined_csv_headers_mapping:
+
+        # load file
+        loaded_file = load_data_file(file_path)
+        if loaded_file == None:
+            return False
+
+    # rows are streamed from the workbook until parsing is done, it is closed even if loading or parsing raises
+    try:
+        if predefined_csv_headers_mapping:
+            # verify file
+            if not verify_data_file(loaded_file, parser):
+                log.exception(f'Could not verify file \'{file_path}\'. Skipping')
+                return False
+
+            # create temp csv data file
+            temp_csv = create_temp_data_csv(loaded_file, parser)
+
+            # load temp CSV file headers into parser
+            load_parser_mappings_from_data_file(next(temp_csv), parser)
+
+            # load temp CSV file data into parser - rows are streamed from the file while parsing
+            load_data_into_parser(temp_csv, parser)
+            # vulnerability rows start after the 12 metadata/header rows
+            parser.csv_first_row_number = 13
+            if loaded_file.row_count != None:
+                parser.csv_row_count = max(loaded_file.row_count - 12, 0)
 
+        # parser data
+        parsed = parser.parse_data()
+    finally:
+        if loaded_file != None:
+            loaded_file.close()
+
+    if not parsed:
+        log.exception(f'Ran into error and cannot parse data. Skipping...')
+        return False
+
+    return True
+
+
+def get_data_file_time(file_path:str) -> float:
+    """
+    Returns the time to pin the parser time to in deterministic mode, so parsing the same file always creates the same
+    PTRACs. Uses the modified time saved in the XLSX's document properties, falling back to the file system's modified
+    time if the file does not have one.
+
+    :param file_path: file path to the data file
+    :type file_path: str
+    :return: time in seconds since the epoch
+    :rtype: float
+    """
+    modified_time = get_xlsx_modified_time(file_path)
+    if modified_time == None:
+        log.debug(f'File \'{file_path}\' does not have a modified time in its document properties. Using the file system\'s modified time')
+        modified_time = os.path.getmtime(file_path)
+    return modified_time
+
+
+def process_file(folder_path:str, file_name:str, config:FileProcessingConfig) -> bool:
+    """
+    Loads, parses, and saves a single Prism XLSX file as a PTRAC. Each file gets its own instance of the CSVParser
+    and does not share any state with other files, so this can run in a separate worker process.
+
+    If the file was already parsed with the same configuration in a previous run, the parsed data is loaded from the
+    parse cache instead of parsing the file again.
+
+    :param folder_path: folder containing the file, empty string if `file_name` is a full file path
+    :type folder_path: str
+    :param file_name: name of the Prism XLSX file to process
+    :type file_name: str
+    :param config: values shared with every file processed
+    :type config: FileProcessingConfig
+    :return: whether the file was successfully processed and a PTRAC was created
+    :rtype: bool
+    """
+    log.info(f'Processing file \'{file_name}\'...')
+
+    # create parser instance
+    parser = CSVParser()
+    log.info(f'---Starting data loading---')
+    parser.doc_version = config.doc_version
+    parser.quiet = config.quiet
+    parser.diagnostics.file_name = file_name
+    file_path = f'{folder_path}/{file_name}' if folder_path != "" else file_name
+    if config.deterministic and os.path.isfile(file_path):
+        parser.deterministic = True
+        parser.set_parser_time(get_data_file_time(file_path))
+    if config.report_template_id != None:
+        parser.report_template['template'] = config.report_template_id
+    if config.findings_template_id != None:
+        parser.report_template['fields_template'] = config.findings_template_id
+
+    # check for previously parsed data
+    cache = None
+    cache_key = None
+    cached_data = None
+    if config.use_cache and os.path.isfile(file_path):
+        cache = ParseCache(settings.parse_cache_folder_path, settings.parse_cache_max_size_mb)
+        cache_key = cache.get_key(file_path, parser.get_config_fingerprint())
+        cached_data = cache.get(cache_key)
+
+    if cached_data != None:
+        parser.load_parsed_data(cached_data)
+        log.success(f'File \'{file_name}\' is unchanged since it was last parsed. Loaded parsed data from cache')
+        log.info(f'The invalid values and validation cache results shown are from when the file was parsed')
+    else:
+        if not parse_file(file_path, parser):
+            return False
+        if cache != None:
+            cache.put(cache_key, parser.get_parsed_data())
+
+    # print result
+    parser.display_parser_results()
+
+    # save file
+    export_file_name = utils.split_file_extension(file_name)[0]
+    export_names = None
+    if not parser.deterministic:
+        # make sure we don't override existing files in the exported-ptracs directory. the same file always creates PTRACs
+        # with the same names in deterministic mode, which are only replaced if their content changed
+        export_names = config.export_names if config.export_names != None else ExportNameReserver(config.export_folder_path)
+    parser.save_data_as_ptrac(folder_path=config.export_folder_path, file_name=export_file_name, workers=config.ptrac_workers, compress=config.compress_ptracs, keep_uncompressed=config.keep_uncompressed_ptracs, export_names=export_names)
+    return True
 
 
 if __name__ == '__main__':
     for i in settings.script_info:
         print(i)
+
+    arg_parser = argparse.ArgumentParser(description="Parses Prism Report XLSX export files into PTRAC files that can be imported into Plextrac.")
+    arg_parser.add_argument("--workers", type=int, default=1, help="number of worker processes to parse files with. defaults to 1, processing files one at a time")
+    arg_parser.add_argument("--no-cache", action="store_true", help="parse every file, ignoring previously parsed data saved in the parse cache")
+    arg_parser.add_argument("--quiet", action="store_true", help="replace the logs for each finding parsed with periodic progress metrics")
+    arg_parser.add_argument("--ptrac-workers", type=int, default=settings.ptrac_export_workers, help=f'number of worker processes to write the PTRACs of each file with, when a file has multiple reports. defaults to {settings.ptrac_export_workers}')
+    arg_parser.add_argument("--gzip", action="store_true", default=settings.compress_ptracs, help="save PTRACs compressed with gzip, as .ptrac.gz files")
+    arg_parser.add_argument("--deterministic", action="store_true", default=settings.deterministic_ptracs, help="create the same PTRACs every time the same file is parsed, only replacing existing PTRACs that changed")
+    arg_parser.add_argument("--keep-uncompressed", action="store_true", default=settings.keep_uncompressed_ptracs, help="with --gzip, also save an uncompressed copy of each PTRAC")
+    cli_args = arg_parser.parse_args()
     
     with open("config.yaml", 'r') as f:
         args = yaml.safe_load(f)
@@ -337,75 +524,46 @@ if __name__ == '__main__':
         file_list.append((directory, file_name))
 
     log.success(f'Found {len(file_list)} file(s) to process')
-    
 
-    failed_files = []
-    for folder_path, file_name in file_list:
-        log.info(f'Processing file \'{file_name}\'...')
-
-        # create parser instance
-        parser = CSVParser()
-        log.info(f'---Starting data loading---')
-        api_version = ""
-        if args.get('api_version') != None and args.get('api_version') != "":
-            api_version = str(args.get('api_version'))
-            log.info(f'Set API Version to \'{api_version}\' from config...')
-        handle_load_api_version(api_version, parser)
-
-        # switch 2: no header file - mapping already in parser, just need to find columns
-        if predefined_csv_headers_mapping:
-
-            # load file
-            file_path = f'{folder_path}/{file_name}' if folder_path != "" else file_name
-            loaded_file = load_data_file(file_path)
-            if loaded_file == None:
-                failed_files.append(file_name)
-                continue
+    # values shared by all files - determined once here instead of for each file, since workers cannot prompt the user
+    api_version = ""
+    if args.get('api_version') != None and args.get('api_version') != "":
+        api_version = str(args.get('api_version'))
+        log.info(f'Set API Version to \'{api_version}\' from config...')
+    doc_version = handle_load_api_version(api_version)
+
+    # handle report templates
+    report_template_id = None
+    if args.get('report_template_name') != None and args.get('report_template_name') != "":
+        report_template_name = args.get('report_template_name')
+        log.info(f'Using report template \'{report_template_name}\' from config...')
+        report_template_id = handle_add_report_template_name(report_template_name)
+
+    # handle finding layouts
+    findings_template_id = None
+    if args.get('findings_layout_name') != None and args.get('findings_layout_name') != "":
+        findings_layout_name = args.get('findings_layout_name')
+        log.info(f'Using findings layout \'{findings_layout_name}\' from config...')
+        findings_template_id = handle_add_findings_template_name(findings_layout_name)
+
+    config = FileProcessingConfig(export_folder_path, doc_version, report_template_id, findings_template_id, use_cache=not cli_args.no_cache, quiet=cli_args.quiet, ptrac_workers=cli_args.ptrac_workers, compress_ptracs=cli_args.gzip, keep_uncompressed_ptracs=cli_args.keep_uncompressed, deterministic=cli_args.deterministic, export_names=ExportNameReserver(export_folder_path))
 
-            # verify file
-            if not verify_data_file(loaded_file, parser):
+    failed_files = []
+    if cli_args.workers > 1:
+        log.info(f'Processing files with {cli_args.workers} worker processes')
+        with ProcessPoolExecutor(max_workers=cli_args.workers) as executor:
+            futures = [(file_name, executor.submit(process_file, folder_path, file_name, config)) for folder_path, file_name in file_list]
+            for file_name, future in futures:
+                try:
+                    if not future.result():
+                        failed_files.append(file_name)
+                except Exception as e:
+                    log.exception(f'Error processing file \'{file_name}\'. Skipping...\n{e}')
+                    failed_files.append(file_name)
+    else:
+        for folder_path, file_name in file_list:
+            if not process_file(folder_path, file_name, config):
                 failed_files.append(file_name)
-                log.exception(f'Could not verify file \'{file_name}\'. Skipping')
-                continue
-
-            # create temp csv data file
-            temp_csv = create_temp_data_csv(loaded_file, parser)
-
-            # load temp CSV file headers into parser
-            load_parser_mappings_from_data_file(temp_csv, parser)
-
-            # load temp CSV file data into parser
-            load_data_into_parser(temp_csv, parser)
-
-        # handle report templates
-        report_template_name = ""
-        if args.get('report_template_name') != None and args.get('report_template_name') != "":
-            report_template_name = args.get('report_template_name')
-            log.info(f'Using report template \'{report_template_name}\' from config...')
-            handle_add_report_template_name(report_template_name, parser)
-
-        # handle finding layouts
-        findings_layout_name = ""
-        if args.get('findings_layout_name') != None and args.get('findings_layout_name') != "":
-            findings_layout_name = args.get('findings_layout_name')
-            log.info(f'Using findings layout \'{findings_layout_name}\' from config...')
-            handle_add_findings_template_name(findings_layout_name, parser)
-
-        # parser data
-        if not parser.parse_data():
-            log.exception(f'Ran into error and cannot parse data. Skipping...')
-            failed_files.append(file_name)
-            continue
-
-        # print result
-        parser.display_parser_results()
-
-        # save file
-        # check to make sure we don't override existing files in the exported-ptracs directory
-        existing_files = [os.path.splitext(file)[0] for file in os.listdir(export_folder_path)]
-        export_file_name = utils.increment_file_name(file_name, existing_files)
-        parser.save_data_as_ptrac(folder_path=export_folder_path, file_name=export_file_name)
-        time.sleep(1) # required to have a minimum 1 sec delay since unique file names COULD be determined by timestamp
 
     
     # end of script messaging
@@ -14,6 +14,54 @@ verify_ssl = True
 # number of retries is exceeded. set to 0 to disable retrying requests
 retries = 0
 
+# JSON SERIALIZER
+# library used to encode PTRACs and API request payloads. "auto" uses orjson if it is installed, which is faster,
+# otherwise the standard library json module. set to "json" to always use the standard library
+json_serializer = "auto"
+
+# XLSX READER
+# rows are streamed directly from the XLSX's worksheet XML instead of through openpyxl's cell objects, which is
+# significantly faster for large files. openpyxl is still used if the file cannot be read this way
+use_native_xlsx_reader = True
+
+# QUIET MODE
+# when running with --quiet, the per finding logs while parsing are replaced by progress metrics logged at this interval
+parser_progress_log_interval_seconds = 5
+
+# PARSE CACHE
+# parsed data for each file is cached, keyed by the file's content and parsing configuration. re-running the script on
+# unchanged files loads the parsed data from the cache instead of parsing the file again. use --no-cache to bypass
+parse_cache_folder_path = ".parse-cache"
+# least recently used entries are removed once the cache grows past this size
+parse_cache_max_size_mb = 2048
+
+# VALIDATION CACHE
+# validated values are cached per column so repeated values, such as severities and statuses, are only validated once
+# max number of distinct values cached for each column. set to 0 to disable the cache
+validation_cache_max_size = 1024
+
+# DIAGNOSTICS
+# invalid values are counted by column and issue type, and logged as a summary table at the end of each file
+# max number of example values and rows shown in the summary for each column and issue type
+diagnostics_max_samples = 5
+
+# PTRAC EXPORT
+# number of worker processes used to write the PTRACs of a file that has multiple reports, such as a workbook with
+# several phases. set to 1 to write PTRACs one at a time. can be overridden with --ptrac-workers
+ptrac_export_workers = 1
+# save PTRACs compressed with gzip, as .ptrac.gz files. can be enabled with --gzip
+compress_ptracs = False
+# when compressing, also save an uncompressed copy of each PTRAC. can be enabled with --keep-uncompressed
+keep_uncompressed_ptracs = False
+# gzip compression level from 1 (fastest) to 9 (smallest file)
+ptrac_compression_level = 6
+
+# DETERMINISTIC MODE
+# parsing the same file always creates byte for byte identical PTRACs with the same names. asset ids are derived from
+# the data, dates added to findings use the modified time saved in the XLSX, and PTRACs are written as canonical JSON
+# with sorted keys. existing PTRACs are only replaced if their content changed. can be enabled with --deterministic
+deterministic_ptracs = False
+
 # description of script that will be print line by line when the script is run
 script_info = ["====================================================================",
                "= Prism XLSX Import Script                                         =",
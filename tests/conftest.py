@@ -0,0 +1,85 @@
+import datetime
+import os
+import sys
+
+import openpyxl
+import pytest
+
+# tests import the script's modules the same way main.py does, relative to the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import settings
+# the logger is created when utils.log_handler is first imported, don't create a log file for every test run
+settings.save_logs_to_file = False
+
+
+PRISM_METADATA_ROWS = [
+    ("Phase Name:", "Phase"),
+    ("Project Name:", "Project"),
+    ("Project Number:", "PN-1"),
+    ("Company:", "Acme Corp"),
+    ("Project Status:", "Active"),
+    ("Start Date:", datetime.datetime(2023, 1, 5)),
+    ("End Date:", "02/10/2023"),
+    ("Lead Tester:", "Tester"),
+    ("Phase Status:", "Done"),
+    ("Scope:", "Internal"),
+    ("", "")
+]
+PRISM_HEADERS = ["#", "Company Name", "Project Name", "Phase Name", "Status", "Exploitable", "Severity Rating", "Affected Instances", "Affected Instances Count", "Vulnerability", "Confirmed At", "Summary", "Technical Details", "Recommendation", "Assigned User", "Last Comment", "Favourite Comments", "Issue Age", "Tags", "Remediated At", "CVEs", "CVSS Vector", "CVSS SCORE", "First Seen"]
+PRISM_DEFAULT_VALUES = {
+    "Company Name": "Acme Corp",
+    "Project Name": "Project",
+    "Phase Name": "Phase 1",
+    "Status": "Open",
+    "Exploitable": "No",
+    "Severity Rating": "High",
+    "Affected Instances": "10.0.0.1",
+    "Affected Instances Count": 1,
+    "Summary": "<p>Summary</p>",
+    "Technical Details": "<p>Technical details</p>",
+    "Recommendation": "<p>Recommendation</p>",
+    "CVSS Vector": "AV:N/AC:L/PR:N/UI:R/S:C/C:L/I:H/A:L",
+    "CVSS SCORE": 7.1,
+    "Remediated At": "2023-05-06",
+    "First Seen": "01/02/2023"
+}
+
+
+@pytest.fixture
+def prism_export(tmp_path):
+    """
+    Returns a function that saves a Prism XLSX export with the given vulnerabilities and returns its file path. Each
+    vulnerability is a dict of column header to value, columns that are not given use `PRISM_DEFAULT_VALUES`. The first
+    vulnerability is on row 13 of the sheet, after the metadata and header rows.
+    """
+    def create(vulnerabilities: list, file_name: str = "export.xlsx") -> str:
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        for row in PRISM_METADATA_ROWS:
+            sheet.append(list(row))
+        sheet.append(PRISM_HEADERS)
+        for index, vulnerability in enumerate(vulnerabilities):
+            values = {**PRISM_DEFAULT_VALUES, "#": index + 1, "Vulnerability": f'Vulnerability {index}', **vulnerability}
+            sheet.append([values.get(header) for header in PRISM_HEADERS])
+        file_path = str(tmp_path / file_name)
+        workbook.save(file_path)
+        return file_path
+    return create
+
+
+@pytest.fixture
+def parse_prism_export():
+    """
+    Returns a function that parses a Prism XLSX export the same way `main.process_file()` does, returning the parser.
+    """
+    import main
+    from csv_parser import CSVParser
+
+    def parse(file_path: str) -> CSVParser:
+        parser = CSVParser()
+        parser.doc_version = "2.6.0"
+        parser.quiet = True
+        assert main.parse_file(file_path, parser)
+        return parser
+    return parse
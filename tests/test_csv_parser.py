@@ -0,0 +1,79 @@
+from csv_parser import CSVParser
+
+
+def test_issues_are_reported_with_xlsx_rows(prism_export, parse_prism_export):
+    # vulnerabilities start on row 13 of the sheet, after the metadata and header rows
+    file_path = prism_export([
+        {},
+        {"Severity Rating": "Nope"},
+        {},
+        {"Severity Rating": "Nope", "CVSS Vector": "junk"}
+    ])
+    parser = parse_prism_export(file_path)
+
+    issues = parser.diagnostics.issues
+    assert issues[("Severity Rating", "invalid severity")]['count'] == 2
+    # only the first row of each distinct value is kept as a sample
+    assert issues[("Severity Rating", "invalid severity")]['samples'] == [(14, "Nope")]
+    assert issues[("CVSS Vector", "invalid CVSS vector")]['samples'] == [(16, "junk")]
+    assert len(issues) == 2
+
+
+def test_config_fingerprint_does_not_depend_on_the_parser_date():
+    today = CSVParser()
+    tomorrow = CSVParser()
+    tomorrow.set_parser_time(today.parser_time_seconds + 24*60*60)
+    assert today.client_template['name'] != tomorrow.client_template['name']
+    assert today.get_config_fingerprint() == tomorrow.get_config_fingerprint()
+
+    # names that are not derived from the parser time are still part of the fingerprint
+    tomorrow.report_template['name'] = "Custom Report"
+    assert today.get_config_fingerprint() != tomorrow.get_config_fingerprint()
+
+
+def test_config_fingerprint_includes_the_pinned_parser_time_in_deterministic_mode():
+    parsers = [CSVParser(), CSVParser()]
+    for i, parser in enumerate(parsers):
+        parser.deterministic = True
+        parser.set_parser_time(1700000000 + i*24*60*60)
+    assert parsers[0].get_config_fingerprint() != parsers[1].get_config_fingerprint()
+
+
+def test_duplicate_assets_are_merged_into_their_original_asset():
+    from csv_parser import AssetRecord
+
+    parser = CSVParser()
+    original = AssetRecord(1, 1, 1, None, False, 1, parser.create_asset())
+    original.data.update({'asset': "host", 'knownIps': ["10.0.0.1"], 'ports': {"80": {"number": "80"}}})
+    parser.assets[original.id] = original
+    for i in range(2, 6):
+        duplicate = AssetRecord(i, 1, i, original.id, False, i, parser.create_asset())
+        duplicate.data.update({'asset': "host", 'knownIps': [f'10.0.0.{i % 3}'], 'tags': ["custom_csv_import", f'tag_{i % 2}'], 'ports': {str(i % 2): {"number": str(i % 2)}}})
+        parser.assets[duplicate.id] = duplicate
+        assert parser.merge_duplicate_asset(duplicate) is original
+
+    assert original.data['knownIps'] == ["10.0.0.1", "10.0.0.2", "10.0.0.0"]
+    assert original.data['tags'] == ["custom_csv_import", "tag_0", "tag_1"]
+    assert list(original.data['ports']) == ["80", "0", "1"]
+    assert original.list_values == {field: set(original.data[field]) for field in ("operating_system", "knownIps", "tags")}
+
+
+def test_saving_ptracs_only_merges_duplicate_assets_once(prism_export, parse_prism_export, tmp_path):
+    import pickle
+
+    file_path = prism_export([
+        {"Phase Name": "Phase 1", "Affected Instances": "10.0.0.1, 10.0.0.2"},
+        {"Phase Name": "Phase 2", "Affected Instances": "10.0.0.2"},
+        {"Phase Name": "Phase 1", "Affected Instances": "10.0.0.1"}
+    ])
+    parser = parse_prism_export(file_path)
+    parser.merge_duplicate_assets()
+    records = pickle.dumps(parser.get_parsed_data())
+
+    # creating the ptracs does not modify the records
+    parser.save_data_as_ptrac(folder_path=str(tmp_path / "first"), file_name="export")
+    assert pickle.dumps(parser.get_parsed_data()) == records
+    parser.save_data_as_ptrac(folder_path=str(tmp_path / "second"), file_name="export")
+    assert pickle.dumps(parser.get_parsed_data()) == records
+    for file_path in (tmp_path / "first").iterdir():
+        assert (tmp_path / "second" / file_path.name).read_bytes() == file_path.read_bytes()
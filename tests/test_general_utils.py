@@ -0,0 +1,101 @@
+import datetime
+from copy import deepcopy
+
+import pytest
+
+import utils.general_utils as utils
+from csv_parser import CSVParser
+
+
+def get_mutable_ids(value) -> set:
+    """
+    Returns the ids of every mutable object in a value, including the value itself
+    """
+    ids = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            ids.add(id(item))
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, set, tuple)):
+            if not isinstance(item, tuple):
+                ids.add(id(item))
+            stack.extend(item)
+        elif not isinstance(item, utils.IMMUTABLE_TEMPLATE_TYPES):
+            ids.add(id(item))
+    return ids
+
+
+PARSER_TEMPLATES = ["client_template", "report_template", "finding_template", "asset_template", "affected_asset_fields"]
+
+@pytest.mark.parametrize("template_name", PARSER_TEMPLATES)
+def test_template_factory_matches_deepcopy(template_name):
+    template = getattr(CSVParser(), template_name)
+    factory = utils.create_template_factory(template)
+
+    first = factory()
+    second = factory()
+    assert first == deepcopy(template)
+    assert second == first
+    assert get_mutable_ids(first).isdisjoint(get_mutable_ids(template))
+    assert get_mutable_ids(first).isdisjoint(get_mutable_ids(second))
+
+
+@pytest.mark.parametrize("factory_name, template_name", [
+    ("create_client", "client_template"),
+    ("create_report", "report_template"),
+    ("create_finding", "finding_template"),
+    ("create_asset", "asset_template"),
+    ("create_affected_asset_fields", "affected_asset_fields")
+])
+def test_parser_factories_match_templates(factory_name, template_name):
+    parser = CSVParser()
+    parser.report_template['template'] = "template id" # templates changed before parsing, e.g. from the config
+    parser.compile_object_factories()
+
+    template = getattr(parser, template_name)
+    created = getattr(parser, factory_name)()
+    assert created == deepcopy(template)
+    assert get_mutable_ids(created).isdisjoint(get_mutable_ids(template))
+
+
+def test_template_factory_copies_other_values():
+    template = {
+        "set": {"a", "b"},
+        "tuple": (1, [2]),
+        "date": datetime.date(2023, 1, 5),
+        "nested": [{"list": [[]]}, "text", 1.5, None, True],
+        1: "non str key"
+    }
+    created = utils.create_template_factory(template)()
+    assert created == deepcopy(template)
+    assert get_mutable_ids(created).isdisjoint(get_mutable_ids(template))
+
+
+def test_template_factory_ignores_later_template_changes():
+    template = {"tags": ["a"]}
+    factory = utils.create_template_factory(template)
+    template["tags"].append("b")
+    template["name"] = "changed"
+    assert factory() == {"tags": ["a"]}
+
+
+def test_merging_with_a_shared_set_keeps_the_order_and_skips_duplicates():
+    values = ["a", "b"]
+    existing_values = set(values)
+    for new_values in (["b", "c"], ["a", "d", "c"], ["e"]):
+        utils.merge_sanitized_str_lists(values, new_values, existing_values)
+    assert values == ["a", "b", "c", "d", "e"]
+    assert existing_values == set(values)
+
+
+def test_adding_tags_with_a_shared_set_formats_and_skips_duplicates():
+    tags = ["custom_csv_import"]
+    existing_tags = set(tags)
+    utils.add_tag(tags, "Web App", existing_tags)
+    utils.add_tags(tags, ["web-app", "Internal", "custom_csv_import"], existing_tags)
+    utils.add_tag(tags, "internal", existing_tags)
+    assert tags == ["custom_csv_import", "web_app", "internal"]
+    assert existing_tags == set(tags)
@@ -0,0 +1,23 @@
+import pytest
+
+from utils.input_utils import CSVRowView
+
+
+def test_csv_row_view_indexes_like_a_list():
+    shared_values = ("a", "b")
+    row = ("c", "d", "e")
+    view = CSVRowView(shared_values, row)
+    expected = list(shared_values + row)
+
+    assert len(view) == len(expected)
+    assert list(view) == expected
+    for index in range(-len(expected), len(expected)):
+        assert view[index] == expected[index]
+    assert view[1:4] == expected[1:4]
+
+
+@pytest.mark.parametrize("index", [5, 6, -6, -7, -100])
+def test_csv_row_view_raises_index_error_out_of_range(index):
+    view = CSVRowView(("a", "b"), ("c", "d", "e"))
+    with pytest.raises(IndexError):
+        view[index]
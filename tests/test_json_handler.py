@@ -0,0 +1,99 @@
+import dataclasses
+import datetime
+import enum
+import json
+import os
+import uuid
+
+import pytest
+
+import settings
+import utils.json_handler as json_handler
+from utils.json_handler import JSONSerializer, OrjsonSerializer, CanonicalJSONSerializer
+
+orjson = pytest.importorskip("orjson")
+
+
+def canonical(encoded: bytes) -> bytes:
+    # reencoded with sorted keys and the same whitespace and escaping, so semantically equal JSON is byte for byte equal
+    return json.dumps(json.loads(encoded), sort_keys=True).encode('utf-8')
+
+
+def test_orjson_ptracs_match_json(prism_export, parse_prism_export, tmp_path, monkeypatch):
+    file_path = prism_export([
+        {"Vulnerability": "Cross-Site Scripting (XSS) – Café", "Affected Instances": "10.0.0.1:443, 10.0.0.2", "Tags": "web, Tag A", "CVEs": "CVE-2021-1234"},
+        {"Vulnerability": "日本語 finding", "Affected Instances": "10.0.0.1:8080", "CVSS SCORE": 9.8, "Issue Age": 12},
+        {"Phase Name": "Phase 2", "Confirmed At": "03/04/2023", "Remediated At": "2023-05-06", "Status": "Closed"}
+    ])
+    parser = parse_prism_export(file_path)
+
+    ptracs = {}
+    for serializer in ["json", "orjson"]:
+        monkeypatch.setattr(settings, "json_serializer", serializer)
+        monkeypatch.setattr(json_handler, "_serializer", None)
+        folder_path = tmp_path / serializer
+        parser.save_data_as_ptrac(folder_path=str(folder_path), file_name="export")
+        ptracs[serializer] = {file_name: (folder_path / file_name).read_bytes() for file_name in os.listdir(folder_path)}
+
+    assert len(ptracs["json"]) == 2
+    assert ptracs["orjson"].keys() == ptracs["json"].keys()
+    for file_name, encoded in ptracs["json"].items():
+        assert canonical(ptracs["orjson"][file_name]) == canonical(encoded)
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+class Level(enum.IntEnum):
+    HIGH = 3
+
+class Name(str):
+    pass
+
+@dataclasses.dataclass
+class Point:
+    x: int
+
+
+# values orjson encodes differently than the standard library, or encodes where the standard library raises
+STDLIB_ONLY_VALUES = [
+    float("nan"),
+    float("inf"),
+    {"score": float("-inf")},
+    [1.0, {"nested": [float("nan")]}],
+    {float("nan"): 1},
+    datetime.datetime(2023, 3, 4, 12, 0),
+    {"Confirmed At": datetime.date(2023, 3, 4)},
+    datetime.time(12, 0),
+    uuid.UUID(int=1),
+    {uuid.UUID(int=1): "key"},
+    Point(1),
+    Color.RED,
+    Level.HIGH,
+    {"name": Name("subclass of str")},
+    2 ** 70,
+    {"id": 2 ** 64}
+]
+
+@pytest.mark.parametrize("value", STDLIB_ONLY_VALUES, ids=repr)
+def test_orjson_encodes_like_json(value):
+    try:
+        expected = JSONSerializer().dumps(value)
+    except Exception as e:
+        with pytest.raises(type(e)):
+            OrjsonSerializer().dumps(value)
+        return
+    assert OrjsonSerializer().dumps(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    {"ports": {443: {"number": 443, "protocol": "tcp"}}, "tags": ["a", "b"], "score": 7.5, "open": True, "closedAt": None},
+    [{"title": "Café – 日本語"}, 1, 2.5, False, None],
+    ("tuple", 1),
+    "string",
+    1.5e300
+], ids=repr)
+def test_serializers_are_semantically_identical(value):
+    expected = canonical(JSONSerializer().dumps(value))
+    assert canonical(OrjsonSerializer().dumps(value)) == expected
+    assert canonical(CanonicalJSONSerializer().dumps(value)) == expected
@@ -0,0 +1,40 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from utils.log_handler import LogFormatHandler
+
+
+_log = None # handler used by the worker processes, inherited when they are forked
+
+def _log_from_worker(index: int) -> int:
+    for line in range(20):
+        _log.info(f'worker {index} line {line}')
+    return os.getpid()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="requires the fork start method")
+def test_forked_workers_write_each_line_once(tmp_path, monkeypatch):
+    global _log
+    monkeypatch.chdir(tmp_path)
+    _log = LogFormatHandler(logging.CRITICAL, logging.INFO, output_to_file=True)
+    try:
+        # still buffered by the file handler when the workers are forked
+        for line in range(50):
+            _log.info(f'parent line {line}')
+        with ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context("fork")) as executor:
+            list(executor.map(_log_from_worker, range(6)))
+        _log.info('parent done')
+    finally:
+        _log.stop()
+        logging.getLogger().removeHandler(_log.queue_handler)
+
+    with open(tmp_path / _log.LOGS_FILE_PATH) as file:
+        messages = [line.split(" ", 2)[2].rstrip("\n") for line in file]
+    expected = [f'[INFO] parent line {line}' for line in range(50)]
+    expected += [f'[INFO] worker {index} line {line}' for index in range(6) for line in range(20)]
+    expected.append('[INFO] parent done')
+    assert sorted(messages) == sorted(expected)
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import main
+import settings
+from csv_parser import CSVParser
+
+
+@pytest.mark.parametrize("use_native_xlsx_reader", [True, False])
+def test_workbook_is_closed_when_parsing_raises(prism_export, monkeypatch, use_native_xlsx_reader):
+    monkeypatch.setattr(settings, "use_native_xlsx_reader", use_native_xlsx_reader)
+    loaded_files = []
+    def load_data_file(file_path):
+        loaded_files.append(real_load_data_file(file_path))
+        return loaded_files[-1]
+    real_load_data_file = main.load_data_file
+    monkeypatch.setattr(main, "load_data_file", load_data_file)
+    def parse_data(self):
+        raise ValueError("bad row")
+    monkeypatch.setattr(CSVParser, "parse_data", parse_data)
+
+    parser = CSVParser()
+    parser.doc_version = "2.6.0"
+    with pytest.raises(ValueError):
+        main.parse_file(prism_export([{}]), parser)
+    assert loaded_files[0].workbook == None
+
+
+def test_openpyxl_workbook_is_closed_when_reading_rows_raises(prism_export, monkeypatch):
+    monkeypatch.setattr(settings, "use_native_xlsx_reader", False)
+    workbooks = []
+    class Workbook():
+        def __init__(self, *args, **kwargs):
+            self.closed = False
+            self.active = self
+            workbooks.append(self)
+        def iter_rows(self, **kwargs):
+            raise ValueError("bad sheet XML")
+        def close(self):
+            self.closed = True
+    monkeypatch.setattr(main.openpyxl, "load_workbook", Workbook)
+
+    assert main.load_data_file(prism_export([{}])) == None
+    assert workbooks[0].closed
+
+
+def test_cached_parse_keeps_the_invalid_values_and_validation_cache_stats(prism_export, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "parse_cache_folder_path", str(tmp_path / "cache"))
+    parsers = []
+    class RecordedCSVParser(CSVParser):
+        def __init__(self):
+            super().__init__()
+            parsers.append(self)
+    monkeypatch.setattr(main, "CSVParser", RecordedCSVParser)
+
+    file_path = prism_export([{"Severity Rating": "Nope"}, {}, {"CVSS Vector": "junk"}])
+    (tmp_path / "exported-ptracs").mkdir()
+    config = main.FileProcessingConfig(str(tmp_path / "exported-ptracs"), "2.6.0", quiet=True)
+    assert main.process_file(str(tmp_path), os.path.basename(file_path), config)
+    assert main.process_file(str(tmp_path), os.path.basename(file_path), config)
+
+    parsed, cached = parsers
+    assert cached.parser_progress == None # loaded from the cache instead of parsed
+    assert len(parsed.diagnostics.issues) == 2
+    assert cached.diagnostics.issues == parsed.diagnostics.issues
+    assert cached.get_validation_cache_stats() == parsed.get_validation_cache_stats()
+    assert sum(stats['hits'] for stats in cached.get_validation_cache_stats().values()) > 0
@@ -0,0 +1,181 @@
+import os
+import pickle
+import time
+from hashlib import sha256
+
+import utils.log_handler as logger
+log = logger.log
+
+
+class ParseCache():
+    """
+    A class to handle an on disk cache of parsed data, keyed by the content of the parsed file.
+
+    Entries are keyed by a hash of the file's content combined with a fingerprint of the configuration the file was parsed
+    with. Changing either the file or the configuration results in a different key, so stale entries are never used. The
+    cache is bounded in size, evicting the least recently used entries once the total size of the cache is exceeded.
+
+    Writes are atomic, so the same cache folder can be used by multiple worker processes at once.
+    """
+    # bump when the structure of the cached parsed data changes to invalidate all existing entries
+    CACHE_VERSION = 4
+    ENTRY_EXTENSION = ".pickle"
+
+    def __init__(self, folder_path: str, max_size_mb: int):
+        """
+        :param folder_path: folder to store the cache entries in. Will be created if it does not exist
+        :type folder_path: str
+        :param max_size_mb: max total size of all cache entries, in megabytes
+        :type max_size_mb: int
+        """
+        self.folder_path = folder_path
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        os.makedirs(self.folder_path, exist_ok=True)
+
+    def get_key(self, file_path: str, fingerprint: str) -> str:
+        """
+        Creates the cache key for a file. The file is read in chunks so large files are never fully loaded into memory.
+
+        :param file_path: file path to the file being parsed
+        :type file_path: str
+        :param fingerprint: value representing the configuration the file is parsed with
+        :type fingerprint: str
+        :return: hex digest that identifies the file's content and configuration
+        :rtype: str
+        """
+        file_hash = sha256()
+        file_hash.update(f'{self.CACHE_VERSION}:{fingerprint}:'.encode('utf-8'))
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.folder_path, f'{key}{self.ENTRY_EXTENSION}')
+
+    def get(self, key: str):
+        """
+        Returns the cached data for a key, or None if there is no entry for the key or the entry could not be loaded.
+
+        :param key: key from `get_key()`
+        :type key: str
+        """
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, 'rb') as file:
+                data = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f'Could not load cache entry \'{entry_path}\'. Ignoring...\n{e}')
+            return None
+
+        # mark entry as recently used for eviction
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data) -> None:
+        """
+        Saves data to the cache, then evicts the least recently used entries if the cache is over its size limit.
+
+        :param key: key from `get_key()`
+        :type key: str
+        :param data: picklable data to cache
+        """
+        entry_path = self._get_entry_path(key)
+        temp_path = f'{entry_path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except Exception as e:
+            log.warning(f'Could not save cache entry \'{entry_path}\'. Ignoring...\n{e}')
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the total size of the cache is under the size limit.
+        """
+        entries = []
+        total_size = 0
+        for file_name in os.listdir(self.folder_path):
+            if not file_name.endswith(self.ENTRY_EXTENSION):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.folder_path, file_name))
+            except FileNotFoundError: # removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+            total_size += stat.st_size
+
+        entries.sort()
+        for mtime, size, file_name in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.folder_path, file_name))
+                log.debug(f'Evicted cache entry \'{file_name}\', last used {time.ctime(mtime)}')
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+class ValidationCache():
+    """
+    A class to handle a bounded in memory cache of validated values for one column.
+
+    Columns such as severity or status only have a few distinct values, so validating each value once and reusing the
+    result removes almost all of the validation cost for these columns. Only valid results are cached, so invalid values
+    are still validated, and reported, every time they appear. Once the cache is full the oldest entry is evicted.
+    """
+    _MISSING = object()
+
+    def __init__(self, validator, max_size: int):
+        """
+        :param validator: function taking (header, value) and returning the validated value
+        :type validator: Callable[[str, Any], Any]
+        :param max_size: max number of distinct values to keep cached
+        :type max_size: int
+        """
+        self.validator = validator
+        self.max_size = max_size
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def validate(self, header: str, value):
+        """
+        Returns the validated value, from the cache if the value was validated before.
+        Has the same signature as the validator, so it can be used in place of it.
+        """
+        # values that are equal but of different types i.e. 1, 1.0 and True can validate differently
+        try:
+            key = (type(value), value)
+            result = self.values.get(key, self._MISSING)
+        except TypeError: # unhashable value
+            return self.validator(header, value)
+        if result is not self._MISSING:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = self.validator(header, value)
+        if result == None or result == "":
+            return result
+        if len(self.values) >= self.max_size:
+            del self.values[next(iter(self.values))]
+        self.values[key] = result
+        return result
+
+    def get_hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
@@ -0,0 +1,68 @@
+import utils.log_handler as logger
+log = logger.log
+
+
+class Diagnostics():
+    """
+    A class to aggregate issues found with the values in a data file, instead of logging a line for every invalid value.
+
+    Issues are counted by the header of the column and the type of issue, keeping a limited number of distinct example values
+    and the first row they were found in. The details of each issue are only logged at DEBUG. A summary table of all issues should
+    be logged with `display_summary()` once the file is parsed.
+    """
+    def __init__(self, file_name: str|None = None, max_samples: int = 5):
+        """
+        :param file_name: name of the data file the issues are found in, shown in the summary, defaults to None
+        :type file_name: str | None, optional
+        :param max_samples: max number of example values kept for each header and issue type, defaults to 5
+        :type max_samples: int, optional
+        """
+        self.file_name = file_name
+        self.max_samples = max_samples
+        self.issues = {} # (header, issue type) -> {'count': int, 'samples': [(row, value)]}
+
+    def add_issue(self, header: str, issue_type: str, value, row: int|None, message: str) -> None:
+        """
+        Records an issue with a value.
+
+        :param header: header of the column the value is in
+        :type header: str
+        :param issue_type: short description of the issue, used to group issues i.e. "invalid date"
+        :type issue_type: str
+        :param value: the value with the issue
+        :param row: row number the value is in, if known
+        :type row: int | None
+        :param message: full description of the issue, logged at DEBUG
+        :type message: str
+        """
+        issue = self.issues.get((header, issue_type))
+        if issue == None:
+            issue = {'count': 0, 'samples': []}
+            self.issues[(header, issue_type)] = issue
+        issue['count'] += 1
+        # keep the first row of each distinct value, the same invalid value is often repeated in every row
+        samples = issue['samples']
+        if len(samples) < self.max_samples and all(sample_value != value for _, sample_value in samples):
+            samples.append((row, value))
+        log.debug(message)
+
+    def get_issue_count(self) -> int:
+        return sum(issue['count'] for issue in self.issues.values())
+
+    def display_summary(self) -> None:
+        """
+        Logs a table of the number of issues for each header and issue type, with example values
+        """
+        if len(self.issues) == 0:
+            return
+
+        rows = [("Count", "Header", "Issue", "Examples (row: value)")]
+        for (header, issue_type), issue in sorted(self.issues.items(), key=lambda x: x[1]['count'], reverse=True):
+            samples = ", ".join(f'{row if row != None else "?"}: "{value}"' for row, value in issue['samples'])
+            rows.append((str(issue['count']), str(header), issue_type, samples))
+
+        widths = [max(len(row[i]) for row in rows) for i in range(3)]
+        lines = [f'{row[0].rjust(widths[0])} | {row[1].ljust(widths[1])} | {row[2].ljust(widths[2])} | {row[3]}' for row in rows]
+        file_name = f' in \'{self.file_name}\'' if self.file_name != None else ""
+        table = "\n".join(lines)
+        log.warning(f'Found {self.get_issue_count()} invalid value(s){file_name}. These values were skipped. Set the log level to DEBUG for details of each value\n{table}')
@@ -0,0 +1,80 @@
+import os
+
+import utils.log_handler as logger
+log = logger.log
+import utils.general_utils as utils
+
+
+class ExportNameReserver():
+    """
+    A class to hand out unique names for the files saved to an export folder.
+
+    The folder is listed once and the names already taken are kept in memory, so finding a free name does not rescan the
+    folder for every file. A name is reserved by creating its files with exclusive creation, which fails if the file
+    already exists. This makes reserving atomic, so worker processes that each have their own copy of the reserver, or
+    another run of the script, can never be given the same name. The reserved files are empty placeholders that are
+    replaced once the actual file is written.
+
+    Names are incremented the same way as `utils.increment_file_name()`, "name", "name (1)", "name (2)"...
+    """
+    def __init__(self, folder_path: str):
+        """
+        :param folder_path: folder the files are saved to. Must exist
+        :type folder_path: str
+        """
+        self.folder_path = folder_path
+        # names without extension, a name is taken if a file with any extension uses it
+        self.taken_names = set(utils.split_file_extension(file_name)[0] for file_name in os.listdir(folder_path))
+        self.next_counts = {} # name -> count to start incrementing the name from, every lower count is taken
+
+    def _create_files(self, name: str, extensions: list[str]) -> bool:
+        created_file_paths = []
+        try:
+            for extension in extensions:
+                file_path = f'{self.folder_path}/{name}{extension}'
+                os.close(os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                created_file_paths.append(file_path)
+        except FileExistsError:
+            for file_path in created_file_paths:
+                os.remove(file_path)
+            return False
+        return True
+
+    def reserve(self, name: str, extensions: list[str]) -> str:
+        """
+        Reserves the first free name, starting with the name given, and creates an empty file for each extension.
+
+        :param name: file name, without extension
+        :type name: str
+        :param extensions: extensions of the files that will be saved with the name, e.g. [".ptrac"]
+        :type extensions: list[str]
+        :return: reserved file name, without extension
+        :rtype: str
+        """
+        count = self.next_counts.get(name, 0)
+        while True:
+            reserved_name = name if count == 0 else f'{name} ({count})'
+            count += 1
+            if reserved_name in self.taken_names:
+                continue
+            # taken either way, by this reservation or by a file created since the folder was listed
+            self.taken_names.add(reserved_name)
+            if self._create_files(reserved_name, extensions):
+                self.next_counts[name] = count
+                return reserved_name
+            log.debug(f'File name \'{reserved_name}\' was taken by another process. Trying the next name')
+
+    def release(self, file_paths: list[str]) -> None:
+        """
+        Removes the placeholder files of reserved names that were never written, e.g. when saving failed. Files that
+        were written are kept.
+
+        :param file_paths: file paths of the reserved files
+        :type file_paths: list[str]
+        """
+        for file_path in file_paths:
+            try:
+                if os.path.getsize(file_path) == 0:
+                    os.remove(file_path)
+            except OSError:
+                pass
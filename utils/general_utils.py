@@ -1,7 +1,9 @@
 import re
 import time
+from datetime import date
+from functools import lru_cache
 from hashlib import sha256
-from typing import List
+from typing import Callable, List
 from copy import copy, deepcopy
 import os
 
@@ -9,6 +11,18 @@ import utils.log_handler as logger
 log = logger.log
 
 
+# patterns are compiled once, these are used for every value of the related columns
+KEY_SEPARATOR_PATTERN = re.compile(r'[ -]')
+KEY_INVALID_CHAR_PATTERN = re.compile(r'[\W]')
+IPV4_PATTERN = re.compile(r'^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$')
+IPV6_PATTERN = re.compile(r'^(([0-9a-fA-F]{1,4}):){7}([0-9a-fA-F]{1,4})$')
+CVE_PATTERN = re.compile(r'CVE-[0-9]{4}-[0-9]')
+CWE_PATTERN = re.compile(r'CWE-[0-9]')
+CWE_NUMBER_PATTERN = re.compile(r'[0-9]')
+CVSS3_1_VECTOR_PATTERN = re.compile(r"^((AV:[NALP]|AC:[LH]|PR:[NLH]|UI:[NR]|S:[UC]|[CIA]:[NLH]|E:[XUPFH]|RL:[XOTWU]|RC:[XURC]|[CIA]R:[XLMH]|MAV:[XNALP]|MAC:[XLH]|MPR:[XNLH]|MUI:[XNR]|MS:[XUC]|M[CIA]:[XNLH])/)*(AV:[NALP]|AC:[LH]|PR:[NLH]|UI:[NR]|S:[UC]|[CIA]:[NLH]|E:[XUPFH]|RL:[XOTWU]|RC:[XURC]|[CIA]R:[XLMH]|MAV:[XNALP]|MAC:[XLH]|MPR:[XNLH]|MUI:[XNR]|MS:[XUC]|M[CIA]:[XNLH])$")
+
+
+@lru_cache(maxsize=4096)
 def format_key(string: str) -> str:
     """
     PT keys and tags should be lowercase alphanumeric strings, including (a-z), (0-9), and underscores (_)
@@ -23,10 +37,10 @@ def format_key(string: str) -> str:
     :rtype: str
     """
     new_str = string.strip().lower()
-    return re.sub('[\W]', '', re.sub('[ -]', '_', new_str))
+    return KEY_INVALID_CHAR_PATTERN.sub('', KEY_SEPARATOR_PATTERN.sub('_', new_str))
 
 
-def add_tag(list: List[str], tag: str) -> None:
+def add_tag(list: List[str], tag: str, existing_tags: set|None = None) -> None:
     """
     Adds a tag to a list if the tag is not already in the list
 
@@ -34,13 +48,36 @@ def add_tag(list: List[str], tag: str) -> None:
     :type list: List[str]
     :param tag: tag to add to list
     :type tag: str
+    :param existing_tags: set of the tags in the list, updated with the added tag. Pass the same set when adding to a list
+    several times, so the list is never scanned. If None a set is created from the list, defaults to None
+    :type existing_tags: set | None, optional
     """
-    new_tag = format_key(tag)
-    if new_tag not in list:
-        list.append(new_tag)
+    add_tags(list, [tag], existing_tags=existing_tags)
+
 
+def add_tags(list: List[str], tags: List[str], existing_tags: set|None = None) -> None:
+    """
+    Adds multiple tags to a list, skipping tags that are already in the list. Membership is checked with a set of the
+    tags in the list, keeping the order of the list
 
-def merge_sanitized_str_lists(list1: List[str], list2: List[str]) -> None:
+    :param list: list to add tags to
+    :type list: List[str]
+    :param tags: tags to add to list
+    :type tags: List[str]
+    :param existing_tags: set of the tags in the list, updated with the added tags. Pass the same set when adding to a
+    list several times, so the list is never scanned. If None a set is created from the list, defaults to None
+    :type existing_tags: set | None, optional
+    """
+    if existing_tags == None:
+        existing_tags = set(list)
+    for tag in tags:
+        new_tag = format_key(tag)
+        if new_tag not in existing_tags:
+            existing_tags.add(new_tag)
+            list.append(new_tag)
+
+
+def merge_sanitized_str_lists(list1: List[str], list2: List[str], existing_values: set|None = None) -> None:
     """
     Appends the new values from a second list into the first list
 
@@ -48,10 +85,20 @@ def merge_sanitized_str_lists(list1: List[str], list2: List[str]) -> None:
     :type list1: List[str]
     :param list2: List of values to append if they don't already exist
     :type list2: List[str]
+    :param existing_values: set of the values in list1, updated with the appended values. Pass the same set when merging
+    into list1 several times, so each merge only takes time proportional to list2. If None a set is created from list1,
+    defaults to None
+    :type existing_values: set | None, optional
     """
-    resulting_list = list1
-    resulting_list.extend(x for x in list2 if x not in resulting_list)
+    if existing_values == None:
+        existing_values = set(list1)
+    for value in list2:
+        if value not in existing_values:
+            existing_values.add(value)
+            list1.append(value)
+
 
+ACCEPTED_DATE_FORMATS = ['%m/%d/%Y', '%m-%d-%Y', '%m/%d/%y', '%m-%d-%y', '%Y/%m/%d', '%Y-%m-%d', '%m/%d/%Y %I:%M:%S %p']
 
 def try_parsing_date(possible_date_str: str) -> time.struct_time:
     """
@@ -64,13 +111,55 @@ def try_parsing_date(possible_date_str: str) -> time.struct_time:
     :rtype: time.struct_time
     """
     error = None
-    accepted_data_formats = ['%m/%d/%Y', '%m-%d-%Y', '%m/%d/%y', '%m-%d-%y', '%Y/%m/%d', '%Y-%m-%d', '%m/%d/%Y %I:%M:%S %p']
-    for fmt in accepted_data_formats:
+    for fmt in ACCEPTED_DATE_FORMATS:
         try:
             return time.strptime(possible_date_str, fmt)
         except ValueError as e:
             error = e
-    raise ValueError(f'Could not parse date from list of accepted formats: {accepted_data_formats}') from error
+    raise ValueError(f'Could not parse date from list of accepted formats: {ACCEPTED_DATE_FORMATS}') from error
+
+
+class DateConverter():
+    """
+    Converts date values from a single column to Python time module's struct_time.
+
+    Date and datetime values, from cells formatted as dates, are converted directly. Other values are parsed as strings
+    using the accepted date formats. The format that last parsed successfully is tried first, since the dates in a column
+    almost always share a format. The accepted formats never match the same string, so the order they are tried in does
+    not change the result.
+    """
+    def __init__(self):
+        self.last_format = None
+
+    def to_struct_time(self, value) -> time.struct_time:
+        """
+        :param value: date, datetime, or date string to convert
+        :return: converted date
+        :rtype: time.struct_time
+        :raises ValueError: if the value is a string that does not match any of the accepted date formats
+        """
+        if isinstance(value, date): # includes datetime
+            return value.timetuple()
+
+        value = str(value)
+        if self.last_format != None:
+            try:
+                return time.strptime(value, self.last_format)
+            except ValueError:
+                pass
+
+        error = None
+        for fmt in ACCEPTED_DATE_FORMATS:
+            if fmt == self.last_format:
+                continue
+            try:
+                raw_date = time.strptime(value, fmt)
+            except ValueError as e:
+                error = e
+                continue
+            self.last_format = fmt
+            return raw_date
+        raise ValueError(f'Could not parse date from list of accepted formats: {ACCEPTED_DATE_FORMATS}') from error
 
 
 def is_int(value: str) -> bool:
@@ -117,8 +206,7 @@ def is_valid_ipv4_address(address: str) -> bool:
     :return: boolean result of validation
     :rtype: bool
     """
-    ipv4_pattern = re.compile(r'^(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])$')
-    return ipv4_pattern.match(address) is not None
+    return IPV4_PATTERN.match(address) is not None
 
 
 def is_valid_ipv6_address(address: str) -> bool:
@@ -130,8 +218,7 @@ def is_valid_ipv6_address(address: str) -> bool:
     :return: boolean result of validation
     :rtype: bool
     """
-    ipv6_pattern = re.compile(r'^(([0-9a-fA-F]{1,4}):){7}([0-9a-fA-F]{1,4})$')
-    return ipv6_pattern.match(address) is not None
+    return IPV6_PATTERN.match(address) is not None
 
 
 def is_valid_cve(cve: str) -> bool:
@@ -143,8 +230,7 @@ def is_valid_cve(cve: str) -> bool:
     :return: boolean result of validation
     :rtype: bool
     """
-    cve_pattern = re.compile(r'CVE-[0-9]{4}-[0-9]')
-    return cve_pattern.match(cve) is not None
+    return CVE_PATTERN.match(cve) is not None
 
 
 def is_valid_cwe(cwe: str, has_prefix: bool = True) -> bool:
@@ -163,12 +249,45 @@ def is_valid_cwe(cwe: str, has_prefix: bool = True) -> bool:
     :rtype: bool
     """
     if has_prefix:
-        cwe_pattern = re.compile(r'CWE-[0-9]')
-        return cwe_pattern.match(cwe) is not None
+        return CWE_PATTERN.match(cwe) is not None
     else:
-        cwe_num = re.compile(r'[0-9]')
-        return cwe_num.match(cwe) is not None
-    
+        return CWE_NUMBER_PATTERN.match(cwe) is not None
+
+
+@lru_cache(maxsize=4096)
+def parse_cve(cve: str) -> tuple|None:
+    """
+    Parses a CVE formatted as `CVE-2023-1234` into its year and id.
+
+    :param cve: cve string to parse, without surrounding whitespace
+    :type cve: str
+    :raises ValueError: cve starts with a valid format, but the year or id are not numbers
+    :return: tuple of (year, id), or None if the cve is not valid
+    :rtype: tuple[int, int]|None
+    """
+    if not is_valid_cve(cve):
+        return None
+    values = cve.split("-")
+    return int(values[1]), int(values[2])
+
+
+@lru_cache(maxsize=4096)
+def parse_cwe(cwe: str) -> tuple|None:
+    """
+    Parses a CWE formatted as `CWE-1234` or `1234` into its number.
+
+    :param cwe: cwe string to parse, without surrounding whitespace
+    :type cwe: str
+    :raises ValueError: cwe starts with a valid format, but is not a number
+    :return: tuple of (number as str, number as int), or None if the cwe is not valid
+    :rtype: tuple[str, int]|None
+    """
+    if not (is_valid_cwe(cwe) or is_valid_cwe(cwe, has_prefix=False)):
+        return None
+    if cwe.startswith("CWE"):
+        cwe = cwe[4:]
+    return cwe, int(cwe)
+
 
 def is_valid_cvss3_1_vector(cvss_vector: str) -> bool:
     """
@@ -179,8 +298,7 @@ def is_valid_cvss3_1_vector(cvss_vector: str) -> bool:
     :return: boolean result of validation
     :rtype: bool
     """
-    pattern = re.compile(r"^((AV:[NALP]|AC:[LH]|PR:[NLH]|UI:[NR]|S:[UC]|[CIA]:[NLH]|E:[XUPFH]|RL:[XOTWU]|RC:[XURC]|[CIA]R:[XLMH]|MAV:[XNALP]|MAC:[XLH]|MPR:[XNLH]|MUI:[XNR]|MS:[XUC]|M[CIA]:[XNLH])/)*(AV:[NALP]|AC:[LH]|PR:[NLH]|UI:[NR]|S:[UC]|[CIA]:[NLH]|E:[XUPFH]|RL:[XOTWU]|RC:[XURC]|[CIA]R:[XLMH]|MAV:[XNALP]|MAC:[XLH]|MPR:[XNLH]|MUI:[XNR]|MS:[XUC]|M[CIA]:[XNLH])$") 
-    return pattern.match(cvss_vector) is not None
+    return CVSS3_1_VECTOR_PATTERN.match(cvss_vector) is not None
 
 
 def sanitize_file_name(name:str, allow_spaces: bool = False) -> str:
@@ -206,6 +324,7 @@ def sanitize_file_name(name:str, allow_spaces: bool = False) -> str:
     return new_name
 
 
+@lru_cache(maxsize=4096)
 def generate_flaw_id(title: str) -> int:
     """
     In PT the flaw_id is generated based on a hash of the finding title. This finding_id is used for finding deduplication,
@@ -219,11 +338,75 @@ def generate_flaw_id(title: str) -> int:
     return int(sha256(title.encode('utf-8')).hexdigest(), 16) % 10 ** 8
     
 
+IMMUTABLE_TEMPLATE_TYPES = (str, int, float, bool, type(None))
+
+def _create_template_copier(value) -> Callable[[], object]|None:
+    """
+    Returns a function that creates a new copy of a template value, or None if the value is immutable and can be shared
+    between copies. Dicts and lists are shallow copied with their mutable items replaced by new copies, any other value
+    is deep copied.
+    """
+    if isinstance(value, (dict, list)):
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        item_copiers = [(key, copier) for key, item in items if (copier := _create_template_copier(item)) != None]
+        # shallow copy of the template, so later changes to the template are not reflected. copies keep the order of the
+        # template's keys, since the mutable items are replaced in place
+        shared = dict(value) if isinstance(value, dict) else list(value)
+        if len(item_copiers) == 0:
+            return shared.copy
+
+        def copy_container():
+            new_value = shared.copy()
+            for key, copier in item_copiers:
+                new_value[key] = copier()
+            return new_value
+        return copy_container
+
+    if type(value) in IMMUTABLE_TEMPLATE_TYPES:
+        return None
+    shared = deepcopy(value)
+    return lambda: deepcopy(shared)
+
+
+def create_template_factory(template: dict) -> Callable[[], dict]:
+    """
+    Creates a function that returns a new copy of the template, equal to `deepcopy(template)`.
+
+    The nested dicts and lists are planned once, so creating an object only copies the containers and skips the values
+    that can be shared, instead of going through the generic deepcopy machinery. Changes made to the template after the
+    factory is created are not reflected.
+
+    :param template: dict of JSON like data to create copies of
+    :type template: dict
+    :return: function that takes no arguments and returns a new copy of the template
+    :rtype: Callable[[], dict]
+    """
+    return _create_template_copier(template)
+
+
+# extensions made up of multiple parts, that `os.path.splitext()` would only return the last part of
+MULTI_PART_EXTENSIONS = (".ptrac.gz",)
+
+def split_file_extension(file_name: str) -> tuple:
+    """
+    Splits a file name into the name and extension, keeping multi part extensions like ".ptrac.gz" together.
+
+    :param file_name: file name to split
+    :type file_name: str
+    :return: (name, extension)
+    :rtype: tuple[str, str]
+    """
+    for extension in MULTI_PART_EXTENSIONS:
+        if file_name.endswith(extension) and len(file_name) > len(extension):
+            return file_name[:-len(extension)], extension
+    return os.path.splitext(file_name)
+
+
 def increment_file_name(file_name, existing_files):
     """
     return the file name without extension
     """
-    base_name, extension = os.path.splitext(file_name)
+    base_name, extension = split_file_extension(file_name)
     if base_name in existing_files:
         count = 1
         while f"{base_name} ({count})" in existing_files:
@@ -1,14 +1,22 @@
 import os
 import json
 import csv
-from typing import List
+from typing import List, Iterator
+
+import utils.log_handler as logger
+log = logger.log
 
 prompt_prefix = "\n[Prompt] "
 prompt_suffix = ": "
 
+# logs are written in the background, make sure they are printed before prompting the user
+def user_input(prompt: str) -> str:
+    log.flush()
+    return input(prompt)
+
 # prompts user for data not needing validation
 def prompt_user(msg):
-    return input(prompt_prefix + msg + prompt_suffix)
+    return user_input(prompt_prefix + msg + prompt_suffix)
 
 
 def user_options(msg: str, retry_msg: str ="", options: List[str] = []) -> str:
@@ -31,7 +39,7 @@ def user_options(msg: str, retry_msg: str ="", options: List[str] = []) -> str:
     str_options = str_options[0:-1]
     
     #get input
-    entered = input(prompt_prefix + msg + " (" + str_options + ")" + prompt_suffix)
+    entered = user_input(prompt_prefix + msg + " (" + str_options + ")" + prompt_suffix)
     
     #validate input
     if entered in options:
@@ -69,7 +77,7 @@ def user_list(msg: str, retry_msg: str = "", range: int = 0) -> int:
     str_options = "1-" + str(range)
     
     #get input
-    entered = input(prompt_prefix + msg + " (" + str_options + ")" + prompt_suffix)
+    entered = user_input(prompt_prefix + msg + " (" + str_options + ")" + prompt_suffix)
     
     #validate input
     if int(entered) > 0 and int(entered) <= range:
@@ -91,7 +99,7 @@ def continue_check(msg: str) -> bool:
     :return: True if user types "y" else False
     :rtype: bool
     """    
-    entered = input(prompt_prefix + msg + " Continue? (y/n)" + prompt_suffix)
+    entered = user_input(prompt_prefix + msg + " Continue? (y/n)" + prompt_suffix)
     if entered == 'y':
         return True
     else:
@@ -108,7 +116,7 @@ def continue_anyways(msg: str) -> bool:
     :return: True if user types "y" else False
     :rtype: bool
     """    
-    entered = input(prompt_prefix + msg + " Continue Anyways? (y/n)" + prompt_suffix)
+    entered = user_input(prompt_prefix + msg + " Continue Anyways? (y/n)" + prompt_suffix)
     if entered == 'y':
         return True
     else:
@@ -125,7 +133,7 @@ def retry(msg: str) -> bool:
     :return: True if user wants to retry otherwise the the script will exit
     :rtype: bool
     """    
-    entered = input(prompt_prefix + msg + " Try Again? (y/n)" + prompt_suffix)
+    entered = user_input(prompt_prefix + msg + " Try Again? (y/n)" + prompt_suffix)
     if entered == 'y':
         return True
     else:
@@ -233,3 +241,53 @@ def load_csv_data(msg: str, csv_file_path: str = "") -> LoadedCSVData:
     except Exception as e:
         if retry(f'Error loading file: {e}'):
             return load_csv_data(msg)
+
+
+class LoadedXLSXData():
+    def __init__(self, file_path: str, csv: List[list], headers: list, data: Iterator[tuple], workbook = None, row_count: int|None = None):
+        self.file_path = file_path
+        self.csv = csv
+        self.headers = headers
+        self.data = data
+        self.workbook = workbook
+        self.row_count = row_count # number of rows in the sheet, if known from the sheet's dimension
+
+    def close(self) -> None:
+        """
+        Closes the workbook the rows in `data` are being streamed from. Read only workbooks keep the file open until closed.
+        """
+        if self.workbook != None:
+            self.workbook.close()
+            self.workbook = None
+
+
+class CSVRowView():
+    """
+    A read only view of a CSV row made up of values shared by every row, followed by the values of a row from a data file.
+
+    Acts like the list `shared_values + row` when indexed, without copying either into a new list.
+    """
+    __slots__ = ('shared_values', 'row', 'shared_len')
+
+    def __init__(self, shared_values: tuple, row: tuple):
+        self.shared_values = shared_values
+        self.row = row
+        self.shared_len = len(shared_values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError("CSV row index out of range")
+        if index < self.shared_len:
+            return self.shared_values[index]
+        return self.row[index - self.shared_len]
+
+    def __len__(self) -> int:
+        return self.shared_len + len(self.row)
+
+    def __iter__(self):
+        yield from self.shared_values
+        yield from self.row
@@ -0,0 +1,145 @@
+import json
+from math import isfinite
+
+try:
+    import orjson
+except ImportError: # optional, the standard library is used if not installed
+    orjson = None
+
+import settings
+import utils.log_handler as logger
+log = logger.log
+
+
+class JSONSerializer():
+    """
+    Encodes values as JSON with the standard library `json` module. Base class of the other JSON serializers.
+
+    Values are encoded to UTF-8 bytes, so the encoded JSON can be written to a binary file or sent as a request body.
+    """
+    name = "json"
+    # whether dict keys are sorted, so the same values are always encoded the same way
+    sort_keys = False
+
+    def dumps(self, value) -> bytes:
+        """
+        :param value: value to encode as JSON
+        :return: JSON encoded as UTF-8
+        :rtype: bytes
+        """
+        return json.dumps(value).encode('utf-8')
+
+
+def _is_plain_json(value) -> bool:
+    """
+    Checks that a value only contains dicts, lists, tuples, strings, ints, finite floats, bools and None, the values
+    orjson encodes the same as the standard library. Only containers are pushed to the stack, since most values are
+    strings.
+    """
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        item_type = type(item)
+        if item_type is dict:
+            for key in item:
+                key_type = type(key)
+                if key_type is str or key_type is int or key_type is bool or key is None:
+                    continue
+                if key_type is float and isfinite(key):
+                    continue
+                return False
+            children = item.values()
+        elif item_type is list or item_type is tuple:
+            children = item
+        else:
+            children = (item,)
+        for child in children:
+            child_type = type(child)
+            if child_type is str or child is None or child_type is int or child_type is bool:
+                continue
+            if child_type is dict or child_type is list or child_type is tuple:
+                stack.append(child)
+            elif child_type is float:
+                if not isfinite(child):
+                    return False
+            else:
+                return False
+    return True
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    Encodes values as JSON with `orjson`, which is faster than the standard library.
+
+    The JSON is semantically the same as the standard library's, but not byte for byte: there is no whitespace between
+    values and non ASCII characters are not escaped. Values the standard library would encode differently, or can't
+    encode, are encoded with the standard library instead, so switching serializers never changes the PTRACs' content or
+    which values fail to encode. This includes NaN and infinite floats, that orjson encodes as null, and types orjson
+    encodes natively, such as datetimes, UUIDs and dataclasses.
+    """
+    name = "orjson"
+
+    def __init__(self):
+        # dict keys that are not strings, such as the port numbers of assets, are converted to strings like `json` does.
+        # types orjson encodes natively and `json` can't are passed through, so orjson raises instead of encoding them
+        self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+    def dumps(self, value) -> bytes:
+        # types without a passthrough option, like UUIDs, and non finite floats are only found by checking the value
+        if not _is_plain_json(value):
+            return super().dumps(value)
+        try:
+            return orjson.dumps(value, option=self.options)
+        except TypeError: # orjson.JSONEncodeError, e.g. integers larger than 64 bits
+            return super().dumps(value)
+
+
+class CanonicalJSONSerializer(JSONSerializer):
+    """
+    Encodes values as canonical JSON with the standard library, with all dict keys sorted. Equal values are always
+    encoded to the same bytes, no matter the order their keys were added in or which libraries are installed.
+    """
+    name = "canonical"
+    sort_keys = True
+
+    def dumps(self, value) -> bytes:
+        return json.dumps(value, sort_keys=True).encode('utf-8')
+
+
+SERIALIZERS = {
+    JSONSerializer.name: JSONSerializer,
+    OrjsonSerializer.name: OrjsonSerializer
+}
+
+_serializer = None
+_canonical_serializer = CanonicalJSONSerializer()
+
+def get_serializer(canonical: bool = False) -> JSONSerializer:
+    """
+    Returns the JSON serializer set by `settings.json_serializer`. "auto" uses orjson if it is installed, otherwise the
+    standard library.
+
+    :param canonical: return the serializer creating canonical JSON instead, ignoring the setting, defaults to False
+    :type canonical: bool, optional
+    :return: JSON serializer shared by everything encoding JSON
+    :rtype: JSONSerializer
+    """
+    global _serializer
+    if canonical:
+        return _canonical_serializer
+    if _serializer != None:
+        return _serializer
+
+    name = settings.json_serializer
+    if name == "auto":
+        name = OrjsonSerializer.name if orjson != None else JSONSerializer.name
+    elif name == OrjsonSerializer.name and orjson == None:
+        log.warning(f'JSON serializer \'orjson\' is not installed. Using the standard library json module')
+        name = JSONSerializer.name
+    elif name not in SERIALIZERS:
+        log.warning(f'Unknown JSON serializer \'{name}\'. Must be one of {["auto"] + list(SERIALIZERS.keys())}. Using the standard library json module')
+        name = JSONSerializer.name
+
+    _serializer = SERIALIZERS[name]()
+    log.debug(f'Using JSON serializer \'{_serializer.name}\'')
+    return _serializer
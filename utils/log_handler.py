@@ -1,7 +1,11 @@
 import time
+import atexit
 import logging
+import logging.handlers
+import multiprocessing.util
 import os
 os.system("")  # enables ansi escape characters in windows terminals
+import queue
 import re
 
 import settings
@@ -16,12 +20,14 @@ class IterationMetrics:
     """
     A class to handle printing time based metric logs when doing iterative operations.
     """
-    def __init__(self, iterations: int):
+    def __init__(self, iterations: int, log_interval_seconds: float = 0):
         """
         Create an IterationMetrics object to track elapsed time for an interation operation
 
         :param iterations: number of iteration that will be preformed. Used to calculate an estimated time remaining
         :type iterations: int
+        :param log_interval_seconds: min time between metrics returned by `update_iter_metrics()`, defaults to 0
+        :type log_interval_seconds: float, optional
         """
         self.max_iterations = iterations
         self.curr_iteration = 0
@@ -30,6 +36,8 @@ class IterationMetrics:
         self.total_time = 0
         self.avg_time = 0
         self.time_remaining = self.avg_time * (self.max_iterations - (self.curr_iteration+1))
+        self.log_interval_seconds = log_interval_seconds
+        self.last_log_time = self.start_time
 
     def print_iter_metrics(self) -> str:
         curr_time = time.time()
@@ -42,6 +50,25 @@ class IterationMetrics:
         self.last_time = curr_time
         return f'METRICS: ({self.curr_iteration}/{self.max_iterations}) Completed in {round(iter_time, 1)} sec(s) - Total time: {round(self.total_time/60, 1)} min(s) - Est. Time Remaining: {round(self.time_remaining/60, 1)} min(s)'        
 
+    def update_iter_metrics(self) -> str|None:
+        """
+        Records a completed iteration. Returns metrics for all iterations since the last returned metrics if
+        `log_interval_seconds` has passed since then, or if this is the last iteration. Otherwise returns None.
+
+        Used for throttled progress logs when iterations are too quick to log each one.
+        """
+        self.curr_iteration += 1
+        curr_time = time.time()
+        if curr_time - self.last_log_time < self.log_interval_seconds and self.curr_iteration != self.max_iterations:
+            return None
+
+        self.last_log_time = curr_time
+        self.last_time = curr_time
+        self.total_time = curr_time - self.start_time
+        self.avg_time = self.total_time/self.curr_iteration
+        self.time_remaining = self.avg_time * max(self.max_iterations - self.curr_iteration, 0)
+        return f'METRICS: ({self.curr_iteration}/{self.max_iterations}) {round(1/self.avg_time) if self.avg_time > 0 else self.curr_iteration} per sec - Total time: {round(self.total_time/60, 1)} min(s) - Est. Time Remaining: {round(self.time_remaining/60, 1)} min(s)'
+
 
 class ColorPrint:
     def print_red(message):
@@ -67,65 +94,218 @@ class ColorPrint:
 
 
 
+class ColorFormatter(logging.Formatter):
+    """
+    A class to add the font color of a record's log level to the message when printing to an ANSI terminal
+    """
+    def formatMessage(self, record):
+        color = getattr(record, 'color', None)
+        if color == None:
+            return super().formatMessage(record)
+        message = record.message
+        record.message = color(message)
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.message = message
+
+
+
 class TermEscapeCodeFormatter(logging.Formatter):
     """
     A class to strip the color escape codes when printing to non ANSI terminals, like a text file
     """
+    ESCAPE_CODE_PATTERN = re.compile(r'\x1b\[[0-9;]*m')
+
     def __init__(self, fmt=None, datefmt=None, style='%', validate=True):
         super().__init__(fmt, datefmt, style, validate)
 
     def format(self, record):
-        escape_re = re.compile(r'\x1b\[[0-9;]*m')
-        record.msg = re.sub(escape_re, "", str(record.msg))
-        return super().format(record)
+        formatted = super().format(record)
+        if "\x1b" not in formatted:
+            return formatted
+        return self.ESCAPE_CODE_PATTERN.sub("", formatted)
+
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    A class to write logs to a file without flushing after every record. The file is flushed for critical messages and
+    when the handler is closed
+
+    Must be flushed before the process is forked, otherwise the forked process inherits the unflushed buffer and writes
+    it to the file a second time.
+    """
+    def reopen_after_fork(self) -> None:
+        """
+        Replaces the stream inherited from the parent process with a new stream, with an empty buffer, on the same open
+        file. The file offset stays shared with the parent and other forked processes, so their writes don't overwrite
+        each other.
+        """
+        if self.stream is None:
+            return
+        inherited_stream = self.stream
+        self.stream = open(os.dup(inherited_stream.fileno()), "a", encoding=inherited_stream.encoding, errors=inherited_stream.errors)
+        # the buffer was flushed before forking, so closing writes nothing
+        inherited_stream.close()
+    def emit(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.CRITICAL:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    A class to pass log records to the background log writer as they are, so all formatting is done by the writer thread
+    """
+    def prepare(self, record):
+        return record
 
 
 
 class LogFormatHandler():
     """
     A class to act as an interface to the python logger and handle adding font colors depending on log level
+
+    Messages can be passed as a function that returns the message. The function is only called if the message will be
+    logged, so expensive messages cost nothing when their level is disabled. Use `is_enabled_for()` to skip work that
+    is only done to log something.
     """
     def __init__(self, stream_level, file_level=logging.WARN, output_to_file=False):
+        # lowest level any handler outputs, messages below this level are skipped before creating a log record
+        self.level = min(stream_level, file_level) if output_to_file else stream_level
         self.LOGS_FILE_PATH = f'logs_{time.strftime("%Y_%m_%d_%H_%M_%S", time.localtime(time.time()))}.txt'
 
         lger = logging.getLogger()
         lger.setLevel(logging.DEBUG) # do not change - logging level set individually below
 
+        # records are written to the terminal and file by a background thread, so logging does not wait on either
+        self.handlers = []
+
         stdo = logging.StreamHandler()
         stdo.setLevel(stream_level)
-        fmer = logging.Formatter('%(asctime)s %(message)s')
+        fmer = ColorFormatter('%(asctime)s %(message)s')
         stdo.setFormatter(fmer)
-        lger.addHandler(stdo)
+        self.handlers.append(stdo)
 
         if output_to_file:
-            fhdr = logging.FileHandler(self.LOGS_FILE_PATH, "w")
+            fhdr = BufferedFileHandler(self.LOGS_FILE_PATH, "w")
             fhdr.setLevel(file_level)
             cfmer = TermEscapeCodeFormatter('%(asctime)s %(message)s')
             fhdr.setFormatter(cfmer)
-            lger.addHandler(fhdr)
+            self.handlers.append(fhdr)
 
+        self.queue_handler = BackgroundQueueHandler(queue.SimpleQueue())
+        lger.addHandler(self.queue_handler)
         self.logger = lger
 
+        self.listener = None
+        self._listener_stopped_for_fork = False
+        self._start_listener()
+        atexit.register(self.stop)
+        # threads are not copied into forked processes, i.e. workers processing files in parallel. the listener is stopped
+        # before forking, so every queued record is written and flushed by the parent and the workers start with nothing
+        # left to write
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(before=self._before_fork, after_in_parent=self._after_fork_in_parent, after_in_child=self._after_fork_in_child)
+        # multiprocessing child processes exit without running atexit functions
+        multiprocessing.util.register_after_fork(self, LogFormatHandler._stop_on_process_exit)
+
+    def _start_listener(self) -> None:
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def _before_fork(self) -> None:
+        self._listener_stopped_for_fork = self.listener != None
+        self.stop()
+
+    def _after_fork_in_parent(self) -> None:
+        # records logged by other threads while forking are still on the queue and written by the restarted listener
+        if self._listener_stopped_for_fork:
+            self._start_listener()
+
+    def _after_fork_in_child(self) -> None:
+        # the queue could have been in use by another thread of the parent when forking
+        self.queue_handler.queue = queue.SimpleQueue()
+        for handler in self.handlers:
+            if isinstance(handler, BufferedFileHandler):
+                handler.reopen_after_fork()
+        if self._listener_stopped_for_fork:
+            self._start_listener()
+
+    def _stop_on_process_exit(self) -> None:
+        multiprocessing.util.Finalize(None, self.stop, exitpriority=0)
+
+    def flush(self) -> None:
+        """
+        Waits until all queued records are written. Use before printing to the terminal outside of logging, i.e. prompts.
+        """
+        if self.listener == None:
+            return
+        self.stop()
+        self._start_listener()
+
+    def stop(self) -> None:
+        """
+        Writes all queued records and flushes the log file. Called automatically when the script exits.
+        """
+        if self.listener == None:
+            return
+        self.listener.stop()
+        self.listener = None
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError): # the stream can already be closed when exiting, same as `logging.shutdown()`
+                pass
+
+    def is_enabled_for(self, level: int) -> bool:
+        return level >= self.level
+
+    def _get_message(self, message):
+        return message() if callable(message) else message
+
+    # colors are added by the terminal handler's formatter, so they don't have to be stripped from the log file
     def debug(self, message):
-        self.logger.debug(ColorPrint.print_purple(f'[DEBUG] {message}'))
+        if self.level > logging.DEBUG:
+            return
+        self.logger.debug(f'[DEBUG] {self._get_message(message)}', extra={'color': ColorPrint.print_purple})
 
     def info(self, message):
-        self.logger.info(ColorPrint.print_blue(f'[INFO] {message}'))
+        if self.level > logging.INFO:
+            return
+        self.logger.info(f'[INFO] {self._get_message(message)}', extra={'color': ColorPrint.print_blue})
 
     def success(self, message):
-        self.logger.info(ColorPrint.print_green(f'[SUCCESS] {message}'))
+        if self.level > logging.INFO:
+            return
+        self.logger.info(f'[SUCCESS] {self._get_message(message)}', extra={'color': ColorPrint.print_green})
 
     def warning(self, message):
-        self.logger.warning(ColorPrint.print_yellow(f'[WARNING] {message}'))
+        if self.level > logging.WARNING:
+            return
+        self.logger.warning(f'[WARNING] {self._get_message(message)}', extra={'color': ColorPrint.print_yellow})
 
     def error(self, message):
-        self.logger.error(ColorPrint.print_red(f'[ERROR] {message}'))
+        if self.level > logging.ERROR:
+            return
+        self.logger.error(f'[ERROR] {self._get_message(message)}', extra={'color': ColorPrint.print_red})
 
     def critical(self, message):
-        self.logger.critical(ColorPrint.print_red(f'[CRITICAL] {message}'))
+        self.logger.critical(f'[CRITICAL] {self._get_message(message)}', extra={'color': ColorPrint.print_red})
 
     def exception(self, message):
-        self.logger.exception(ColorPrint.print_yellow(f'[EXCEPTION] {message}'))
+        if self.level > logging.ERROR:
+            return
+        self.logger.exception(f'[EXCEPTION] {self._get_message(message)}', extra={'color': ColorPrint.print_yellow})
 
 
 
@@ -0,0 +1,193 @@
+import filecmp
+import gzip
+import io
+import os
+
+import utils.log_handler as logger
+log = logger.log
+from utils.json_handler import JSONSerializer, get_serializer
+
+
+PTRAC_EXTENSION = ".ptrac"
+COMPRESSED_PTRAC_EXTENSION = ".ptrac.gz"
+
+
+class PTRACWriter():
+    """
+    A class to write a PTRAC file incrementally, instead of building the whole PTRAC in memory and dumping it at once.
+
+    The report info is written when the file is opened, each flaw is written as soon as it is created and the
+    ReportAssets, evidence and client info are written when the file is finished. Only the flaw being written needs to be
+    held in memory. The written file is the same JSON `json.dump()` would create for the full PTRAC, with the keys in the
+    order of the PTRAC template. Values are encoded with the configured `JSONSerializer`, other serializers than the
+    standard library create semantically identical JSON, but can differ in whitespace and escaping.
+
+    The same PTRAC can be written to multiple files at once, only encoding the data once. Files with a `.gz` extension
+    are compressed with gzip as they are written.
+
+    Data is written to temporary files that replace the PTRACs once they are finished, so a PTRAC that failed part way
+    through is never left in the export folder. With `skip_unchanged`, an existing file with the exact same content is
+    kept instead of being replaced, so its modified time only changes when the PTRAC does. Use as a context manager:
+
+        with PTRACWriter([file_path], report_info) as writer:
+            writer.write_flaw(flaw)
+            writer.finish(report_assets, client_info)
+    """
+    def __init__(self, file_paths: list[str], report_info: dict, compression_level: int = 6, serializer: JSONSerializer|None = None, skip_unchanged: bool = False):
+        """
+        :param file_paths: file paths to save the PTRAC to. paths ending in `.gz` are compressed
+        :type file_paths: list[str]
+        :param report_info: report info of the PTRAC, written immediately
+        :type report_info: dict
+        :param compression_level: gzip compression level from 1 (fastest) to 9 (smallest), defaults to 6
+        :type compression_level: int, optional
+        :param serializer: serializer to encode the PTRAC with, defaults to the serializer from `get_serializer()`
+        :type serializer: JSONSerializer | None, optional
+        :param skip_unchanged: keep existing files that are identical to the new PTRAC. compressed files are written without
+        a timestamp, so the same PTRAC is always compressed to the same bytes, defaults to False
+        :type skip_unchanged: bool, optional
+        """
+        self.file_paths = file_paths
+        self.temp_paths = [f'{file_path}.{os.getpid()}.tmp' for file_path in file_paths]
+        self.compression_level = compression_level
+        self.files = []
+        self.flaw_count = 0
+        self.finished = False
+        self.report_info = report_info
+        self.serializer = serializer if serializer != None else get_serializer()
+        self.skip_unchanged = skip_unchanged
+        self.unchanged_file_paths = [] # existing files kept since they were identical to the new PTRAC
+
+    def _open(self, file_path: str, temp_path: str):
+        if not file_path.endswith(".gz"):
+            return open(temp_path, 'wb')
+        return CompressedFile(temp_path, os.path.basename(file_path)[:-3], self.compression_level, mtime=0 if self.skip_unchanged else None)
+
+    def __enter__(self):
+        try:
+            for file_path, temp_path in zip(self.file_paths, self.temp_paths):
+                self.files.append(self._open(file_path, temp_path))
+            self._write(b'{"report_info": ')
+            self._write_value(self.report_info)
+            self._write(b', "flaws_array": [')
+        except Exception:
+            self._discard()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type != None or not self.finished:
+            if exc_type == None:
+                log.warning(f'PTRAC \'{self.file_paths[0]}\' was not finished. Discarding...')
+            self._discard()
+            return False
+
+        try:
+            for file in self.files:
+                file.close()
+        except Exception:
+            self._discard()
+            raise
+        for file_path, temp_path in zip(self.file_paths, self.temp_paths):
+            if self.skip_unchanged and os.path.isfile(file_path) and filecmp.cmp(temp_path, file_path, shallow=False):
+                os.remove(temp_path)
+                self.unchanged_file_paths.append(file_path)
+                continue
+            os.replace(temp_path, file_path)
+        return False
+
+    def _discard(self) -> None:
+        for file in self.files:
+            try:
+                file.close()
+            except Exception:
+                pass
+        for temp_path in self.temp_paths:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _write(self, data: bytes) -> None:
+        for file in self.files:
+            file.write(data)
+
+    def _write_value(self, value) -> None:
+        # each value is encoded in one go, since json.dump only uses the C encoder when encoding in one go and falls back
+        # to a much slower python encoder. values are a single flaw or asset, or a small part of the PTRAC, so the
+        # encoded value stays small
+        self._write(self.serializer.dumps(value))
+
+    def write_flaw(self, flaw: dict) -> None:
+        """
+        Adds a flaw to the `flaws_array` of the PTRAC. Flaws must be complete when written, they can't be updated after.
+        """
+        if self.flaw_count > 0:
+            self._write(b', ')
+        self._write_value(flaw)
+        self.flaw_count += 1
+
+    def finish(self, report_assets: dict, client_info: dict, evidence: list = []) -> None:
+        """
+        Closes the `flaws_array` and writes the rest of the PTRAC. No more flaws can be written after.
+
+        :param report_assets: assets of the report, keyed by asset id
+        :type report_assets: dict
+        :param client_info: client info of the PTRAC
+        :type client_info: dict
+        :param evidence: evidence of the PTRAC, defaults to []
+        :type evidence: list, optional
+        """
+        self._write(b'], "summary": {"ReportAssets": {')
+        # a report can have thousands of assets, write one at a time
+        report_asset_items = report_assets.items()
+        if self.serializer.sort_keys:
+            report_asset_items = sorted(report_asset_items, key=lambda item: item[0])
+        for index, (asset_id, asset) in enumerate(report_asset_items):
+            if index > 0:
+                self._write(b', ')
+            self._write_value(asset_id)
+            self._write(b': ')
+            self._write_value(asset)
+        self._write(b'}}, "evidence": ')
+        self._write_value(evidence)
+        self._write(b', "client_info": ')
+        self._write_value(client_info)
+        self._write(b'}')
+        self.finished = True
+
+
+class CompressedFile():
+    """
+    A binary file that is compressed with gzip as it is written.
+    """
+    def __init__(self, file_path: str, original_file_name: str, compression_level: int, mtime: float|None = None):
+        """
+        :param file_path: file path to save the compressed file to
+        :type file_path: str
+        :param original_file_name: name of the uncompressed file, stored in the gzip header so the file keeps its name
+        when decompressed
+        :type original_file_name: str
+        :param compression_level: gzip compression level from 1 (fastest) to 9 (smallest)
+        :type compression_level: int
+        :param mtime: modified time stored in the gzip header, 0 for no time, defaults to None for the current time
+        :type mtime: float | None, optional
+        """
+        # GzipFile does not close a file object it is given
+        self.raw_file = open(file_path, 'wb')
+        try:
+            compressed_file = gzip.GzipFile(filename=original_file_name, mode='wb', compresslevel=compression_level, fileobj=self.raw_file, mtime=mtime)
+            # buffered so the many small writes of a PTRAC are compressed in larger chunks
+            self.file = io.BufferedWriter(compressed_file, buffer_size=1024 * 1024)
+        except Exception:
+            self.raw_file.close()
+            raise
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+
+    def close(self) -> None:
+        try:
+            self.file.close()
+        finally:
+            self.raw_file.close()
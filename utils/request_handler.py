@@ -7,6 +7,7 @@ import time
 import settings
 import utils.log_handler as logger
 log = logger.log
+from utils.json_handler import get_serializer
 
 from api.exceptions import *
 
@@ -49,13 +50,21 @@ def _do(http_method: str, base_url: str, headers: dict, endpoint: str, name: str
     full_url = base_url + endpoint
     log_line_pre = f"method={http_method}, url={full_url}"
     log_line_post = ', '.join((log_line_pre, "success={}, status_code={}, message={}"))
+
+    # encode the payload once with the configured JSON serializer, instead of with requests' json encoding on every retry
+    # a multipart form request ignores the payload, same as requests does when given both json and files
+    body = None
+    if data != None and files == None:
+        body = get_serializer().dumps(data)
+        if not any(key.lower() == "content-type" for key in headers):
+            headers = {**headers, 'Content-Type': "application/json"}
     
     retries = 0
     while retries <= settings.retries:
         # Log HTTP params and perform an HTTP request, catching and re-raising any exceptions
         try:
             log.debug(log_line_pre)
-            response = requests.request(method=http_method, url=full_url, verify=settings.verify_ssl, headers=headers, json=data, files=files)
+            response = requests.request(method=http_method, url=full_url, verify=settings.verify_ssl, headers=headers, data=body, files=files)
         except requests.exceptions.RequestException as e:
             if retries < settings.retries:
                 retries += 1
@@ -0,0 +1,313 @@
+import posixpath
+import zipfile
+from datetime import datetime, timezone
+from typing import Iterator
+from xml.etree.ElementTree import iterparse, parse
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import from_excel, from_ISO8601, CALENDAR_WINDOWS_1900, CALENDAR_MAC_1904
+
+
+SHEET_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DC_TERMS_NS = "http://purl.org/dc/terms/"
+
+ROW_TAG = f'{{{SHEET_MAIN_NS}}}row'
+CELL_TAG = f'{{{SHEET_MAIN_NS}}}c'
+VALUE_TAG = f'{{{SHEET_MAIN_NS}}}v'
+INLINE_STRING_TAG = f'{{{SHEET_MAIN_NS}}}is'
+TEXT_TAG = f'{{{SHEET_MAIN_NS}}}t'
+RICH_TEXT_RUN_TAG = f'{{{SHEET_MAIN_NS}}}r'
+DIMENSION_TAG = f'{{{SHEET_MAIN_NS}}}dimension'
+SHEET_DATA_TAG = f'{{{SHEET_MAIN_NS}}}sheetData'
+
+
+def _cast_number(value: str) -> int|float:
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _get_text_content(element) -> str:
+    """
+    Returns the plain text of a shared or inline string, joining any rich text runs and ignoring phonetic runs
+    """
+    snippets = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            snippets.append(child.text or "")
+        elif child.tag == RICH_TEXT_RUN_TAG:
+            text = child.find(TEXT_TAG)
+            if text is not None:
+                snippets.append(text.text or "")
+    return "".join(snippets)
+
+
+def get_xlsx_modified_time(file_path: str) -> float|None:
+    """
+    Returns the time an XLSX file was last modified, from the document properties saved in the file. Unlike the file
+    system's modified time, this stays the same when the file is copied or downloaded again.
+
+    :param file_path: file path to the XLSX file
+    :type file_path: str
+    :return: time in seconds since the epoch, or None if the file does not have a modified time
+    :rtype: float | None
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open("_rels/.rels") as source:
+                root = parse(source).getroot()
+            for rel in root.iter(f'{{{PKG_REL_NS}}}Relationship'):
+                if rel.get('Type', "").endswith("/core-properties"):
+                    with archive.open(rel.get('Target').lstrip("/")) as source:
+                        modified = parse(source).getroot().findtext(f'{{{DC_TERMS_NS}}}modified')
+                    break
+            else:
+                return None
+    except (OSError, KeyError, zipfile.BadZipFile, SyntaxError):
+        return None
+
+    if modified == None or modified.strip() == "":
+        return None
+    try:
+        modified_time = datetime.fromisoformat(modified.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if modified_time.tzinfo == None:
+        modified_time = modified_time.replace(tzinfo=timezone.utc)
+    return modified_time.timestamp()
+
+
+class XLSXSheetReader():
+    """
+    A class to stream the rows of the active worksheet in an XLSX file directly from the zip archive.
+
+    The worksheet XML is parsed incrementally and each row is converted into a tuple of plain values, without building
+    any cell objects. Rows are returned in the same shape as openpyxl's `iter_rows(values_only=True)` on a read only
+    worksheet - shared strings are resolved, numbers are cast to int or float, date formatted numbers are converted to
+    datetimes, and rows are padded with None to the width of the sheet's dimension.
+
+    Raises an exception when opening a file this reader does not support, so the caller can fall back to openpyxl.
+    """
+    def __init__(self, file_path: str):
+        """
+        Opens the XLSX file and loads the workbook level data needed to read the active worksheet
+
+        :param file_path: file path to the XLSX file
+        :type file_path: str
+        """
+        self.archive = zipfile.ZipFile(file_path)
+        try:
+            workbook_path = self._get_workbook_path()
+            with self.archive.open(workbook_path) as source:
+                workbook = parse(source).getroot()
+            workbook_rels = self._get_rels(workbook_path)
+
+            self.epoch = CALENDAR_WINDOWS_1900
+            workbook_pr = workbook.find(f'{{{SHEET_MAIN_NS}}}workbookPr')
+            if workbook_pr is not None and workbook_pr.get('date1904') in ("1", "true"):
+                self.epoch = CALENDAR_MAC_1904
+
+            # active sheet is the first sheet unless another sheet was selected when the file was saved
+            active_index = 0
+            workbook_view = workbook.find(f'{{{SHEET_MAIN_NS}}}bookViews/{{{SHEET_MAIN_NS}}}workbookView')
+            if workbook_view is not None:
+                active_index = int(workbook_view.get('activeTab', 0))
+            sheets = workbook.findall(f'{{{SHEET_MAIN_NS}}}sheets/{{{SHEET_MAIN_NS}}}sheet')
+            self.sheet_path = workbook_rels[sheets[active_index].get(f'{{{REL_NS}}}id')]['target']
+
+            self.shared_strings = []
+            self.date_styles = set()
+            self.timedelta_styles = set()
+            for rel in workbook_rels.values():
+                if rel['type'].endswith("/sharedStrings"):
+                    self.shared_strings = self._load_shared_strings(rel['target'])
+                elif rel['type'].endswith("/styles"):
+                    self.date_styles, self.timedelta_styles = self._load_date_styles(rel['target'])
+        except Exception:
+            self.archive.close()
+            raise
+
+        self.max_column = None
+        self.max_row = None
+
+    def close(self) -> None:
+        self.archive.close()
+
+    def _get_workbook_path(self) -> str:
+        with self.archive.open("_rels/.rels") as source:
+            root = parse(source).getroot()
+        for rel in root.iter(f'{{{PKG_REL_NS}}}Relationship'):
+            if rel.get('Type', "").endswith("/officeDocument"):
+                return rel.get('Target').lstrip("/")
+        raise ValueError("XLSX file does not contain a workbook")
+
+    def _get_rels(self, part_path: str) -> dict:
+        """
+        Returns the relationships of a part in the archive as {id: {'type': type, 'target': path in archive}}
+        """
+        folder, file_name = posixpath.split(part_path)
+        with self.archive.open(posixpath.join(folder, "_rels", f'{file_name}.rels')) as source:
+            root = parse(source).getroot()
+        rels = {}
+        for rel in root.iter(f'{{{PKG_REL_NS}}}Relationship'):
+            target = rel.get('Target')
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            rels[rel.get('Id')] = {'type': rel.get('Type', ""), 'target': target}
+        return rels
+
+    def _load_shared_strings(self, path: str) -> list:
+        strings = []
+        with self.archive.open(path) as source:
+            for _, element in iterparse(source):
+                if element.tag == f'{{{SHEET_MAIN_NS}}}si':
+                    strings.append(_get_text_content(element).replace('x005F_', ''))
+                    element.clear()
+        return strings
+
+    def _load_date_styles(self, path: str) -> tuple:
+        """
+        Returns the indexes of cell styles with date and timedelta number formats
+        """
+        with self.archive.open(path) as source:
+            root = parse(source).getroot()
+        custom_formats = {}
+        for num_fmt in root.iter(f'{{{SHEET_MAIN_NS}}}numFmt'):
+            custom_formats[int(num_fmt.get('numFmtId'))] = num_fmt.get('formatCode')
+
+        date_styles = set()
+        timedelta_styles = set()
+        cell_xfs = root.find(f'{{{SHEET_MAIN_NS}}}cellXfs')
+        if cell_xfs is None:
+            return date_styles, timedelta_styles
+        for index, xf in enumerate(cell_xfs.iter(f'{{{SHEET_MAIN_NS}}}xf')):
+            num_fmt_id = int(xf.get('numFmtId', 0))
+            fmt = custom_formats.get(num_fmt_id, BUILTIN_FORMATS.get(num_fmt_id))
+            if is_date_format(fmt):
+                date_styles.add(index)
+            if is_timedelta_format(fmt):
+                timedelta_styles.add(index)
+        return date_styles, timedelta_styles
+
+    def _get_cell_value(self, cell):
+        data_type = cell.get('t', 'n')
+
+        if data_type == "inlineStr":
+            inline_string = cell.find(INLINE_STRING_TAG)
+            if inline_string is None:
+                return None
+            return _get_text_content(inline_string)
+
+        value = cell.findtext(VALUE_TAG) or None
+        if value is None:
+            return None
+
+        if data_type == 'n':
+            value = _cast_number(value)
+            style_id = int(cell.get('s', 0))
+            if style_id in self.date_styles:
+                try:
+                    return from_excel(value, self.epoch, timedelta=style_id in self.timedelta_styles)
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return value
+        if data_type == 's':
+            return self.shared_strings[int(value)]
+        if data_type == 'b':
+            return bool(int(value))
+        if data_type == 'd':
+            return from_ISO8601(value)
+        # 'str' formula results and 'e' errors
+        return value
+
+    def iter_rows(self) -> Iterator[tuple]:
+        """
+        Streams the rows of the worksheet. Missing rows and cells are filled with None values.
+        """
+        column_indexes = {}
+        row_counter = 0
+        counter = 1
+        last_row_number = 1
+        empty_row = ()
+
+        sheet_data = None
+        with self.archive.open(self.sheet_path) as source:
+            for event, element in iterparse(source, events=("start", "end")):
+                if event == "start":
+                    if element.tag == SHEET_DATA_TAG:
+                        sheet_data = element
+                    continue
+
+                if element.tag == DIMENSION_TAG:
+                    try:
+                        min_col, min_row, self.max_column, self.max_row = range_boundaries(element.get('ref'))
+                    except (TypeError, ValueError): # dimension without a range
+                        pass
+                    if self.max_column is not None:
+                        empty_row = (None,) * self.max_column
+                    continue
+
+                if element.tag != ROW_TAG:
+                    continue
+
+                row_number = element.get('r')
+                row_counter = int(row_number) if row_number is not None else row_counter + 1
+                last_row_number = row_counter
+                if self.max_row is not None and row_counter > self.max_row:
+                    break
+
+                # parse cells in row
+                cells = []
+                column_counter = 0
+                for cell in element:
+                    if cell.tag != CELL_TAG:
+                        continue
+                    coordinate = cell.get('r')
+                    if coordinate is None:
+                        column_counter += 1
+                    else:
+                        column_counter = column_indexes.get(coordinate.rstrip("0123456789"))
+                        if column_counter is None:
+                            letters = coordinate.rstrip("0123456789")
+                            column_counter = 0
+                            for letter in letters:
+                                column_counter = column_counter * 26 + ord(letter) - 64
+                            column_indexes[letters] = column_counter
+                    cells.append((column_counter, self._get_cell_value(cell)))
+
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+
+                # some rows are missing
+                while counter < row_counter:
+                    counter += 1
+                    yield empty_row
+
+                if counter > row_counter:
+                    continue
+                counter += 1
+
+                # make sure each row contains the same number of values
+                max_column = self.max_column
+                if max_column is None:
+                    if len(cells) == 0:
+                        yield ()
+                        continue
+                    max_column = cells[-1][0]
+                row = [None] * max_column
+                for column, value in cells:
+                    if column <= max_column:
+                        row[column-1] = value
+                yield tuple(row)
+
+        if self.max_row is not None and self.max_row < last_row_number:
+            while counter <= self.max_row:
+                counter += 1
+                yield empty_row